@@ -0,0 +1,314 @@
+# benchmark.py
+#
+# 描述:
+# 手势识别热点路径的基准测试。
+# 覆盖 calculate_angle、recognize_gesture（单手）、recognize_gestures_batch（批量）、
+# 动态手势识别器的单帧更新、最近质心 / kNN 分类器（learned_classifier，检查每只手的耗时预算），
+# 以及整帧循环（预处理 + hands.process + 识别）。输入可以是固定种子的合成关键点、
+# replay.py 使用的录制目录，以及一段短视频（未指定时自动生成一段合成视频）。
+# 每项测量每秒调用次数、单次耗时分布 (p50/p95/p99) 和峰值内存，结果写成 JSON，
+# 并可与另一次提交的结果对比。
+#
+# 用法:
+#   python benchmark.py --out bench-new.json
+#   python benchmark.py --recording session-01 --video clip.mp4 --out bench-new.json
+#   python benchmark.py --model model.npz --budget-us 100 --skip-video
+#   python benchmark.py --compare bench-old.json bench-new.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+from dynamic_gestures import DynamicGestureRecognizer
+from gesture_classifier import (
+    DEFAULT_RULES, FINGER_JOINTS, calculate_angle, recognize_gesture, recognize_gestures_batch)
+from learned_classifier import CentroidClassifier, normalize_landmarks
+
+
+def synthetic_landmarks(n, seed=0):
+    """
+    生成 n 只手的合成关键点 (n, 21, 3)。每根手指随机伸直或弯曲，覆盖所有手势分支。
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.random((n, 21, 3))
+    straight = rng.random((n, len(FINGER_JOINTS))) < 0.5
+    for finger, (mcp, pip, tip) in enumerate(FINGER_JOINTS):
+        # 伸直的手指：指尖落在 MCP->PIP 方向的延长线上
+        extension = points[:, pip] + (points[:, pip] - points[:, mcp]) * rng.random((n, 1))
+        points[:, tip] = np.where(straight[:, finger, None], extension, points[:, tip])
+    return points
+
+
+def _as_hand_landmarks(points):
+    # 模拟 MediaPipe 的 NormalizedLandmarkList，用于测试单手接口的真实调用开销
+    return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in points.tolist()])
+
+
+def measure(fn, min_time=0.5, inner=1, items_per_call=1):
+    """
+    反复调用 fn，返回吞吐量、单次耗时分布 (微秒) 与峰值内存。
+    inner 为每个计时样本内连续调用的次数，用于测量很快的函数。
+    """
+    fn()  # 预热
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    samples = []
+    total = 0.0
+    while total < min_time:
+        start = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed / inner)
+        total += elapsed
+    samples_us = np.array(samples) * 1e6
+    p50, p95, p99 = np.percentile(samples_us, (50, 95, 99))
+    calls = len(samples) * inner
+    return {
+        "calls": calls,
+        "calls_per_sec": calls / total,
+        "items_per_sec": calls * items_per_call / total,
+        "p50_us": float(p50),
+        "p95_us": float(p95),
+        "p99_us": float(p99),
+        "peak_kib": peak / 1024.0,
+    }
+
+
+def bench_classifier(landmarks, label, min_time):
+    """
+    对一组 (N, 21, 3) 关键点运行分类器相关的基准，返回 {名称: 结果}。
+    """
+    results = {}
+    first = landmarks[0]
+    a, b, c = first[5, :2].tolist(), first[6, :2].tolist(), first[8, :2].tolist()
+    results[f"{label}/calculate_angle"] = measure(
+        lambda: calculate_angle(a, b, c), min_time, inner=200)
+
+    hands = [_as_hand_landmarks(p) for p in landmarks[:256]]
+    state = {"i": 0}
+
+    def single():
+        recognize_gesture(hands[state["i"] % len(hands)])
+        state["i"] += 1
+    results[f"{label}/recognize_gesture"] = measure(single, min_time, inner=50)
+
+    for n in (1, 64, len(landmarks)):
+        batch = np.ascontiguousarray(landmarks[:n], dtype=np.float64)
+        results[f"{label}/recognize_gestures_batch[{n}]"] = measure(
+            lambda: recognize_gestures_batch(batch), min_time,
+            inner=max(1, 1000 // n), items_per_call=n)
+
+    # 动态手势：每帧一次 O(1) 的环形缓冲区更新，时间戳按 30 FPS 递增
+    recognizer = DynamicGestureRecognizer()
+    frames = [np.ascontiguousarray(p) for p in landmarks[:256]]
+
+    def dynamic_update():
+        i = state["i"]
+        recognizer.update(frames[i % len(frames)], i / 30.0)
+        state["i"] += 1
+    results[f"{label}/dynamic_update"] = measure(dynamic_update, min_time, inner=50)
+    return results
+
+
+def bench_learned(landmarks, label, min_time, model=None, budget_us=100.0):
+    """
+    最近质心 / kNN 分类器的基准。未给出 model 时用规则分类器的标签在 landmarks 上训练一个
+    （只用于计时，准确率无意义）。结果中的 per_hand_us 为单只手的 p50 耗时，
+    单手（每帧一只手）的情形超过 budget_us 时 within_budget 为 False。
+    """
+    if model is None:
+        model = CentroidClassifier.train(
+            normalize_landmarks(landmarks), DEFAULT_RULES.classify_indices(landmarks),
+            DEFAULT_RULES.names)
+    results = {}
+    for n in (1, 2, 64, len(landmarks)):
+        batch = np.ascontiguousarray(landmarks[:n], dtype=np.float64)
+        result = measure(lambda: model.classify(batch), min_time,
+                         inner=max(1, 1000 // n), items_per_call=n)
+        result["per_hand_us"] = result["p50_us"] / n
+        if n == 1:
+            result["budget_us"] = budget_us
+            result["within_budget"] = result["per_hand_us"] <= budget_us
+        results[f"{label}/learned_classify[{n}]"] = result
+    return results
+
+
+def _write_synthetic_clip(path, frames=60, size=(640, 480)):
+    import cv2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, size)
+    for i in range(frames):
+        frame = np.full((size[1], size[0], 3), 40, dtype=np.uint8)
+        x = 40 + i * (size[0] - 160) // frames
+        cv2.rectangle(frame, (x, 160), (x + 120, 320), (180, 200, 220), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def bench_frame_loop(video, max_frames=300):
+    """
+    在视频上逐帧运行 main.process_frame（预处理 + hands.process + 识别）。
+    缺少 OpenCV / MediaPipe 时返回 {"skipped": 原因}。
+    """
+    try:
+        import cv2
+        import mediapipe as mp
+
+        from main import open_source, process_frame
+        from preprocess import FrameBuffers, read_frame
+        hands_module = mp.solutions.hands
+    except (ImportError, AttributeError) as e:
+        return {"skipped": f"frame loop unavailable: {e}"}
+
+    tmpdir = None
+    if video is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        video = os.path.join(tmpdir.name, 'synthetic.avi')
+        _write_synthetic_clip(video)
+
+    hands = hands_module.Hands(
+        max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.5)
+    cap, _ = open_source(video)
+    buffers = FrameBuffers()
+    samples = []
+    tracemalloc.start()
+    try:
+        while len(samples) < max_frames:
+            start = time.perf_counter()
+            if not read_frame(cap, buffers):
+                break
+            process_frame(hands, buffers)
+            samples.append(time.perf_counter() - start)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        hands.close()
+        cap.release()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    if not samples:
+        return {"skipped": f"no frames could be read from {video}"}
+    samples_ms = np.array(samples) * 1000.0
+    p50, p95, p99 = np.percentile(samples_ms, (50, 95, 99))
+    return {
+        "frames": len(samples),
+        "fps": len(samples) / float(np.sum(samples)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "peak_kib": peak / 1024.0,
+        "opencv": cv2.__version__,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_all(args):
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "benchmarks": {},
+    }
+    benchmarks = report["benchmarks"]
+    synthetic = synthetic_landmarks(args.hands)
+    benchmarks.update(bench_classifier(synthetic, "synthetic", args.min_time))
+    model = CentroidClassifier.load(args.model) if args.model else None
+    benchmarks.update(bench_learned(synthetic, "synthetic", args.min_time, model, args.budget_us))
+
+    if args.recording:
+        from recording import LandmarkRecording
+        recording = LandmarkRecording(args.recording)
+        if len(recording.hands):
+            benchmarks.update(bench_classifier(
+                np.asarray(recording.landmarks, dtype=np.float64), "recorded", args.min_time))
+
+    if not args.skip_video:
+        benchmarks["frame_loop"] = bench_frame_loop(args.video, args.max_frames)
+    return report
+
+
+def compare(old_path, new_path):
+    """
+    打印两次结果中同名基准的吞吐量与 p50 变化。
+    """
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)["benchmarks"]
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)["benchmarks"]
+    print(f"{'benchmark':48s} {'old':>12s} {'new':>12s} {'change':>8s}")
+    for name in sorted(set(old) & set(new)):
+        o, n = old[name], new[name]
+        key = "items_per_sec" if "items_per_sec" in o else "fps"
+        if key not in o or key not in n:
+            continue
+        change = (n[key] / o[key] - 1.0) * 100.0 if o[key] else float('nan')
+        print(f"{name:48s} {o[key]:12.1f} {n[key]:12.1f} {change:+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the gesture recognizer hot paths")
+    parser.add_argument('--out', default=None, help="结果 JSON 的输出路径（默认只打印）")
+    parser.add_argument('--hands', type=int, default=4096, help="合成关键点的手数")
+    parser.add_argument('--recording', default=None, help="额外使用的录制目录（见 recording.py）")
+    parser.add_argument('--video', default=None, help="整帧循环使用的视频（默认生成合成视频）")
+    parser.add_argument('--max-frames', type=int, default=300, help="整帧循环最多处理的帧数")
+    parser.add_argument('--skip-video', action='store_true', help="跳过整帧循环基准")
+    parser.add_argument('--min-time', type=float, default=0.5, help="每项基准的最短运行时间（秒）")
+    parser.add_argument('--model', default=None,
+                        help="learned_classifier 训练得到的模型（默认在合成数据上临时训练一个）")
+    parser.add_argument('--budget-us', type=float, default=100.0,
+                        help="learned 分类器单只手的耗时预算（微秒，默认 100），超出时以非零状态退出")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="对比两次结果")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_all(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Results written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+    over = [name for name, result in report["benchmarks"].items()
+            if result.get("within_budget") is False]
+    for name in over:
+        result = report["benchmarks"][name]
+        print(f"Over budget: {name} {result['per_hand_us']:.1f} us/hand > {result['budget_us']:.1f} us",
+              file=sys.stderr)
+    if over:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
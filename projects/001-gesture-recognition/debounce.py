@@ -0,0 +1,131 @@
+# debounce.py
+#
+# 描述:
+# 手势输出的时间去抖。recognize_gesture 每帧独立给出标签，手在移动时会在 "Unknown"、"3"、"4"
+# 之间闪烁，下游每个消费者都得重新过滤一遍。GestureDebouncer 为每只手维护一个小状态机，
+# 只在满足以下条件时才“提交”一次手势切换:
+#   - 置信度：最近 window 帧中新手势所占比例达到 enter；
+#   - 最短停留：新手势连续领先至少 dwell 秒；
+#   - 滞回：当前已提交手势的置信度已降到 exit 以下（exit < enter，避免在阈值附近来回切换）。
+# 三个参数都可以按手势单独配置，写在规则文件（gestures.json）的 "debounce" 段:
+#
+#   "debounce": {
+#     "window": 8, "enter": 0.6, "exit": 0.35, "dwell": 0.15,
+#     "gestures": {"Unknown": {"enter": 0.75, "dwell": 0.3}}
+#   }
+#
+# 只依赖 Python 标准库。
+
+import json
+from collections import Counter, deque, namedtuple
+
+DebounceSettings = namedtuple('DebounceSettings', 'enter exit dwell')
+
+DEFAULT_WINDOW = 8
+DEFAULT_SETTINGS = DebounceSettings(enter=0.6, exit=0.35, dwell=0.15)
+
+
+class DebounceConfig:
+    """
+    去抖参数：窗口帧数，以及默认和按手势覆盖的 (enter, exit, dwell)。
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, default=DEFAULT_SETTINGS, gestures=None):
+        if window < 1:
+            raise ValueError(f"Debounce window must be at least 1 frame, got {window}")
+        self.window = window
+        self.default = default
+        self.gestures = dict(gestures or {})
+        for name, settings in [(None, default)] + list(self.gestures.items()):
+            if not 0.0 <= settings.exit <= settings.enter <= 1.0:
+                raise ValueError(
+                    f"Debounce settings for {name or 'default'}: expected 0 <= exit <= enter <= 1, "
+                    f"got exit={settings.exit} enter={settings.enter}")
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        由规则配置（gestures.json 的内容）中的 "debounce" 段构造；没有该段时使用默认参数。
+        """
+        section = config.get("debounce", {})
+        default = DEFAULT_SETTINGS._replace(
+            **{k: float(section[k]) for k in DebounceSettings._fields if k in section})
+        gestures = {}
+        for name, overrides in section.get("gestures", {}).items():
+            unknown_keys = set(overrides) - set(DebounceSettings._fields)
+            if unknown_keys:
+                raise ValueError(f"Debounce settings for '{name}': unknown key(s) {sorted(unknown_keys)}")
+            gestures[name] = default._replace(**{k: float(v) for k, v in overrides.items()})
+        return cls(int(section.get("window", DEFAULT_WINDOW)), default, gestures)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_config(json.load(f))
+
+    def settings(self, gesture):
+        return self.gestures.get(gesture, self.default)
+
+
+class GestureDebouncer:
+    """
+    单只手的去抖状态机。
+
+        debouncer = GestureDebouncer(config)
+        if debouncer.update(label, timestamp):        # 提交了一次切换
+            publish(debouncer.current, debouncer.confidence)
+
+    属性:
+      current: 已提交的手势，首次提交前为 None
+      confidence: current 在最近 window 帧中所占的比例
+      leader: 最近 window 帧中出现最多的手势
+    """
+
+    def __init__(self, config=None):
+        self.config = config or DebounceConfig()
+        self._labels = deque(maxlen=self.config.window)
+        self._counts = Counter()
+        self.current = None
+        self.leader = None
+        self._leader_since = None
+
+    def reset(self):
+        self._labels.clear()
+        self._counts.clear()
+        self.current = None
+        self.leader = None
+        self._leader_since = None
+
+    @property
+    def confidence(self):
+        return self._counts[self.current] / self.config.window if self.current is not None else 0.0
+
+    def update(self, label, timestamp):
+        """
+        输入当前帧的原始标签，提交了新手势时返回 True。
+        """
+        if len(self._labels) == self._labels.maxlen:
+            oldest = self._labels[0]
+            self._counts[oldest] -= 1
+            if not self._counts[oldest]:
+                del self._counts[oldest]
+        self._labels.append(label)
+        self._counts[label] += 1
+
+        # 窗口很小（默认 8 帧），直接取计数最大者；并列时保持原领先者，避免来回切换
+        best = max(self._counts.values())
+        if self._counts[self.leader] < best:
+            self.leader = label if self._counts[label] == best else self._counts.most_common(1)[0][0]
+            self._leader_since = timestamp
+
+        if self.leader == self.current:
+            return False
+        enter = self.config.settings(self.leader)
+        if self._counts[self.leader] / self.config.window < enter.enter:
+            return False
+        if timestamp - self._leader_since < enter.dwell:
+            return False
+        if self.current is not None and self.confidence >= self.config.settings(self.current).exit:
+            return False
+        self.current = self.leader
+        return True
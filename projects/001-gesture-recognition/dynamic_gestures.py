@@ -0,0 +1,196 @@
+# dynamic_gestures.py
+#
+# 描述:
+# 动态手势识别：Swipe Left / Right / Up / Down、Circle、Push。
+# 静态手势（gesture_classifier.recognize_gesture）只看单帧的手型，动态手势看的是手掌在最近若干帧内的运动轨迹。
+# 每只手一个 DynamicGestureRecognizer，内部是定长环形缓冲区，保存最近 window 帧的手掌中心、
+# 手掌尺寸和时间戳；轨迹特征（路径长度、累计转角）在样本进出窗口时增量维护，
+# 净位移和尺寸变化只取首尾两个样本，因此每帧的开销是 O(1)，与窗口长度无关。
+# 只依赖 Python 标准库，单次 update 在微秒量级。
+#
+# 坐标为 MediaPipe 的归一化坐标（x 向右、y 向下）。main.py 先水平翻转画面再推理，
+# 所以画面中的左右与操作者自己的左右一致。
+
+import math
+
+# 手掌中心取手腕和四指根部（MCP）的平均；
+# 手掌尺寸取手腕（PALM_POINTS[0]）到中指根部（PALM_POINTS[2]）的距离，手靠近摄像头时变大
+PALM_POINTS = [0, 5, 9, 13, 17]
+
+SWIPE_LEFT = "Swipe Left"
+SWIPE_RIGHT = "Swipe Right"
+SWIPE_UP = "Swipe Up"
+SWIPE_DOWN = "Swipe Down"
+CIRCLE = "Circle"
+PUSH = "Push"
+DYNAMIC_GESTURE_NAMES = (SWIPE_LEFT, SWIPE_RIGHT, SWIPE_UP, SWIPE_DOWN, CIRCLE, PUSH)
+
+
+class DynamicGestureRecognizer:
+    """
+    单只手的动态手势识别器。
+
+        recognizer = DynamicGestureRecognizer()
+        name = recognizer.update(landmarks, timestamp)   # 识别到时返回手势名称，否则 None
+
+    参数（距离均以手掌尺寸为单位，不受手离摄像头远近的影响）:
+      window: 环形缓冲区的帧数
+      max_duration: 一个动态手势最长持续时间（秒），只看这段时间内的样本
+      swipe_distance: 挥动的最小净位移
+      swipe_straightness: 挥动的最小平直度（净位移 / 路径长度）
+      circle_turn: 画圈的最小累计转角（圈数）
+      circle_path: 画圈的最小路径长度
+      circle_closure: 画圈时首尾距离与路径长度之比的上限
+      push_scale: 推的最小手掌尺寸放大倍数
+      push_drift: 推的过程中允许的最大平面位移
+      min_step: 小于该值的帧间位移视为抖动，不参与转角计算
+      cooldown: 识别到一个手势后的冷却时间（秒），期间不再触发
+    """
+
+    def __init__(self, window=24, max_duration=1.0, swipe_distance=3.0, swipe_straightness=0.9,
+                 circle_turn=0.85, circle_path=4.0, circle_closure=0.35, push_scale=1.3,
+                 push_drift=0.6, min_step=0.1, cooldown=0.5):
+        self.window = window
+        self.max_duration = max_duration
+        self.swipe_distance = swipe_distance
+        self.swipe_straightness = swipe_straightness
+        self.circle_turn = circle_turn * 2.0 * math.pi
+        self.circle_path = circle_path
+        self.circle_closure = circle_closure
+        self.push_scale = push_scale
+        self.push_drift = push_drift
+        self.min_step = min_step
+        self.cooldown = cooldown
+        # 环形缓冲区：样本 k 的位置、尺寸、时间戳，进入窗口时的步长 (k-1 -> k) 和转角（步 k-1 与步 k 之间）
+        self._x = [0.0] * window
+        self._y = [0.0] * window
+        self._scale = [0.0] * window
+        self._time = [0.0] * window
+        self._step = [0.0] * window
+        self._turn = [0.0] * window
+        self.last_gesture = None
+        self.last_time = None
+        self.reset()
+
+    def reset(self):
+        """
+        清空轨迹（手丢失或识别到手势后调用）。
+        """
+        self._start = 0
+        self._count = 0
+        self._path = 0.0
+        self._turning = 0.0
+        self._heading = None  # 最近一次有效步的方向 (dx, dy)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def path_length(self):
+        return self._path
+
+    @property
+    def turning(self):
+        return self._turning
+
+    def _evict(self):
+        # 移出最旧的样本：它之后的第一步和依赖这一步的转角离开窗口
+        self._start = (self._start + 1) % self.window
+        self._count -= 1
+        first = self._start
+        self._path -= self._step[first]
+        self._step[first] = 0.0
+        if self._count > 1:
+            second = (first + 1) % self.window
+            self._turning -= self._turn[second]
+            self._turn[second] = 0.0
+        self._turn[first] = 0.0
+
+    def _push(self, x, y, scale, timestamp):
+        if self._count == self.window:
+            self._evict()
+        k = (self._start + self._count) % self.window
+        step = turn = 0.0
+        if self._count:
+            prev = (k - 1) % self.window
+            dx, dy = x - self._x[prev], y - self._y[prev]
+            step = math.hypot(dx, dy)
+            if step >= self.min_step * scale:
+                if self._heading is not None:
+                    hx, hy = self._heading
+                    turn = math.atan2(hx * dy - hy * dx, hx * dx + hy * dy)
+                self._heading = (dx, dy)
+        self._x[k], self._y[k], self._scale[k], self._time[k] = x, y, scale, timestamp
+        self._step[k], self._turn[k] = step, turn
+        self._path += step
+        self._turning += turn
+        self._count += 1
+
+    def update(self, landmarks, timestamp):
+        """
+        输入一只手的 (21, 3) 关键点（数组或嵌套序列）和时间戳，识别到动态手势时返回名称。
+        """
+        if hasattr(landmarks, 'tolist'):
+            # NumPy 数组：一次取出需要的 5 个点再转成 Python 浮点数，比逐个元素索引快
+            points = landmarks[PALM_POINTS, :2].tolist()
+        else:
+            points = [landmarks[i] for i in PALM_POINTS]
+        wrist, mcp = points[0], points[2]
+        scale = math.hypot(mcp[0] - wrist[0], mcp[1] - wrist[1])
+        if scale <= 1e-6:
+            return None
+        x = (points[0][0] + points[1][0] + points[2][0] + points[3][0] + points[4][0]) / 5.0
+        y = (points[0][1] + points[1][1] + points[2][1] + points[3][1] + points[4][1]) / 5.0
+        self._push(x, y, scale, timestamp)
+        while self._count > 1 and timestamp - self._time[self._start] > self.max_duration:
+            self._evict()
+
+        if self.last_time is not None and timestamp - self.last_time < self.cooldown:
+            return None
+        gesture = self._classify()
+        if gesture is not None:
+            self.last_gesture = gesture
+            self.last_time = timestamp
+            self.reset()
+        return gesture
+
+    def recent(self, timestamp, hold=1.0):
+        """
+        返回 hold 秒内识别到的最近一个动态手势（用于界面显示），否则 None。
+        """
+        if self.last_time is not None and timestamp - self.last_time <= hold:
+            return self.last_gesture
+        return None
+
+    def _classify(self):
+        if self._count < 3:
+            return None
+        first = self._start
+        last = (self._start + self._count - 1) % self.window
+        # 以窗口内首尾尺寸的较小值作为单位，避免推的过程中阈值被放大
+        unit = min(self._scale[first], self._scale[last])
+        dx = (self._x[last] - self._x[first]) / unit
+        dy = (self._y[last] - self._y[first]) / unit
+        net = math.hypot(dx, dy)
+        path = self._path / unit
+
+        if self._scale[last] >= self._scale[first] * self.push_scale and net <= self.push_drift:
+            return PUSH
+        if abs(self._turning) >= self.circle_turn and path >= self.circle_path \
+                and net <= self.circle_closure * path:
+            return CIRCLE
+        if net >= self.swipe_distance and net >= self.swipe_straightness * path:
+            if abs(dx) >= abs(dy):
+                return SWIPE_RIGHT if dx > 0 else SWIPE_LEFT
+            return SWIPE_DOWN if dy > 0 else SWIPE_UP
+        return None
+
+
+def dynamic_gesture_event(gesture, timestamp, fields=None):
+    """
+    构造动态手势事件，格式与 events.GestureEventEmitter 的事件一致，type 为 "dynamic_gesture"。
+    """
+    event = {"type": "dynamic_gesture", "gesture": gesture, "timestamp": timestamp}
+    if fields:
+        event.update(fields)
+    return event
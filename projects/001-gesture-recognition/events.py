@@ -0,0 +1,160 @@
+# events.py
+#
+# 描述:
+# 手势事件的发布。无显示器部署时不再绘制和显示画面，而是把“手势变化”作为带时间戳的
+# 事件发布出去，供其他进程低成本地消费。
+# 事件格式为单行 JSON（NDJSON），例如:
+#   {"type": "gesture", "gesture": "Open Palm", "previous": "No Hand Detected",
+#    "timestamp": 1732262400.123, "frame": 42}
+# 支持的发布目标（见 open_publisher）:
+#   stdout           写到标准输出
+#   tcp:PORT         在 127.0.0.1:PORT 上监听，向所有已连接客户端广播
+#   unix:PATH        在 Unix 域套接字 PATH 上监听，向所有已连接客户端广播
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+# 每个客户端最多缓存这么多字节尚未发出的事件；超过时认为客户端已停止读取，断开连接
+MAX_PENDING_BYTES = 64 * 1024
+
+
+class StreamPublisher:
+    """
+    把事件以 NDJSON 形式写入文本流（默认 sys.stdout）。
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def publish(self, event):
+        self.stream.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class SocketPublisher:
+    """
+    在本地套接字上监听，向所有已连接的客户端广播 NDJSON 事件。
+    套接字是非阻塞的，不会拖慢识别循环：一次没发完的部分留在该客户端的待发送缓冲区里，
+    下一次发布时先发完，客户端收到的总是完整的行。
+    客户端断开，或待发送的数据超过 MAX_PENDING_BYTES（长时间不读取）时移除该连接；
+    只有这种被移除的连接，在连接关闭前的最后一行可能不完整。
+    """
+
+    def __init__(self, family, address):
+        self._family = family
+        self._address = address
+        self._clients = []  # [(连接, 待发送的字节 bytearray), ...]
+        self._lock = threading.Lock()
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        self._server.listen()
+        self._accept_thread = threading.Thread(
+            target=self._accept_loop, name='event-accept', daemon=True)
+        self._accept_thread.start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return  # 服务端已关闭
+            conn.setblocking(False)
+            with self._lock:
+                self._clients.append((conn, bytearray()))
+
+    def publish(self, event):
+        data = (json.dumps(event, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._lock:
+            alive = []
+            for conn, pending in self._clients:
+                pending += data
+                try:
+                    while pending:
+                        sent = conn.send(pending)
+                        del pending[:sent]
+                except BlockingIOError:
+                    pass  # 发送缓冲区已满，剩下的留到下一次
+                except OSError:
+                    conn.close()
+                    continue
+                if len(pending) > MAX_PENDING_BYTES:
+                    conn.close()
+                    continue
+                alive.append((conn, pending))
+            self._clients = alive
+
+    def close(self):
+        self._server.close()
+        with self._lock:
+            for conn, _ in self._clients:
+                conn.close()
+            self._clients = []
+        if self._family == getattr(socket, 'AF_UNIX', None):
+            try:
+                os.unlink(self._address)
+            except OSError:
+                pass
+
+
+def open_publisher(spec):
+    """
+    根据描述字符串创建发布器：'stdout'、'tcp:PORT' 或 'unix:PATH'。
+    """
+    if spec == 'stdout':
+        return StreamPublisher(sys.stdout)
+    kind, _, target = spec.partition(':')
+    if kind == 'tcp' and target.isdigit():
+        return SocketPublisher(socket.AF_INET, ('127.0.0.1', int(target)))
+    if kind == 'unix' and target and hasattr(socket, 'AF_UNIX'):
+        if os.path.exists(target):
+            os.unlink(target)
+        return SocketPublisher(socket.AF_UNIX, target)
+    raise ValueError(f"Unsupported event target '{spec}', expected stdout, tcp:PORT or unix:PATH")
+
+
+class GestureEventEmitter:
+    """
+    记录上一次的手势标签，只在标签变化时发布事件。
+    fields 中的键值会附加到每条事件上（例如多手模式下的 hand / handedness）。
+    """
+
+    def __init__(self, publisher, initial=None, fields=None):
+        self.publisher = publisher
+        self.current = initial
+        self.fields = fields or {}
+        self.frame_count = 0
+
+    def update(self, gesture_name, timestamp=None, confidence=None):
+        """
+        输入当前帧的手势标签；标签变化时发布事件并返回 True。
+        给出 confidence（例如去抖后的置信度）时一并写入事件。
+        """
+        frame = self.frame_count
+        self.frame_count += 1
+        if gesture_name == self.current:
+            return False
+        event = {
+            "type": "gesture",
+            "gesture": gesture_name,
+            "previous": self.current,
+            "timestamp": time.time() if timestamp is None else timestamp,
+            "frame": frame,
+        }
+        if confidence is not None:
+            event["confidence"] = round(confidence, 3)
+        event.update(self.fields)
+        self.current = gesture_name
+        self.publisher.publish(event)
+        return True
+
+    def close(self):
+        self.publisher.close()
@@ -0,0 +1,329 @@
+# gesture_classifier.py
+#
+# 描述:
+# 基于关节角度的手势分类器。
+# 核心是批量接口 recognize_gestures_batch：输入 (N, 21, 3) 的关键点数组
+# （N 可以是多帧、多只手或两者混合），一次向量化计算出全部关节角度与大拇指方向，
+# 返回 N 个手势标签。单帧的 recognize_gesture 只是它的薄封装，两者结果一致。
+#
+# 手势以声明式规则定义在 gestures.json 中（每根手指伸直/弯曲/任意、大拇指方向、可选的角度范围），
+# 启动时编译为 GestureRules:
+#   - 五根手指的伸直状态组成 5 位编码，查 32 项的查找表直接得到手势，与手势数量无关；
+#   - 带有额外条件（大拇指方向、角度范围）的规则编译为一小串向量化谓词，只作用于匹配的编码。
+# RulesReloader 在规则文件修改后自动重新编译，无需重启摄像头循环。
+# 本模块只依赖 NumPy，可以在没有 OpenCV / MediaPipe 的环境下离线使用。
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+# 判定手指“伸直”的默认角度阈值（单位：度）
+STRAIGHT_ANGLE_THRESHOLD = 160.0
+
+FINGER_NAMES = ("thumb", "index", "middle", "ring", "pinky")
+
+# 每根手指用于计算弯曲角度的三个关节 (MCP/根部, PIP/顶点, TIP/指尖)。
+# 第 0 行是大拇指，其余依次为食指、中指、无名指、小指。
+FINGER_JOINTS = np.array([
+    (2, 3, 4),     # thumb
+    (5, 6, 8),     # index
+    (9, 10, 12),   # middle
+    (13, 14, 16),  # ring
+    (17, 18, 20),  # pinky
+])
+_JOINT_ENDS = FINGER_JOINTS[:, [0, 2]]
+_JOINT_VERTICES = FINGER_JOINTS[:, 1]
+
+# 5 位手指状态编码：bit0 为大拇指，bit1 食指，bit2 中指，bit3 无名指，bit4 小指
+_FINGER_BITS = np.array([1 << i for i in range(len(FINGER_NAMES))], dtype=np.intp)
+_NUM_STATES = 1 << len(FINGER_NAMES)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gestures.json')
+
+
+def calculate_angle(a, b, c):
+    """
+    计算三点之间的角度（单位：度）。
+    点 'b' 是角度的顶点。
+    """
+    a = np.array(a)
+    b = np.array(b)
+    c = np.array(c)
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+    if angle > 180.0:
+        angle = 360 - angle
+    return angle
+
+
+def calculate_angles(a, b, c):
+    """
+    calculate_angle 的向量化版本。
+    a, b, c 为形状 (..., 2) 的数组，返回形状 (...) 的角度数组（单位：度）。
+    """
+    radians = (np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+               - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    angle = np.abs(radians * 180.0 / np.pi)
+    return np.where(angle > 180.0, 360.0 - angle, angle)
+
+
+def landmarks_to_array(hand_landmarks):
+    """
+    将 MediaPipe 的单手关键点 (NormalizedLandmarkList) 转换为 (21, 3) 的 float64 数组。
+    """
+    return np.array(
+        [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float64)
+
+
+def multi_landmarks_to_array(multi_hand_landmarks):
+    """
+    将 results.multi_hand_landmarks 转换为 (N, 21, 3) 数组，便于一次批量分类。
+    """
+    if not multi_hand_landmarks:
+        return np.empty((0, NUM_LANDMARKS, 3), dtype=np.float64)
+    return np.stack([landmarks_to_array(h) for h in multi_hand_landmarks])
+
+
+def finger_angles_batch(landmarks):
+    """
+    一次性计算 N 只手五根手指的弯曲角度。
+    landmarks: (N, 21, 2 或 3) 数组；返回 (N, 5) 数组，列顺序同 FINGER_JOINTS。
+    结果与逐根手指调用 calculate_angle 完全一致。
+    """
+    xy = landmarks[..., :2]
+    vectors = xy[:, _JOINT_ENDS] - xy[:, _JOINT_VERTICES, np.newaxis]  # (N, 5, 2, 2)
+    directions = np.arctan2(vectors[..., 1], vectors[..., 0])           # (N, 5, 2)
+    angle = np.abs((directions[..., 1] - directions[..., 0]) * 180.0 / np.pi)
+    return np.where(angle > 180.0, 360.0 - angle, angle)
+
+
+# --- 规则谓词 ---
+
+def _thumb_direction_predicate(direction):
+    # 大拇指尖相对拇指 IP 关节 (3) 和食指根部 (5) 的竖直位置；图像坐标 y 轴向下
+    def predicate(angles, landmarks):
+        tip_y = landmarks[:, 4, 1]
+        if direction == 'up':
+            return (tip_y < landmarks[:, 3, 1]) & (tip_y < landmarks[:, 5, 1])
+        return (tip_y > landmarks[:, 3, 1]) & (tip_y > landmarks[:, 5, 1])
+    return predicate
+
+
+def _angle_range_predicate(finger, low, high):
+    column = FINGER_NAMES.index(finger)
+
+    def predicate(angles, landmarks):
+        return (angles[:, column] >= low) & (angles[:, column] <= high)
+    return predicate
+
+
+def labels_for(indices, names, labels_array):
+    """
+    把手势编号数组转换为名称列表。labels_array 为 np.array(names, dtype=object)。
+    GestureRules 和 learned_classifier.CentroidClassifier 共用。
+    """
+    if len(indices) <= 8:
+        # 少量手时逐个取名称比 object 数组索引更快
+        return [names[i] for i in indices.tolist()]
+    return labels_array[indices].tolist()
+
+
+class GestureRules:
+    """
+    编译后的手势规则。
+
+    属性:
+      names: 手势名称元组，下标 0 为未知手势
+      table: (32,) 查找表，手指状态编码 -> 无额外条件时的手势编号
+      predicated: [(适用编码掩码 (32,), 谓词列表, 手势编号), ...]，按优先级从低到高排列
+    """
+
+    def __init__(self, names, table, table_priority, predicated, straight_angle):
+        self.names = tuple(names)
+        self.table = table
+        self._table_priority = table_priority
+        self.predicated = predicated
+        self.straight_angle = straight_angle
+        self._labels = np.array(self.names, dtype=object)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        由规则配置（gestures.json 的内容）编译规则。规则按出现顺序确定优先级。
+        """
+        unknown = config.get("unknown", "Unknown")
+        straight_angle = float(config.get("straight_angle", STRAIGHT_ANGLE_THRESHOLD))
+        names = [unknown]
+        lowest = len(config["gestures"])
+        table = np.zeros(_NUM_STATES, dtype=np.intp)
+        table_priority = np.full(_NUM_STATES, lowest, dtype=np.intp)
+        predicated = []
+
+        for priority, rule in enumerate(config["gestures"]):
+            name = rule["name"]
+            if name not in names:
+                names.append(name)
+            index = names.index(name)
+            mask = cls._state_mask(rule.get("fingers", {}), name)
+            predicates = cls._compile_predicates(rule, name)
+
+            if predicates:
+                # 只有比查找表中已有规则优先级更高的编码，才需要在运行时检查谓词
+                applicable = mask & (priority < table_priority)
+                if applicable.any():
+                    predicated.append((applicable, predicates, index, priority))
+            else:
+                claim = mask & (priority < table_priority)
+                table[claim] = index
+                table_priority[claim] = priority
+
+        # 按优先级从低到高排列，运行时依次覆盖，优先级最高的最后写入
+        predicated.sort(key=lambda item: -item[3])
+        predicated = [item[:3] for item in predicated]
+        return cls(names, table, table_priority, predicated, straight_angle)
+
+    @staticmethod
+    def _state_mask(fingers, name):
+        """
+        返回 (32,) 布尔数组，标记满足该规则手指状态的全部编码。
+        """
+        unknown_fingers = set(fingers) - set(FINGER_NAMES)
+        if unknown_fingers:
+            raise ValueError(f"Gesture '{name}': unknown finger(s) {sorted(unknown_fingers)}")
+        codes = np.arange(_NUM_STATES)
+        mask = np.ones(_NUM_STATES, dtype=bool)
+        for bit, finger in enumerate(FINGER_NAMES):
+            state = fingers.get(finger, "any")
+            is_straight = (codes >> bit) & 1 == 1
+            if state == "straight":
+                mask &= is_straight
+            elif state == "bent":
+                mask &= ~is_straight
+            elif state != "any":
+                raise ValueError(f"Gesture '{name}': finger '{finger}' must be straight, bent or any")
+        return mask
+
+    @staticmethod
+    def _compile_predicates(rule, name):
+        predicates = []
+        direction = rule.get("thumb_direction", "any")
+        if direction in ("up", "down"):
+            predicates.append(_thumb_direction_predicate(direction))
+        elif direction != "any":
+            raise ValueError(f"Gesture '{name}': thumb_direction must be up, down or any")
+        for finger, (low, high) in rule.get("angles", {}).items():
+            if finger not in FINGER_NAMES:
+                raise ValueError(f"Gesture '{name}': unknown finger '{finger}' in angles")
+            predicates.append(_angle_range_predicate(finger, float(low), float(high)))
+        return predicates
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_config(json.load(f))
+
+    def classify_indices(self, landmarks):
+        """
+        批量识别，返回 (N,) 的手势编号数组（对应 names 的下标）。
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        if landmarks.ndim != 3 or landmarks.shape[1] != NUM_LANDMARKS:
+            raise ValueError(
+                f"Expected landmarks of shape (N, {NUM_LANDMARKS}, 3), got {landmarks.shape}")
+
+        angles = finger_angles_batch(landmarks)
+        states = (angles > self.straight_angle) @ _FINGER_BITS
+        indices = self.table[states]
+        for applicable, predicates, index in self.predicated:
+            hit = applicable[states]
+            if not hit.any():
+                continue
+            for predicate in predicates:
+                hit &= predicate(angles, landmarks)
+            indices = np.where(hit, index, indices)
+        return indices
+
+    def classify(self, landmarks):
+        """
+        批量识别，返回手势名称列表。
+        """
+        return labels_for(self.classify_indices(landmarks), self.names, self._labels)
+
+
+class RulesReloader:
+    """
+    监视规则文件，修改后自动重新编译，可在摄像头循环运行期间热更新规则。
+    每隔 check_interval 秒最多检查一次文件修改时间；新规则编译失败时保留旧规则。
+    """
+
+    def __init__(self, path, check_interval=1.0, on_error=None, on_reload=None):
+        self.path = path
+        self.check_interval = check_interval
+        self._on_error = on_error
+        self._on_reload = on_reload
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._rules = GestureRules.load(path)
+        self._next_check = time.monotonic() + check_interval
+
+    @property
+    def rules(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                if now >= self._next_check:
+                    self._next_check = now + self.check_interval
+                    self._maybe_reload()
+        return self._rules
+
+    def _maybe_reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            self._rules = GestureRules.load(self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if self._on_error is not None:
+                self._on_error(e)
+            return
+        if self._on_reload is not None:
+            self._on_reload(self._rules)
+
+    def classify(self, landmarks):
+        return self.rules.classify(landmarks)
+
+
+DEFAULT_RULES = GestureRules.load(DEFAULT_RULES_PATH)
+GESTURE_NAMES = DEFAULT_RULES.names
+
+
+def recognize_gesture_indices(landmarks):
+    """
+    使用默认规则批量识别手势，返回 (N,) 的手势编号数组（对应 GESTURE_NAMES 的下标）。
+    """
+    return DEFAULT_RULES.classify_indices(landmarks)
+
+
+def recognize_gestures_batch(landmarks):
+    """
+    批量识别手势。
+    landmarks: (N, 21, 3) 数组，可来自多帧或多只手；返回长度为 N 的手势名称列表。
+    """
+    return DEFAULT_RULES.classify(landmarks)
+
+
+def recognize_gesture(hand_landmarks):
+    """
+    使用角度计算从检测到的手部关键点中识别特定手势。
+    支持数字 1, 2, 3, 4 以及 Thumbs Up / Open Palm / Closed Fist。
+    hand_landmarks 可以是 MediaPipe 的关键点对象，也可以是 (21, 3) 数组。
+    """
+    if hasattr(hand_landmarks, 'landmark'):
+        hand_landmarks = landmarks_to_array(hand_landmarks)
+    return recognize_gestures_batch(np.asarray(hand_landmarks)[np.newaxis])[0]
@@ -0,0 +1,186 @@
+# hand_tracker.py
+#
+# 描述:
+# 多手模式下的手部跟踪：为每只手分配跨帧稳定的 track ID。
+# MediaPipe 每帧返回的手的顺序并不固定，两名操作员同时做手势时，仅靠下标区分会互相串号。
+# 这里按关键点质心距离 + 左右手标签把当前帧的手与已有轨迹做贪心匹配，
+# 每条轨迹保存自己的手势状态，并通过各自的 GestureEventEmitter 发布带 "hand" 字段的事件；
+# 开启动态手势时每条轨迹还有自己的 DynamicGestureRecognizer（见 dynamic_gestures.py），
+# 开启去抖时每条轨迹还有自己的 GestureDebouncer（见 debounce.py），只发布提交后的手势切换。
+# 只依赖 NumPy。
+
+import itertools
+import time
+
+import numpy as np
+
+from debounce import GestureDebouncer
+from dynamic_gestures import DynamicGestureRecognizer, dynamic_gesture_event
+from events import GestureEventEmitter
+
+
+class HandTrack:
+    """
+    一只被跟踪的手。
+
+    属性:
+      id: 稳定的 track ID（从 1 开始递增，不复用）
+      handedness: 'Left' / 'Right' / 'Unknown'
+      centroid: 最近一次匹配到的关键点质心 (x, y)，归一化坐标
+      gesture: 当前手势名称（开启去抖时为已提交的手势，首次提交前为 None）
+      raw_gesture: 本帧分类器给出的原始手势名称
+      landmarks: 最近一次匹配到的 (21, 3) 关键点
+      missed: 连续未匹配到的帧数
+      age: 已匹配到的帧数
+      dynamic: DynamicGestureRecognizer，未开启动态手势时为 None
+      motion: 本帧识别到的动态手势名称，没有时为 None
+      debouncer: GestureDebouncer，未开启去抖时为 None
+    """
+
+    def __init__(self, track_id, handedness, centroid, publisher=None, dynamic=False, debounce=None):
+        self.id = track_id
+        self.handedness = handedness
+        self.centroid = centroid
+        self.gesture = None
+        self.raw_gesture = None
+        self.landmarks = None
+        self.missed = 0
+        self.age = 0
+        self.publisher = publisher
+        self.fields = {"hand": track_id, "handedness": handedness}
+        self.emitter = None
+        if publisher is not None:
+            self.emitter = GestureEventEmitter(publisher, fields=self.fields)
+        self.dynamic = DynamicGestureRecognizer() if dynamic else None
+        self.motion = None
+        self.debouncer = GestureDebouncer(debounce) if debounce is not None else None
+
+    def update(self, landmarks, centroid, gesture, timestamp):
+        self.landmarks = landmarks
+        self.centroid = centroid
+        self.missed = 0
+        self.age += 1
+        self.raw_gesture = gesture
+        confidence = None
+        if self.debouncer is not None:
+            self.debouncer.update(gesture, timestamp)
+            gesture, confidence = self.debouncer.current, self.debouncer.confidence
+        self.gesture = gesture
+        if self.emitter is not None:
+            self.emitter.update(gesture, timestamp, confidence)
+        if self.dynamic is not None:
+            self.motion = self.dynamic.update(landmarks, timestamp)
+            if self.motion is not None and self.publisher is not None:
+                self.publisher.publish(dynamic_gesture_event(self.motion, timestamp, self.fields))
+
+    def mark_missed(self):
+        # 动态手势的轨迹不清空：快速挥动时偶尔漏检一两帧，重新匹配后仍按时间戳连续累积
+        self.missed += 1
+        self.motion = None
+
+
+class HandTracker:
+    """
+    跨帧跟踪多只手。
+
+        tracker = HandTracker(publisher=open_publisher('stdout'))
+        tracks = tracker.update(landmarks, handedness, labels)   # 与输入的手一一对应
+
+    参数:
+      max_distance: 质心距离超过该值（归一化坐标）时不匹配，视为新出现的手
+      max_missed: 轨迹连续这么多帧未匹配到后删除，并发布 hand_lost 事件
+      publisher: 提供 publish(event) 的发布器；为 None 时不发布事件
+      dynamic: 为 True 时每条轨迹同时识别动态手势并发布 dynamic_gesture 事件
+      debounce: DebounceConfig；给出时每条轨迹的手势先经过去抖，只发布提交后的切换
+    """
+
+    def __init__(self, max_distance=0.2, max_missed=5, publisher=None, dynamic=False,
+                 debounce=None):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.publisher = publisher
+        self.dynamic = dynamic
+        self.debounce = debounce
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def update(self, landmarks, handedness, labels, timestamp=None):
+        """
+        输入当前帧全部手的关键点 (N, 21, 3)、左右手标签和手势名称（均长度为 N），
+        返回与输入顺序对齐的 N 条 HandTrack。
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        n = len(labels)
+        centroids = np.asarray(landmarks, dtype=np.float64)[:, :, :2].mean(axis=1) if n else None
+        assigned = [None] * n
+
+        if n and self.tracks:
+            previous = np.array([t.centroid for t in self.tracks])
+            cost = np.linalg.norm(centroids[:, None, :] - previous[None, :, :], axis=2)
+            # 左右手标签都已知且不同的不允许匹配
+            for j, track in enumerate(self.tracks):
+                for i in range(n):
+                    if 'Unknown' not in (handedness[i], track.handedness) \
+                            and handedness[i] != track.handedness:
+                        cost[i, j] = np.inf
+            # 手数很少（通常不超过 2~4），按代价从小到大贪心分配即可
+            taken = set()
+            for flat in np.argsort(cost, axis=None).tolist():
+                i, j = divmod(flat, len(self.tracks))
+                if cost[i, j] > self.max_distance:
+                    break
+                if assigned[i] is None and j not in taken:
+                    assigned[i] = self.tracks[j]
+                    taken.add(j)
+
+        matched = set(id(t) for t in assigned if t is not None)
+        for track in self.tracks:
+            if id(track) not in matched:
+                track.mark_missed()
+
+        for i in range(n):
+            if assigned[i] is None:
+                assigned[i] = HandTrack(
+                    next(self._ids), handedness[i], centroids[i], self.publisher, self.dynamic,
+                    self.debounce)
+                self.tracks.append(assigned[i])
+            assigned[i].update(landmarks[i], centroids[i], labels[i], timestamp)
+
+        alive = []
+        for track in self.tracks:
+            if track.missed > self.max_missed:
+                self._publish_lost(track, timestamp)
+            else:
+                alive.append(track)
+        self.tracks = alive
+        return assigned
+
+    def _publish_lost(self, track, timestamp):
+        if self.publisher is None:
+            return
+        self.publisher.publish({
+            "type": "hand_lost",
+            "hand": track.id,
+            "handedness": track.handedness,
+            "gesture": track.gesture,
+            "timestamp": timestamp,
+        })
+
+    def close(self):
+        """
+        为仍在跟踪的手发布 hand_lost 事件并清空轨迹（不关闭 publisher）。
+        """
+        timestamp = time.time()
+        for track in self.tracks:
+            self._publish_lost(track, timestamp)
+        self.tracks = []
+
+
+def results_handedness(results):
+    """
+    从 MediaPipe 结果中取出每只手的 'Left' / 'Right' 标签，缺失时为 'Unknown'。
+    """
+    count = len(results.multi_hand_landmarks or [])
+    multi_handedness = getattr(results, 'multi_handedness', None) or []
+    labels = [h.classification[0].label for h in multi_handedness[:count]]
+    return labels + ['Unknown'] * (count - len(labels))
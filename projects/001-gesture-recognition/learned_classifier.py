@@ -0,0 +1,237 @@
+# learned_classifier.py
+#
+# 描述:
+# 基于录制数据训练的最近质心 / kNN 手势分类器，可在运行时替换规则分类器（gesture_classifier）。
+# 规则分类器依赖固定阈值（手指伸直 160°、大拇指高于 MCP），对手的朝向和个人习惯比较敏感；
+# 这里先把关键点归一化（平移到手腕、按手腕->中指根部方向旋转到竖直、按该长度缩放），
+# 再在预先计算好的原型（每个手势若干个 k-means 质心）上做向量化的最近邻查找。
+# 接口与 recognize_gestures_batch 相同：(N, 21, 3) 关键点 -> N 个手势名称。只依赖 NumPy。
+#
+# 训练数据来自 recording.py 的录制目录，每个录制对应一个手势（录制时一直保持该手势），
+# 也可以用规则分类器给录制打标签（--from-rules），作为起点再逐步替换为人工录制的数据。
+#
+# 用法:
+#   python learned_classifier.py --out model.npz "Open Palm=palm-01" "Closed Fist=fist-01" "2=two-01"
+#   python learned_classifier.py --out model.npz --from-rules session-01 session-02
+#   python main.py --model model.npz
+#   python replay.py session-03 --model model.npz --summary
+
+import argparse
+import sys
+
+import numpy as np
+
+from gesture_classifier import NUM_LANDMARKS, labels_for
+
+WRIST = 0
+MIDDLE_MCP = 9
+UNKNOWN = "Unknown"
+MODEL_VERSION = 1
+
+
+def normalize_landmarks(landmarks):
+    """
+    把 (N, 21, 3) 关键点归一化为 (N, 60) 特征：以手腕为原点，旋转使手腕->中指根部指向上方（-y），
+    并按该长度缩放（z 同样缩放）。手腕本身恒为 0，不放进特征。
+    特征依次为 20 个点旋转后的 x、y 和缩放后的 z。
+    """
+    points = np.asarray(landmarks, dtype=np.float64)
+    if points.ndim != 3 or points.shape[1] != NUM_LANDMARKS:
+        raise ValueError(f"Expected landmarks of shape (N, {NUM_LANDMARKS}, 3), got {points.shape}")
+    points = points[:, 1:] - points[:, WRIST, np.newaxis]
+    # 平面坐标写成复数 x + iy，旋转和缩放合并为一次复数乘法：乘以 -i / axis 把 axis 映射到 -i，即 (0, -1)
+    xy = points[..., 0] + 1j * points[..., 1]
+    axis = xy[:, MIDDLE_MCP - 1]
+    factor = -1j / np.where(axis == 0, 1e-9, axis)
+    xy *= factor[:, np.newaxis]
+    z = points[..., 2] * np.abs(factor)[:, np.newaxis]
+    return np.concatenate((xy.real, xy.imag, z), axis=1)
+
+
+def _kmeans(features, k, iterations=20, seed=0):
+    """
+    简单的 k-means，返回 (min(k, n), D) 个质心。
+    """
+    k = min(k, len(features))
+    rng = np.random.default_rng(seed)
+    centroids = features[rng.choice(len(features), k, replace=False)].copy()
+    for _ in range(iterations):
+        distances = ((features[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        assignment = distances.argmin(axis=1)
+        for j in range(k):
+            members = features[assignment == j]
+            if len(members):
+                centroids[j] = members.mean(axis=0)
+    return centroids
+
+
+class CentroidClassifier:
+    """
+    在原型上做最近邻查找的分类器。k=1 时就是最近质心；k>1 时由 k 个最近原型投票。
+    距离最近原型仍超过 max_distance 的手判为 Unknown。
+
+    属性:
+      names: 手势名称元组，下标 0 为 Unknown
+      prototypes: (M, D) 原型特征
+      labels: (M,) 每个原型对应的 names 下标
+    """
+
+    def __init__(self, names, prototypes, labels, k=1, max_distance=np.inf):
+        self.names = tuple(names)
+        self.prototypes = np.ascontiguousarray(prototypes, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=np.intp)
+        self.k = min(int(k), len(self.prototypes))
+        self.max_distance = float(max_distance)
+        # 距离按 |x|^2 - 2 x.p + |p|^2 计算，原型的转置和 |p|^2 预先算好
+        self._prototypes_t = np.ascontiguousarray(self.prototypes.T)
+        self._prototype_norms = (self.prototypes ** 2).sum(axis=1)
+        self._labels_array = np.array(self.names, dtype=object)
+
+    @classmethod
+    def train(cls, features, targets, names, prototypes_per_class=8, k=1, margin=1.5, seed=0):
+        """
+        由 (N, D) 特征和 (N,) 目标下标（对应 names，0 为 Unknown，不参与训练）训练。
+        每个手势用 k-means 得到 prototypes_per_class 个原型；max_distance 取训练样本到最近同类原型
+        距离的 99 分位数乘以 margin。
+        """
+        prototypes, labels = [], []
+        for index in range(1, len(names)):
+            members = features[targets == index]
+            if not len(members):
+                continue
+            centroids = _kmeans(members, prototypes_per_class, seed=seed)
+            prototypes.append(centroids)
+            labels.append(np.full(len(centroids), index))
+        if not prototypes:
+            raise ValueError("No labelled training samples")
+        model = cls(names, np.concatenate(prototypes), np.concatenate(labels), k=k)
+
+        known = targets > 0
+        distances = model._squared_distances(features[known])
+        same = model.labels[np.newaxis, :] == targets[known, np.newaxis]
+        nearest_same = np.sqrt(np.maximum(np.where(same, distances, np.inf).min(axis=1), 0.0))
+        model.max_distance = float(np.percentile(nearest_same, 99) * margin)
+        return model
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != MODEL_VERSION:
+                raise ValueError(f"Unsupported model version {int(data['version'])} in {path}")
+            return cls(data["names"].tolist(), data["prototypes"], data["labels"],
+                       int(data["k"]), float(data["max_distance"]))
+
+    def save(self, path):
+        np.savez(path, version=MODEL_VERSION, names=np.array(self.names), prototypes=self.prototypes,
+                 labels=self.labels, k=self.k, max_distance=self.max_distance)
+
+    def _squared_distances(self, features):
+        return ((features ** 2).sum(axis=1)[:, np.newaxis]
+                - 2.0 * features @ self._prototypes_t + self._prototype_norms)
+
+    def classify_indices(self, landmarks):
+        """
+        批量识别，返回 (N,) 的手势编号数组（对应 names 的下标）。
+        """
+        return self.classify_features(normalize_landmarks(landmarks))
+
+    def classify_features(self, features):
+        """
+        对已归一化的 (N, D) 特征分类，返回手势编号数组。
+        """
+        distances = self._squared_distances(features)
+        if self.k == 1:
+            nearest = distances.argmin(axis=1)
+            indices = self.labels[nearest]
+            best = distances[np.arange(len(distances)), nearest]
+        else:
+            nearest = np.argpartition(distances, self.k - 1, axis=1)[:, :self.k]
+            votes = self.labels[nearest]
+            # 每行票数最多的类别；平票时取编号较小者
+            counts = (votes[:, :, np.newaxis] == np.arange(len(self.names))).sum(axis=1)
+            indices = counts.argmax(axis=1)
+            best = distances.min(axis=1)
+        return np.where(np.sqrt(np.maximum(best, 0.0)) > self.max_distance, 0, indices)
+
+    def classify(self, landmarks):
+        """
+        批量识别，返回手势名称列表（与 recognize_gestures_batch 接口相同）。
+        """
+        return labels_for(self.classify_indices(landmarks), self.names, self._labels_array)
+
+
+def load_training_data(labelled, from_rules=(), rules=None):
+    """
+    读取训练数据，返回 (features, targets, names)。
+    labelled: [(手势名称, 录制目录), ...]，录制中的每只手都标为该手势
+    from_rules: 录制目录列表，用规则分类器打标签（Unknown 的样本丢弃）
+    """
+    from recording import LandmarkRecording
+
+    names = [UNKNOWN]
+    features, targets = [], []
+
+    def add(landmarks, labels):
+        # 按首次出现的顺序编号，保证同样的训练数据得到同样的模型
+        for name in dict.fromkeys(labels):
+            if name not in names:
+                names.append(name)
+        index = {name: i for i, name in enumerate(names)}
+        features.append(normalize_landmarks(landmarks))
+        targets.append(np.array([index[label] for label in labels], dtype=np.intp))
+
+    for name, path in labelled:
+        recording = LandmarkRecording(path)
+        if len(recording.hands):
+            add(recording.landmarks, [name] * len(recording.hands))
+    if from_rules:
+        if rules is None:
+            from gesture_classifier import DEFAULT_RULES as rules
+        for path in from_rules:
+            recording = LandmarkRecording(path)
+            if not len(recording.hands):
+                continue
+            labels = recording.classify(rules.classify)
+            keep = np.array([label != rules.names[0] for label in labels], dtype=bool)
+            if keep.any():
+                add(recording.landmarks[keep], [label for label in labels if label != rules.names[0]])
+    if not features:
+        raise ValueError("No hands found in the training recordings")
+    return np.concatenate(features), np.concatenate(targets), names
+
+
+def _parse_labelled(spec):
+    name, sep, path = spec.partition('=')
+    if not sep or not name or not path:
+        raise argparse.ArgumentTypeError(f"expected NAME=RECORDING, got '{spec}'")
+    return name, path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train a nearest-centroid / kNN gesture classifier")
+    parser.add_argument('labelled', nargs='*', type=_parse_labelled,
+                        help="带标签的录制：手势名称=录制目录（录制时一直保持该手势）")
+    parser.add_argument('--from-rules', nargs='+', default=[], metavar='RECORDING',
+                        help="用规则分类器给这些录制打标签（丢弃 Unknown）")
+    parser.add_argument('--out', required=True, help="模型输出路径（.npz）")
+    parser.add_argument('--prototypes', type=int, default=8, help="每个手势的原型数（默认 8）")
+    parser.add_argument('-k', type=int, default=1, help="投票的最近原型数（默认 1，即最近质心）")
+    parser.add_argument('--margin', type=float, default=1.5,
+                        help="Unknown 判定距离 = 训练样本最近同类距离的 99 分位数 x margin")
+    args = parser.parse_args(argv)
+    if not args.labelled and not args.from_rules:
+        parser.error("give at least one NAME=RECORDING or --from-rules RECORDING")
+
+    features, targets, names = load_training_data(args.labelled, args.from_rules)
+    model = CentroidClassifier.train(
+        features, targets, names, prototypes_per_class=args.prototypes, k=args.k, margin=args.margin)
+    model.save(args.out)
+    accuracy = float(np.mean(model.classify_features(features) == targets))
+    print(f"Trained {len(model.prototypes)} prototypes for {len(names) - 1} gestures "
+          f"from {len(features)} hands, max_distance={model.max_distance:.3f}, "
+          f"training accuracy={accuracy:.3f}", file=sys.stderr)
+    print(f"Model written to {args.out}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,141 +7,363 @@
 # 它利用 OpenCV 进行图像捕捉和渲染，并使用 MediaPipe 进行稳健的手部跟踪和关键点检测。
 # 该脚本可以识别多种手势，包括数字和基本手势。
 
+import argparse
+import functools
+import sys
+import time
+from collections import namedtuple
+
 import cv2
-import mediapipe as mp
-import numpy as np
-import math
 
-def calculate_angle(a, b, c):
-    """
-    计算三点之间的角度（单位：度）。
-    点 'b' 是角度的顶点。
-    """
-    a = np.array(a)
-    b = np.array(b)
-    c = np.array(c)
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    if angle > 180.0:
-        angle = 360 - angle
-    return angle
-
-def recognize_gesture(hand_landmarks):
+# calculate_angle / recognize_gesture 在此重新导出，保持 main.recognize_gesture 的旧用法可用
+from gesture_classifier import (  # noqa: F401
+    DEFAULT_RULES_PATH, RulesReloader, calculate_angle, multi_landmarks_to_array,
+    recognize_gesture, recognize_gestures_batch)
+from debounce import DebounceConfig, GestureDebouncer
+from learned_classifier import CentroidClassifier
+from dynamic_gestures import DynamicGestureRecognizer, dynamic_gesture_event
+from events import GestureEventEmitter, open_publisher
+from hand_tracker import HandTracker, results_handedness
+from pipeline import run_pipeline
+from preprocess import FrameBuffers, preprocess_frame, read_frame
+from recording import LandmarkRecorder
+from roi_tracker import RoiTracker
+from scheduler import InferenceScheduler
+from stage_profiler import NULL_PROFILER, StageProfiler
+from startup import create_hands, load_drawing, start_up
+
+WINDOW_NAME = 'Real-Time Gesture Recognition'
+NO_HAND = "No Hand Detected"
+
+# process_frame 的返回值。landmarks 为全部手的 (N, 21, 3) 关键点，hand_labels 为每只手的手势名称
+FrameResult = namedtuple('FrameResult', 'image results gesture_name landmarks hand_labels')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Real-time gesture recognition")
+    parser.add_argument('--source', default='0',
+                        help="视频源：摄像头编号、视频文件路径或流地址（默认 0）")
+    parser.add_argument('--source-fps', type=float, default=None,
+                        help="流水线模式下视频文件的读取帧率（默认取文件自带的帧率，没有时按 30）")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="使用采集/推理/渲染多线程流水线，只处理最新帧以降低端到端延迟")
+    parser.add_argument('--no-display', action='store_true',
+                        help="不创建窗口，适用于无显示器的机器（例如做基准测试）")
+    parser.add_argument('--warmup-frames', type=int, default=5,
+                        help="启动时丢弃的摄像头帧数，等待自动曝光稳定（与模型加载并行，默认 5）")
+    parser.add_argument('--max-frames', type=int, default=0,
+                        help="处理指定帧数后退出，0 表示不限")
+    parser.add_argument('--max-hands', type=int, default=1,
+                        help="最多同时检测的手数；大于 1 时进入多手模式，每只手有稳定的 ID 和各自的事件")
+    parser.add_argument('--dynamic', action='store_true',
+                        help="同时识别动态手势（上下左右挥动、画圈、推），识别到时发布 dynamic_gesture 事件")
+    parser.add_argument('--debounce', action='store_true',
+                        help="时间去抖：手势需达到置信度并停留一段时间才提交，只发布提交后的切换"
+                             "（参数见规则文件的 debounce 段）")
+    parser.add_argument('--headless', action='store_true',
+                        help="无界面服务模式：不绘制、不显示，只在手势变化时发布事件（隐含 --no-display）")
+    parser.add_argument('--events', default=None,
+                        help="手势事件发布目标：stdout、tcp:PORT 或 unix:PATH（--headless 时默认 stdout）")
+    parser.add_argument('--record', default=None,
+                        help="把每帧的关键点、左右手和时间戳录制到指定目录，供 replay.py 离线回放")
+    parser.add_argument('--rules', default=None,
+                        help="手势规则文件（格式同 gestures.json），修改后自动热加载")
+    parser.add_argument('--model', default=None,
+                        help="使用 learned_classifier.py 训练的最近质心 / kNN 模型（.npz）代替规则分类器")
+    parser.add_argument('--roi', action='store_true',
+                        help="ROI 跟踪模式：只对上一帧手部所在区域做推理，丢失时回退整帧检测")
+    parser.add_argument('--roi-size', type=int, default=256,
+                        help="ROI 裁剪后缩放到的边长（像素，默认 256）")
+    parser.add_argument('--roi-redetect', type=int, default=10,
+                        help="ROI 跟踪到的手少于 --max-hands 时，每隔多少帧整帧检测一次新出现的手（默认 10，0 为不检测）")
+    parser.add_argument('--schedule', action='store_true',
+                        help="自适应推理调度：每 k 帧或画面运动较大时才推理，其余帧外推关键点")
+    parser.add_argument('--budget-ms', type=float, default=10.0,
+                        help="自适应调度下平均每帧的推理耗时预算（毫秒，默认 10）")
+    parser.add_argument('--max-interval', type=int, default=6,
+                        help="自适应调度下两次推理之间最多间隔的帧数（默认 6）")
+    parser.add_argument('--profile', action='store_true',
+                        help="统计每个阶段的耗时 (p50/p95/p99) 和 FPS，退出时输出摘要")
+    parser.add_argument('--profile-out', default=None,
+                        help="退出时把耗时统计写入文件（.csv 或 .json），隐含 --profile")
+    parser.add_argument('--profile-interval', type=float, default=0.0,
+                        help="每隔指定秒数输出一次耗时摘要，隐含 --profile")
+    args = parser.parse_args(argv)
+    if args.profile_out or args.profile_interval:
+        args.profile = True
+    if args.model and args.rules:
+        parser.error("--model and --rules are mutually exclusive")
+    if args.headless:
+        args.no_display = True
+        args.events = args.events or 'stdout'
+    return args
+
+def log(message):
+    # 状态信息统一写到 stderr，这样事件发布到 stdout 时，stdout 中只有 NDJSON 事件
+    print(message, file=sys.stderr)
+
+def open_source(source):
     """
-    使用角度计算从检测到的手部关键点中识别特定手势。
-    此版本增加了对数字1, 2, 3, 4的识别。
+    打开视频源。纯数字视为摄像头编号，其余视为视频文件或流地址。
+    返回 (cap, is_live)。
     """
-    landmarks = hand_landmarks.landmark
-    
-    finger_joints = {
-        'index': (5, 6, 8), 'middle': (9, 10, 12),
-        'ring': (13, 14, 16), 'pinky': (17, 18, 20)
-    }
-    finger_angles = {}
-    for finger, joints in finger_joints.items():
-        mcp = [landmarks[joints[0]].x, landmarks[joints[0]].y]
-        pip = [landmarks[joints[1]].x, landmarks[joints[1]].y]
-        tip = [landmarks[joints[2]].x, landmarks[joints[2]].y]
-        angle = calculate_angle(mcp, pip, tip)
-        finger_angles[finger] = angle
-
-    thumb_angle = calculate_angle(
-        [landmarks[2].x, landmarks[2].y],
-        [landmarks[3].x, landmarks[3].y],
-        [landmarks[4].x, landmarks[4].y]
-    )
-    is_thumb_straight = thumb_angle > 160.0
-
-    fingers_straight = [
-        finger_angles['index'] > 160.0, finger_angles['middle'] > 160.0,
-        finger_angles['ring'] > 160.0, finger_angles['pinky'] > 160.0
-    ]
-    
-    is_thumb_pointing_up = landmarks[4].y < landmarks[3].y and landmarks[4].y < landmarks[5].y
-    if is_thumb_straight and not any(fingers_straight) and is_thumb_pointing_up:
-        return "Thumbs Up"
-
-    if not is_thumb_straight:
-        if fingers_straight == [True, False, False, False]: return "1"
-        if fingers_straight == [True, True, False, False]: return "2"
-        if fingers_straight == [True, True, True, False]: return "3"
-        if fingers_straight == [True, True, True, True]: return "4"
-
-    if is_thumb_straight and all(fingers_straight):
-        return "Open Palm"
-    if not is_thumb_straight and not any(fingers_straight):
-        return "Closed Fist"
-    
-    return "Unknown"
-
-def main():
+    if str(source).isdigit():
+        return cv2.VideoCapture(int(source)), True
+    return cv2.VideoCapture(source), False
+
+def process_frame(detector, buffers, profiler=NULL_PROFILER, classify=recognize_gestures_batch):
     """
-    主函数，负责捕获视频、处理视频并显示输出。
+    预处理、推理并识别一帧。buffers 为 FrameBuffers，预处理复用其中的缓冲区。
+    detector 为 mp_hands.Hands 或提供相同 process() 接口的对象（如 RoiTracker）。
+    classify 为批量分类函数：(N, 21, 3) 关键点 -> N 个手势名称。
+    返回 FrameResult（水平翻转后的 BGR 图像、MediaPipe 结果、手势名称、关键点、每只手的手势）。
     """
-    print("Initializing computer vision components...")
-
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.5)
-    mp_drawing = mp.solutions.drawing_utils
-    mp_drawing_styles = mp.solutions.drawing_styles
-
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("Error: Cannot open camera. Please check if a webcam is connected.")
-        return
+    image_rgb = preprocess_frame(buffers, profiler)
+    with profiler.stage('process'):
+        results = detector.process(image_rgb)
 
-    window_name = 'Real-Time Gesture Recognition'
-    print(f"Initialization complete. Press 'q' or click the 'X' on the '{window_name}' window to quit.")
-
-    # --- 主循环 ---
-    while cap.isOpened():
-        success, image = cap.read()
-        if not success:
-            print("Ignoring empty camera frame.")
-            continue
+    gesture_name = NO_HAND
+    landmarks = None
+    hand_labels = []
+    if results.multi_hand_landmarks:
+        # 所有手一次批量分类；单手模式下与之前一样显示最后一只手的结果
+        with profiler.stage('recognize'):
+            landmarks = multi_landmarks_to_array(results.multi_hand_landmarks)
+            hand_labels = classify(landmarks)
+            gesture_name = hand_labels[-1]
+    return FrameResult(buffers.bgr, results, gesture_name, landmarks, hand_labels)
 
-        image.flags.writeable = False
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image_flipped = cv2.flip(image_rgb, 1)
-        results = hands.process(image_flipped)
-        
-        image.flags.writeable = True
-        image = cv2.cvtColor(image_flipped, cv2.COLOR_RGB2BGR)
+def render_frame(image, results, gesture_name, profiler=NULL_PROFILER, tracks=None, motion=None):
+    """
+    在已翻转的 BGR 图像上就地绘制关键点和手势名称并显示。返回 False 表示用户要求退出。
+    多手模式下传入 tracks（HandTracker.update 的返回值），在每只手的手腕处标注 ID 和手势。
+    motion 为最近识别到的动态手势名称（单手模式）。
+    """
+    # 绘制模块随 mediapipe 一起加载，这里只是取出（见 startup.load_drawing）
+    mp_hands, mp_drawing, mp_drawing_styles = load_drawing()
 
-        # --- 手势识别与可视化 ---
-        gesture_name = "No Hand Detected"
+    with profiler.stage('draw'):
+        # --- 可视化 ---
         if results.multi_hand_landmarks:
             for hand_landmarks in results.multi_hand_landmarks:
                 mp_drawing.draw_landmarks(
                     image, hand_landmarks, mp_hands.HAND_CONNECTIONS,
                     mp_drawing_styles.get_default_hand_landmarks_style(),
                     mp_drawing_styles.get_default_hand_connections_style())
-                gesture_name = recognize_gesture(hand_landmarks)
-        
+
         # --- 显示信息 ---
-        cv2.putText(
-            image, f'Gesture: {gesture_name}', (10, 50),
-            cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3, cv2.LINE_AA)
+        if tracks is None:
+            cv2.putText(
+                image, f'Gesture: {gesture_name}', (10, 50),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3, cv2.LINE_AA)
+            if motion is not None:
+                cv2.putText(
+                    image, f'Motion: {motion}', (10, 95),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 0, 0), 3, cv2.LINE_AA)
+        else:
+            height, width = image.shape[:2]
+            cv2.putText(
+                image, f'Hands: {len(tracks)}', (10, 50),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3, cv2.LINE_AA)
+            now = time.time()
+            for track in tracks:
+                wrist_x, wrist_y = track.landmarks[0, :2]
+                label = f'#{track.id} {track.handedness}: {track.gesture}'
+                if track.dynamic is not None and track.dynamic.recent(now) is not None:
+                    label += f' / {track.dynamic.recent(now)}'
+                cv2.putText(
+                    image, label,
+                    (int(wrist_x * width), int(wrist_y * height) + 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2, cv2.LINE_AA)
 
+    with profiler.stage('display'):
         # 显示最终图像
-        cv2.imshow(window_name, image)
-
-        # --- 退出条件 ---
+        cv2.imshow(WINDOW_NAME, image)
         key = cv2.waitKey(5) & 0xFF
-        # 条件1: 按下 'q' 键
-        if key == ord('q'):
+
+    # --- 退出条件 ---
+    # 条件1: 按下 'q' 键
+    if key == ord('q'):
+        return False
+    # 条件2: 用户点击了窗口的 'X' 按钮
+    # 当窗口被关闭时，WND_PROP_VISIBLE 属性会变为 < 1
+    if cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
+        return False
+    return True
+
+def make_sink(display, emitter, profiler=NULL_PROFILER, recorder=None, tracker=None,
+              dynamic=None, debouncer=None):
+    """
+    组合每帧结果的消费者：可选地录制关键点、去抖、发布手势变化事件、识别动态手势、绘制并显示。
+    多手模式下传入 tracker（HandTracker），由各条轨迹分别去抖、发布事件和识别动态手势；
+    单手模式下传入 dynamic（DynamicGestureRecognizer），跟随最后一只手识别动态手势，
+    传入 debouncer（GestureDebouncer）时只显示和发布提交后的手势。
+    返回 sink(result) -> bool，返回 False 表示应退出。
+    """
+    def sink(result):
+        now = time.time()
+        if recorder is not None:
+            recorder.record(now, result.results)
+        gesture_name, confidence = result.gesture_name, None
+        if debouncer is not None:
+            # 首次提交前 current 为 None，不发布事件；显示仍用原始标签
+            debouncer.update(gesture_name, now)
+            confidence = debouncer.confidence
+        if emitter is not None:
+            emitter.update(
+                gesture_name if debouncer is None else debouncer.current, now, confidence)
+        if debouncer is not None and debouncer.current is not None:
+            gesture_name = debouncer.current
+        tracks = motion = None
+        if tracker is not None:
+            with profiler.stage('track'):
+                tracks = tracker.update(
+                    result.landmarks, results_handedness(result.results), result.hand_labels, now)
+        elif dynamic is not None:
+            with profiler.stage('dynamic'):
+                if result.landmarks is None:
+                    dynamic.reset()
+                elif dynamic.update(result.landmarks[-1], now) is not None and emitter is not None:
+                    emitter.publisher.publish(dynamic_gesture_event(dynamic.last_gesture, now))
+                motion = dynamic.recent(now)
+        keep_running = True
+        if display:
+            keep_running = render_frame(
+                result.image, result.results, gesture_name, profiler, tracks, motion)
+        profiler.tick()
+        return keep_running
+    return sink
+
+def run_loop(cap, infer, is_live, sink, max_frames, profiler=NULL_PROFILER):
+    """
+    单线程主循环：采集、推理、显示依次执行。infer(buffers) 处理一帧并返回结果。
+    """
+    frame_count = 0
+    buffers = FrameBuffers()
+    while cap.isOpened():
+        with profiler.stage('read'):
+            success = read_frame(cap, buffers)
+        if not success:
+            if not is_live:
+                break  # 视频文件读完
+            log("Ignoring empty camera frame.")
+            continue
+
+        result = infer(buffers)
+        frame_count += 1
+        if not sink(result):
             break
-        # 条件2: 用户点击了窗口的 'X' 按钮
-        # 当窗口被关闭时，WND_PROP_VISIBLE 属性会变为 < 1
-        if cv2.getWindowProperty(window_name, cv2.WND_PROP_VISIBLE) < 1:
+        if max_frames and frame_count >= max_frames:
             break
 
-    # --- 清理 ---
-    print("Shutting down...")
-    hands.close()
-    cap.release()
-    cv2.destroyAllWindows()
+def run_pipelined(cap, infer, is_live, sink, max_frames, profiler=NULL_PROFILER, source_fps=None):
+    """
+    流水线主循环：采集和推理各占一个线程，渲染在主线程中进行，只处理最新帧。
+    """
+    stats = run_pipeline(
+        cap, infer, lambda frame: sink(frame.result),
+        is_live=is_live, max_frames=max_frames, profiler=profiler, source_fps=source_fps)
+    log(f"Pipeline stats: {stats.summary()}")
+
+def main(argv=None):
+    """
+    主函数，负责捕获视频、处理视频并显示输出。
+    """
+    args = parse_args(argv)
+    log("Initializing computer vision components...")
+
+    # 模型加载与摄像头打开 / 预热并行进行
+    display = not args.no_display
+    hands, cap, is_live, _, startup = start_up(
+        open_source, args.source, max_num_hands=args.max_hands, display=display,
+        warmup_frames=args.warmup_frames)
+    log(f"Startup: {startup.summary()}")
+    if not cap.isOpened():
+        log(f"Error: Cannot open video source '{args.source}'. Please check if a webcam is connected.")
+        hands.close()
+        return
+
+    debounce = DebounceConfig.load(args.rules or DEFAULT_RULES_PATH) if args.debounce else None
+    publisher = open_publisher(args.events) if args.events else None
+    emitter = tracker = None
+    if args.max_hands > 1:
+        tracker = HandTracker(publisher=publisher, dynamic=args.dynamic, debounce=debounce)
+    elif publisher is not None:
+        emitter = GestureEventEmitter(publisher)
+
+    if display:
+        log(f"Initialization complete. Press 'q' or click the 'X' on the '{WINDOW_NAME}' window to quit.")
+    elif publisher is not None:
+        log(f"Initialization complete. Publishing gesture events to {args.events}.")
+    else:
+        log("Initialization complete. Running without display.")
+
+    profiler = NULL_PROFILER
+    if args.profile:
+        profiler = StageProfiler(report_interval=args.profile_interval, report=log)
+
+    detector = hands
+    roi_tracker = scheduler = crop_hands = None
+    if args.roi:
+        # 裁剪区域用单独的 Hands 实例推理，与整帧检测的跟踪状态互不干扰
+        crop_hands = create_hands(args.max_hands)
+        detector = roi_tracker = RoiTracker(
+            hands, crop_hands, max_num_hands=args.max_hands, redetect_interval=args.roi_redetect,
+            crop_size=args.roi_size, profiler=profiler)
+    if args.schedule:
+        detector = scheduler = InferenceScheduler(
+            detector, budget_ms=args.budget_ms, max_interval=args.max_interval, profiler=profiler)
+
+    classify = recognize_gestures_batch
+    if args.rules:
+        classify = RulesReloader(
+            args.rules, on_error=lambda e: log(f"Failed to reload rules from {args.rules}: {e}"),
+            on_reload=lambda rules: log(f"Reloaded {len(rules.names) - 1} gesture rules from {args.rules}"),
+        ).classify
+    elif args.model:
+        model = CentroidClassifier.load(args.model)
+        classify = model.classify
+        log(f"Loaded learned classifier from {args.model}: {len(model.names) - 1} gestures, "
+            f"{len(model.prototypes)} prototypes, k={model.k}")
+
+    # --- 主循环 ---
+    infer = functools.partial(process_frame, detector, profiler=profiler, classify=classify)
+    recorder = LandmarkRecorder(args.record) if args.record else None
+    dynamic = DynamicGestureRecognizer() if args.dynamic and tracker is None else None
+    debouncer = GestureDebouncer(debounce) if debounce is not None and tracker is None else None
+    sink = make_sink(display, emitter, profiler, recorder, tracker, dynamic, debouncer)
+    try:
+        if args.pipeline:
+            run_pipelined(cap, infer, is_live, sink, args.max_frames, profiler, args.source_fps)
+        else:
+            run_loop(cap, infer, is_live, sink, args.max_frames, profiler)
+    except KeyboardInterrupt:
+        pass  # 无界面模式下用 Ctrl+C 退出
+    finally:
+        # --- 清理 ---
+        log("Shutting down...")
+        if scheduler is not None:
+            log(f"Inference scheduler: {scheduler.summary()}")
+        if roi_tracker is not None:
+            log(f"ROI tracking: {roi_tracker.summary()}")
+        if profiler.enabled:
+            log(f"Stage timings: {profiler.format_summary()}")
+            if args.profile_out:
+                profiler.dump(args.profile_out)
+                log(f"Stage timings written to {args.profile_out}")
+        if recorder is not None:
+            recorder.close()
+            log(f"Recorded {recorder.frame_count} frames to {args.record}")
+        if tracker is not None:
+            tracker.close()
+        if publisher is not None:
+            publisher.close()
+        hands.close()
+        if crop_hands is not None:
+            crop_hands.close()
+        cap.release()
+        if display:
+            cv2.destroyAllWindows()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
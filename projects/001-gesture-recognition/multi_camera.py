@@ -0,0 +1,221 @@
+# multi_camera.py
+#
+# 描述:
+# 多路视频源的手势识别引擎。
+# 由于 GIL，多线程版的主循环无法利用多核，因此这里为每一路（或每一组）视频源启动一个
+# 独立的工作进程，每个进程为自己负责的每一路源创建独立的 mp_hands.Hands 实例。
+# 各路的手势变化事件和统计信息通过一个 multiprocessing.Queue 汇总到主进程，
+# 合并为一条 NDJSON 事件流（格式同 events.py，额外带有 "stream" 字段）。
+#
+# 用法:
+#   python multi_camera.py --source 0 --source 1 --source clip.mp4 --workers 3
+#   python multi_camera.py --source a.mp4 --source b.mp4 --events tcp:9000
+
+import argparse
+import multiprocessing as mp_proc
+import os
+import queue
+import sys
+import time
+
+from events import GestureEventEmitter, open_publisher
+from hand_tracker import HandTracker, results_handedness
+
+_WORKER_DONE = "worker_done"
+
+
+class _QueuePublisher:
+    """
+    工作进程内的发布器：给事件加上 stream 字段后放入汇总队列。
+    """
+
+    def __init__(self, out_queue, stream_id):
+        self.out_queue = out_queue
+        self.stream_id = stream_id
+
+    def publish(self, event):
+        event["stream"] = self.stream_id
+        self.out_queue.put(event)
+
+    def close(self):
+        pass
+
+
+def _worker(worker_id, streams, out_queue, stop_event, hands_options, stats_interval):
+    """
+    工作进程入口。streams 为 [(stream_id, source), ...]，轮流从各路读取并识别。
+    """
+    # 在子进程中才导入 OpenCV / MediaPipe，主进程只负责汇总
+    import mediapipe as mp
+
+    from main import open_source, process_frame
+    from preprocess import FrameBuffers, read_frame
+
+    states = []
+    try:
+        for stream_id, source in streams:
+            cap, is_live = open_source(source)
+            if not cap.isOpened():
+                out_queue.put({"type": "error", "stream": stream_id, "timestamp": time.time(),
+                               "message": f"Cannot open video source '{source}'"})
+                continue
+            states.append({
+                "id": stream_id, "cap": cap, "is_live": is_live,
+                "hands": mp.solutions.hands.Hands(**hands_options),
+                "buffers": FrameBuffers(),
+                "emitter": GestureEventEmitter(_QueuePublisher(out_queue, stream_id)),
+                # 多手时每路各有一个跟踪器，事件带稳定的 hand 字段
+                "tracker": (HandTracker(publisher=_QueuePublisher(out_queue, stream_id))
+                            if hands_options.get("max_num_hands", 1) > 1 else None),
+                "frames": 0, "window_frames": 0, "window_start": time.perf_counter(),
+            })
+
+        while states and not stop_event.is_set():
+            for state in list(states):
+                if not read_frame(state["cap"], state["buffers"]):
+                    if not state["is_live"]:
+                        _report_stats(out_queue, state, final=True)
+                        _close_stream(state)
+                        states.remove(state)
+                    continue
+                result = process_frame(state["hands"], state["buffers"])
+                if state["tracker"] is not None:
+                    state["tracker"].update(
+                        result.landmarks, results_handedness(result.results), result.hand_labels)
+                else:
+                    state["emitter"].update(result.gesture_name)
+                state["frames"] += 1
+                state["window_frames"] += 1
+                if stats_interval and time.perf_counter() - state["window_start"] >= stats_interval:
+                    _report_stats(out_queue, state)
+    except KeyboardInterrupt:
+        pass  # Ctrl+C 同样会发给子进程，正常上报最终统计后退出
+    finally:
+        for state in states:
+            _report_stats(out_queue, state, final=True)
+            _close_stream(state)
+        out_queue.put({"type": _WORKER_DONE, "worker": worker_id, "pid": os.getpid()})
+
+
+def _report_stats(out_queue, state, final=False):
+    now = time.perf_counter()
+    elapsed = now - state["window_start"]
+    out_queue.put({
+        "type": "stats",
+        "stream": state["id"],
+        "timestamp": time.time(),
+        "frames": state["frames"],
+        "fps": state["window_frames"] / elapsed if elapsed > 0 else 0.0,
+        "final": final,
+    })
+    state["window_frames"] = 0
+    state["window_start"] = now
+
+
+def _close_stream(state):
+    if state["tracker"] is not None:
+        state["tracker"].close()
+    state["hands"].close()
+    state["cap"].release()
+
+
+def group_sources(sources, workers):
+    """
+    把视频源按轮询方式分配给 workers 个工作进程，返回 [[(stream_id, source), ...], ...]。
+    """
+    workers = max(1, min(workers, len(sources)))
+    groups = [[] for _ in range(workers)]
+    for i, source in enumerate(sources):
+        groups[i % workers].append((i, source))
+    return groups
+
+
+def run_engine(sources, publisher, workers=None, hands_options=None, stats_interval=5.0):
+    """
+    启动多进程识别引擎，把所有工作进程的事件合并后交给 publisher，直到全部视频源结束
+    或收到 KeyboardInterrupt。
+
+    参数:
+      sources: 视频源列表（摄像头编号字符串、视频文件路径或流地址）
+      publisher: 提供 publish(event) 的发布器，见 events.open_publisher
+      workers: 工作进程数，默认每路一个进程（不超过 CPU 核数）
+      hands_options: 传给 mp_hands.Hands 的参数
+      stats_interval: 每路统计信息的上报间隔（秒），0 表示只在结束时上报
+    """
+    if hands_options is None:
+        hands_options = dict(max_num_hands=1, min_detection_confidence=0.7,
+                             min_tracking_confidence=0.5)
+    if workers is None:
+        workers = min(len(sources), os.cpu_count() or 1)
+
+    ctx = mp_proc.get_context('spawn')
+    out_queue = ctx.Queue()
+    stop_event = ctx.Event()
+    processes = [
+        ctx.Process(target=_worker, name=f'gesture-worker-{i}', daemon=True,
+                    args=(i, group, out_queue, stop_event, hands_options, stats_interval))
+        for i, group in enumerate(group_sources(sources, workers))
+    ]
+    for p in processes:
+        p.start()
+
+    remaining = len(processes)
+    try:
+        while remaining:
+            try:
+                event = out_queue.get(timeout=0.5)
+            except queue.Empty:
+                if not any(p.is_alive() for p in processes):
+                    break  # 工作进程异常退出
+                continue
+            if event.get("type") == _WORKER_DONE:
+                remaining -= 1
+                continue
+            publisher.publish(event)
+    except KeyboardInterrupt:
+        stop_event.set()
+        # 继续转发各进程退出前的最终统计
+        deadline = time.monotonic() + 5.0
+        while remaining and time.monotonic() < deadline:
+            try:
+                event = out_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if event.get("type") == _WORKER_DONE:
+                remaining -= 1
+            else:
+                publisher.publish(event)
+    finally:
+        stop_event.set()
+        for p in processes:
+            p.join(timeout=5.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-camera gesture recognition engine")
+    parser.add_argument('--source', action='append', required=True,
+                        help="视频源，可重复指定：摄像头编号、视频文件路径或流地址")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="工作进程数（默认每路一个，不超过 CPU 核数）")
+    parser.add_argument('--events', default='stdout',
+                        help="合并后事件的发布目标：stdout、tcp:PORT 或 unix:PATH")
+    parser.add_argument('--stats-interval', type=float, default=5.0,
+                        help="每路统计信息的上报间隔（秒），0 表示只在结束时上报")
+    parser.add_argument('--max-num-hands', type=int, default=1,
+                        help="每路最多检测的手数")
+    args = parser.parse_args(argv)
+
+    publisher = open_publisher(args.events)
+    print(f"Starting {len(args.source)} stream(s)...", file=sys.stderr)
+    try:
+        run_engine(
+            args.source, publisher, workers=args.workers, stats_interval=args.stats_interval,
+            hands_options=dict(max_num_hands=args.max_num_hands, min_detection_confidence=0.7,
+                               min_tracking_confidence=0.5))
+    finally:
+        publisher.close()
+        print("Shutting down...", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+# pipeline.py
+#
+# 描述:
+# 采集 / 推理 / 渲染三段式流水线。
+# 采集线程持续读取 cv2.VideoCapture，推理线程处理最新的一帧，渲染阶段在调用线程
+# （通常是主线程，cv2.imshow 需要在主线程调用）中显示结果。
+# 各阶段之间用容量为 1 的 LatestQueue 连接：新帧到来时直接覆盖尚未被取走的旧帧，
+# 因此慢推理不会阻塞采集，驱动缓冲区里也不会堆积过期画面——
+# 我们更在意“从拍到画面到给出标签”的端到端延迟，而不是处理每一帧。
+# 帧图像存放在 BufferPool 的预分配缓冲区中，被丢弃或渲染完成后归还复用。
+
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from preprocess import BufferPool, read_frame
+from stage_profiler import NULL_PROFILER
+
+# 视频文件没有给出帧率（CAP_PROP_FPS 为 0 或无效，裸流和管道输入常见）时按这个帧率读取
+DEFAULT_SOURCE_FPS = 30.0
+
+
+class LatestQueue:
+    """
+    有界队列，队满时丢弃最旧的元素，只保留最新的 maxsize 个。
+    on_drop(item) 在元素被丢弃时调用（例如归还缓冲区）。
+    """
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self._items = deque(maxlen=maxsize)
+        self._on_drop = on_drop
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        stale = None
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                stale = self._items.popleft()
+            self._items.append(item)
+            self._cond.notify()
+        if stale is not None and self._on_drop is not None:
+            self._on_drop(stale)
+
+    def get(self, timeout=None):
+        """
+        取出最旧的元素；超时或队列已关闭且为空时返回 None。
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            return self._items.popleft() if self._items else None
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class Frame:
+    """
+    流水线中传递的一帧。capture_time 为 time.perf_counter() 时间戳，用于计算端到端延迟。
+    buffers 为该帧占用的 FrameBuffers。
+    """
+    __slots__ = ('index', 'capture_time', 'buffers', 'result')
+
+    def __init__(self, index, capture_time, buffers):
+        self.index = index
+        self.capture_time = capture_time
+        self.buffers = buffers
+        self.result = None
+
+
+class PipelineStats:
+    def __init__(self):
+        self.captured = 0
+        self.processed = 0
+        self.rendered = 0
+        self.dropped_before_inference = 0
+        self.dropped_before_render = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record_latency(self, latency):
+        self.rendered += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def summary(self):
+        mean_ms = self.total_latency / self.rendered * 1000 if self.rendered else 0.0
+        return (f"captured={self.captured} processed={self.processed} rendered={self.rendered} "
+                f"dropped(capture->infer)={self.dropped_before_inference} "
+                f"dropped(infer->render)={self.dropped_before_render} "
+                f"latency mean={mean_ms:.1f}ms max={self.max_latency * 1000:.1f}ms")
+
+
+def source_frame_interval(cap, is_live, source_fps=None):
+    """
+    采集两帧之间的间隔（秒）。摄像头为 0（由设备决定节奏）；视频文件按 source_fps、
+    文件自带的帧率或 DEFAULT_SOURCE_FPS 读取，模拟摄像头的实时节奏，否则采集会瞬间读完整个文件，
+    最新帧队列会丢掉几乎所有帧。
+    """
+    if is_live:
+        return 0.0
+    fps = source_fps or cap.get(cv2.CAP_PROP_FPS)
+    # 部分后端对未知帧率返回 0、NaN 或离谱的大数
+    if not fps or not 0 < fps <= 1000:
+        fps = DEFAULT_SOURCE_FPS
+    return 1.0 / fps
+
+
+def _capture_loop(cap, pool, out_queue, stop_event, stats, is_live, max_frames, profiler, source_fps):
+    frame_interval = source_frame_interval(cap, is_live, source_fps)
+    start = time.perf_counter()
+    index = 0
+    try:
+        while not stop_event.is_set():
+            if max_frames and index >= max_frames:
+                break
+            if frame_interval:
+                delay = start + index * frame_interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            buffers = pool.acquire()
+            with profiler.stage('read'):
+                success = read_frame(cap, buffers)
+            if not success:
+                pool.release(buffers)
+                if is_live:
+                    continue
+                break  # 视频文件读完
+            out_queue.put(Frame(index, time.perf_counter(), buffers))
+            stats.captured += 1
+            index += 1
+    finally:
+        out_queue.close()
+
+
+def _inference_loop(infer, in_queue, out_queue, stop_event, stats):
+    try:
+        while not stop_event.is_set():
+            frame = in_queue.get(timeout=0.1)
+            if frame is None:
+                if in_queue.closed:
+                    break
+                continue
+            frame.result = infer(frame.buffers)
+            stats.processed += 1
+            out_queue.put(frame)
+    finally:
+        out_queue.close()
+
+
+def run_pipeline(cap, infer, render, is_live=True, max_frames=0, profiler=NULL_PROFILER,
+                 source_fps=None):
+    """
+    以流水线方式运行识别循环，直到视频源结束或 render 返回 False。
+
+    参数:
+      cap: 已打开的 cv2.VideoCapture（摄像头、视频文件或流地址均可）
+      infer: infer(buffers) -> result，在推理线程中调用；buffers.bgr 为刚读到的 BGR 图像
+      render: render(frame) -> bool，在当前线程中调用；frame.result 为 infer 的返回值，
+              render 返回后帧缓冲区即被回收，不应再持有其中的图像
+      is_live: 视频源是否为实时摄像头（摄像头读取失败时重试，文件读完即结束）
+      max_frames: 最多采集的帧数，0 表示不限
+      profiler: StageProfiler，记录 read 阶段和端到端延迟 (end_to_end)
+      source_fps: 视频文件的读取帧率；None 时用文件自带的帧率，文件没有给出时用 DEFAULT_SOURCE_FPS
+    返回 PipelineStats。
+    """
+    stats = PipelineStats()
+    stop_event = threading.Event()
+    pool = BufferPool()
+
+    def release(frame):
+        pool.release(frame.buffers)
+
+    captured = LatestQueue(maxsize=1, on_drop=release)
+    inferred = LatestQueue(maxsize=1, on_drop=release)
+
+    threads = [
+        threading.Thread(target=_capture_loop, name='capture', daemon=True,
+                         args=(cap, pool, captured, stop_event, stats, is_live, max_frames, profiler,
+                               source_fps)),
+        threading.Thread(target=_inference_loop, name='inference', daemon=True,
+                         args=(infer, captured, inferred, stop_event, stats)),
+    ]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            frame = inferred.get(timeout=0.1)
+            if frame is None:
+                if inferred.closed:
+                    break
+                continue
+            keep_running = render(frame)
+            release(frame)
+            latency = time.perf_counter() - frame.capture_time
+            stats.record_latency(latency)
+            profiler.record('end_to_end', latency)
+            if not keep_running:
+                break
+    finally:
+        stop_event.set()
+        for t in threads:
+            t.join(timeout=2.0)
+        stats.dropped_before_inference = captured.dropped
+        stats.dropped_before_render = inferred.dropped
+    return stats
@@ -0,0 +1,83 @@
+# preprocess.py
+#
+# 描述:
+# 复用预分配缓冲区的帧预处理。
+# 原来的每一帧要分配三张全分辨率图像：BGR->RGB、翻转、再 RGB->BGR 转回来用于绘制。
+# 这里改为:
+#   1. cap.read 直接读入上一帧的 BGR 缓冲区；
+#   2. 在该缓冲区上就地水平翻转，翻转后的 BGR 图像直接用于绘制和显示；
+#   3. cvtColor 通过 dst= 写入预分配的 RGB 缓冲区，作为 MediaPipe 的输入。
+# 稳定运行时每帧不再分配任何图像内存。
+# （用 NumPy 的 image[:, ::-1, ::-1] 一次完成翻转+换通道并不比 OpenCV 的两次 SIMD 处理快，
+#   且无法同时得到绘制用的 BGR 图像，所以没有采用。）
+
+import threading
+
+import cv2
+import numpy as np
+
+
+class FrameBuffers:
+    """
+    一帧所需的缓冲区：bgr 为采集并就地翻转后的图像（用于绘制），rgb 为推理输入。
+    首帧或分辨率变化时才重新分配。
+    """
+    __slots__ = ('bgr', 'rgb')
+
+    def __init__(self):
+        self.bgr = None
+        self.rgb = None
+
+
+def read_frame(cap, buffers):
+    """
+    把下一帧读入 buffers.bgr。成功返回 True。
+    """
+    if buffers.bgr is None:
+        success, image = cap.read()
+    else:
+        success, image = cap.read(buffers.bgr)
+    if not success:
+        return False
+    # 分辨率变化时 OpenCV 会返回新数组，之后就复用新数组
+    buffers.bgr = image
+    return True
+
+
+def preprocess_frame(buffers, profiler):
+    """
+    就地翻转 buffers.bgr，并转换到 buffers.rgb。返回可直接送入 hands.process 的 RGB 图像。
+    """
+    bgr = buffers.bgr
+    with profiler.stage('flip'):
+        cv2.flip(bgr, 1, dst=bgr)
+    with profiler.stage('bgr2rgb'):
+        if buffers.rgb is None or buffers.rgb.shape != bgr.shape:
+            buffers.rgb = np.empty_like(bgr)
+        rgb = buffers.rgb
+        rgb.flags.writeable = True
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+    # 标记为只读，MediaPipe 可以按引用传递而不拷贝
+    rgb.flags.writeable = False
+    return rgb
+
+
+class BufferPool:
+    """
+    多线程流水线使用的 FrameBuffers 池。
+    帧在被丢弃或渲染完成后归还；池为空时才新建，稳定后不再分配。
+    """
+
+    def __init__(self):
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return FrameBuffers()
+
+    def release(self, buffers):
+        with self._lock:
+            self._free.append(buffers)
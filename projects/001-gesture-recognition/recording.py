@@ -0,0 +1,170 @@
+# recording.py
+#
+# 描述:
+# 紧凑的关键点录制 / 回放格式，只依赖 NumPy。
+# 一个录制是一个目录，包含:
+#   frames.bin   每帧一条 FRAME_DTYPE 记录：时间戳、该帧第一只手在 hands.bin 中的下标、手数
+#   hands.bin    每只手一条 HAND_DTYPE 记录：所属帧、左右手、置信度、(21, 3) 关键点
+#   meta.json    格式版本与 dtype 描述
+# 两个 .bin 文件都是定长记录的原始数组，读取时直接 np.memmap，不经过 pickle / protobuf，
+# 因此可以在没有摄像头、OpenCV 和 MediaPipe 的机器（例如 Linux CI）上秒级重新评估数小时的录制。
+
+import json
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+NUM_LANDMARKS = 21
+
+FRAME_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('first_hand', '<u8'),
+    ('num_hands', '<u1'),
+])
+HAND_DTYPE = np.dtype([
+    ('frame', '<u8'),
+    ('handedness', 'i1'),  # 0 = Left, 1 = Right, -1 = 未知
+    ('score', '<f4'),
+    ('landmarks', '<f4', (NUM_LANDMARKS, 3)),
+])
+HANDEDNESS_CODES = {'Left': 0, 'Right': 1}
+HANDEDNESS_LABELS = {0: 'Left', 1: 'Right'}
+
+
+class LandmarkRecorder:
+    """
+    把每一帧的 multi_hand_landmarks / multi_handedness 追加写入录制目录。
+
+        recorder = LandmarkRecorder('session-01')
+        recorder.record(time.time(), results)
+        recorder.close()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._frames = open(os.path.join(path, 'frames.bin'), 'wb')
+        self._hands = open(os.path.join(path, 'hands.bin'), 'wb')
+        self.frame_count = 0
+        self.hand_count = 0
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "frame_dtype": FRAME_DTYPE.descr,
+                "hand_dtype": HAND_DTYPE.descr,
+            }, f)
+
+    def record(self, timestamp, results):
+        """
+        记录一帧。results 为 hands.process 的返回值（或具有相同属性的对象）。
+        """
+        multi_hand_landmarks = results.multi_hand_landmarks or []
+        multi_handedness = getattr(results, 'multi_handedness', None) or []
+        hands = np.zeros(len(multi_hand_landmarks), dtype=HAND_DTYPE)
+        for i, hand_landmarks in enumerate(multi_hand_landmarks):
+            hands[i]['frame'] = self.frame_count
+            hands[i]['landmarks'] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+            if i < len(multi_handedness):
+                classification = multi_handedness[i].classification[0]
+                hands[i]['handedness'] = HANDEDNESS_CODES.get(classification.label, -1)
+                hands[i]['score'] = classification.score
+            else:
+                hands[i]['handedness'] = -1
+        self.record_arrays(timestamp, hands)
+
+    def record_arrays(self, timestamp, hands):
+        """
+        直接记录一帧的 HAND_DTYPE 数组（frame 字段会被覆盖）。
+        """
+        hands['frame'] = self.frame_count
+        frame = np.array([(timestamp, self.hand_count, len(hands))], dtype=FRAME_DTYPE)
+        self._frames.write(frame.tobytes())
+        self._hands.write(hands.tobytes())
+        self.frame_count += 1
+        self.hand_count += len(hands)
+
+    def close(self):
+        self._frames.close()
+        self._hands.close()
+
+
+def _memmap(path, dtype):
+    # 记录数由文件大小决定，录制中途异常退出时也能读取已写入的完整记录
+    count = os.path.getsize(path) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+
+class LandmarkRecording:
+    """
+    以内存映射方式读取录制目录。
+
+    属性:
+      frames: FRAME_DTYPE 数组，每帧一条
+      hands: HAND_DTYPE 数组，每只手一条
+      landmarks: (H, 21, 3) 视图，可直接送入 recognize_gestures_batch
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version {meta.get('version')} in {path}")
+        self.frames = _memmap(os.path.join(path, 'frames.bin'), FRAME_DTYPE)
+        self.hands = _memmap(os.path.join(path, 'hands.bin'), HAND_DTYPE)
+        # 最后一帧的手部记录可能不完整，截掉不属于任何完整帧的部分
+        if len(self.frames):
+            last = self.frames[-1]
+            complete = int(last['first_hand']) + int(last['num_hands'])
+            if complete > len(self.hands):
+                self.frames = self.frames[:-1]
+            else:
+                self.hands = self.hands[:complete]
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def landmarks(self):
+        return self.hands['landmarks']
+
+    @property
+    def timestamps(self):
+        return self.frames['timestamp']
+
+    def frame_hands(self, index):
+        """
+        返回第 index 帧的 HAND_DTYPE 记录。
+        """
+        frame = self.frames[index]
+        start = int(frame['first_hand'])
+        return self.hands[start:start + int(frame['num_hands'])]
+
+    def iter_frames(self):
+        """
+        逐帧产出 (timestamp, landmarks (n, 21, 3), handedness 标签列表)。
+        """
+        for i in range(len(self.frames)):
+            hands = self.frame_hands(i)
+            labels = [HANDEDNESS_LABELS.get(int(h), 'Unknown') for h in hands['handedness']]
+            yield float(self.frames[i]['timestamp']), hands['landmarks'], labels
+
+    def classify(self, classify_batch):
+        """
+        一次批量分类全部手，返回与 hands 对齐的标签列表。
+        classify_batch 例如 gesture_classifier.recognize_gestures_batch。
+        """
+        if not len(self.hands):
+            return []
+        return classify_batch(self.landmarks)
+
+    def frame_gestures(self, hand_labels, no_hand="No Hand Detected"):
+        """
+        由每只手的标签得到每帧的标签：与 main.py 一致，取该帧最后一只手的结果。
+        """
+        last = self.frames['first_hand'].astype(np.int64) + self.frames['num_hands'] - 1
+        return [hand_labels[j] if n else no_hand
+                for j, n in zip(last.tolist(), self.frames['num_hands'].tolist())]
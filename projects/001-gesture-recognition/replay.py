@@ -0,0 +1,88 @@
+# replay.py
+#
+# 描述:
+# 离线回放 recording.py 录制的关键点，不需要摄像头、OpenCV 或 MediaPipe。
+# 全部手部关键点一次送入批量分类器，再按帧输出手势变化事件（NDJSON，格式同 events.py）。
+#
+# 用法:
+#   python replay.py session-01              # 输出手势变化事件，统计信息写到 stderr
+#   python replay.py session-01 --summary    # 只输出各手势的帧数统计
+#   python replay.py session-01 --rules my_gestures.json --summary
+#   python replay.py session-01 --dynamic    # 同时输出动态手势事件（挥动、画圈、推）
+#   python replay.py session-01 --debounce   # 只输出去抖后提交的手势切换
+#   python replay.py session-01 --model model.npz --summary   # 用 learned_classifier 模型重新分类
+
+import argparse
+import sys
+import time
+from collections import Counter
+
+from debounce import DebounceConfig, GestureDebouncer
+from dynamic_gestures import DynamicGestureRecognizer, dynamic_gesture_event
+from events import GestureEventEmitter, StreamPublisher
+from gesture_classifier import DEFAULT_RULES_PATH, GestureRules, recognize_gestures_batch
+from learned_classifier import CentroidClassifier
+from recording import LandmarkRecording
+
+
+def replay(path, publisher=None, classify_batch=recognize_gestures_batch, dynamic=False,
+           debounce=None):
+    """
+    重新评估一个录制，返回每帧的手势标签列表；给出 publisher 时按录制时间戳发布手势变化事件，
+    dynamic 为 True 时还跟随每帧最后一只手发布动态手势事件（与 main.py 单手模式一致），
+    给出 debounce（DebounceConfig）时只发布去抖后提交的手势切换。
+    """
+    recording = LandmarkRecording(path)
+    frame_labels = recording.frame_gestures(recording.classify(classify_batch))
+    if publisher is not None:
+        emitter = GestureEventEmitter(publisher)
+        recognizer = DynamicGestureRecognizer() if dynamic else None
+        debouncer = GestureDebouncer(debounce) if debounce is not None else None
+        for i, (timestamp, label) in enumerate(zip(recording.timestamps.tolist(), frame_labels)):
+            if debouncer is None:
+                emitter.update(label, timestamp=timestamp)
+            else:
+                debouncer.update(label, timestamp)
+                emitter.update(debouncer.current, timestamp, debouncer.confidence)
+            if recognizer is None:
+                continue
+            hands = recording.frame_hands(i)
+            if not len(hands):
+                recognizer.reset()
+            elif recognizer.update(hands['landmarks'][-1], timestamp) is not None:
+                publisher.publish(dynamic_gesture_event(recognizer.last_gesture, timestamp))
+    return frame_labels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded landmarks through the gesture classifier")
+    parser.add_argument('recording', help="录制目录（main.py --record 生成）")
+    parser.add_argument('--summary', action='store_true', help="只输出各手势的帧数统计")
+    parser.add_argument('--rules', default=None, help="使用指定的手势规则文件代替默认的 gestures.json")
+    parser.add_argument('--model', default=None,
+                        help="使用 learned_classifier.py 训练的模型代替规则分类器")
+    parser.add_argument('--dynamic', action='store_true', help="同时输出动态手势事件")
+    parser.add_argument('--debounce', action='store_true',
+                        help="只输出去抖后提交的手势切换（参数取自规则文件的 debounce 段）")
+    args = parser.parse_args(argv)
+
+    classify_batch = recognize_gestures_batch
+    if args.model:
+        classify_batch = CentroidClassifier.load(args.model).classify
+    elif args.rules:
+        classify_batch = GestureRules.load(args.rules).classify
+    start = time.perf_counter()
+    publisher = None if args.summary else StreamPublisher(sys.stdout)
+    debounce = DebounceConfig.load(args.rules or DEFAULT_RULES_PATH) if args.debounce else None
+    labels = replay(args.recording, publisher, classify_batch, args.dynamic, debounce)
+    elapsed = time.perf_counter() - start
+
+    counts = Counter(labels)
+    if args.summary:
+        for label, count in counts.most_common():
+            print(f"{label}\t{count}")
+    print(f"Replayed {len(labels)} frames in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# roi_tracker.py
+#
+# 描述:
+# 基于上一帧手部位置的 ROI 跟踪推理。
+# 手通常只占 1080p 画面的一小块，因此用上一帧关键点的外接框（加边距、取正方形）裁剪画面，
+# 缩放到固定尺寸后再送入 hands.process，最后把关键点映射回整帧的归一化坐标。
+# 丢失手部或置信度下降时回退到整帧检测；跟踪到的手少于 max_num_hands 时，每隔 redetect_interval 帧
+# 做一次整帧检测，发现新进入画面的手。
+# 裁剪推理使用单独的 Hands 实例（crop_hands）：MediaPipe 视频模式会沿用上一帧的关键点做跟踪，
+# 如果同一个实例时而处理裁剪图、时而处理整帧，两种坐标系的关键点会混在一起。
+# RoiTracker 与 mp_hands.Hands 一样提供 process(image) 接口，可以直接替换。
+
+import cv2
+import numpy as np
+
+from stage_profiler import NULL_PROFILER
+
+
+class RoiTracker:
+    """
+    包装 mp_hands.Hands，在跟踪到手时只对手部区域做推理。
+
+    参数:
+      hands: mp_hands.Hands 实例，只用于整帧检测
+      crop_hands: 只用于裁剪区域推理的另一个 Hands 实例；为 None 时与 hands 共用（两种坐标系会混用，不推荐）
+      max_num_hands: 与 Hands 的 max_num_hands 相同；跟踪到的手少于该数时定期整帧检测
+      redetect_interval: 跟踪到的手不足 max_num_hands 时，每隔这么多帧做一次整帧检测
+      crop_size: 裁剪区域缩放后的边长（像素）
+      padding: 外接框每边扩展的比例（相对于外接框的长边）
+      min_confidence: 低于该 handedness 置信度时视为跟踪丢失
+      max_roi_fraction: ROI 面积超过整帧的该比例时直接用整帧推理（裁剪已无收益）
+    """
+
+    def __init__(self, hands, crop_hands=None, max_num_hands=1, redetect_interval=10, crop_size=256,
+                 padding=0.35, min_confidence=0.6, max_roi_fraction=0.5, profiler=NULL_PROFILER):
+        self.hands = hands
+        self.crop_hands = crop_hands if crop_hands is not None else hands
+        self.max_num_hands = max_num_hands
+        self.redetect_interval = redetect_interval
+        self.crop_size = crop_size
+        self.padding = padding
+        self.min_confidence = min_confidence
+        self.max_roi_fraction = max_roi_fraction
+        self.profiler = profiler
+        self.roi = None  # (x0, y0, side) 像素坐标，None 表示需要整帧检测
+        self.tracked = 0  # 当前 ROI 中跟踪的手数
+        self._since_detect = 0  # 距上一次整帧检测的帧数
+        self._crop = np.empty((crop_size, crop_size, 3), dtype=np.uint8)
+        self.crop_frames = 0
+        self.full_frames = 0
+        self.lost = 0
+        self.redetects = 0
+
+    def reset(self):
+        self.roi = None
+        self.tracked = 0
+
+    def process(self, image):
+        """
+        对 RGB 图像推理，返回的结果中关键点均为整帧归一化坐标。
+        """
+        height, width = image.shape[:2]
+        if self.roi is not None and self._should_redetect():
+            # 可能有新的手进入画面：本帧整帧检测，找到的手不比正在跟踪的少时改用整帧结果
+            self.redetects += 1
+            results = self._process_full(image)
+            if self._is_confident(results) and len(results.multi_hand_landmarks) >= self.tracked:
+                self._track(results, width, height)
+                return results
+        if self.roi is not None:
+            self._since_detect += 1
+            results = self._process_crop(image, width, height)
+            if self._is_confident(results):
+                self._track(results, width, height)
+                return results
+            # 手离开了裁剪区域或置信度下降，本帧回退到整帧检测
+            self.lost += 1
+            self.reset()
+
+        results = self._process_full(image)
+        if self._is_confident(results):
+            self._track(results, width, height)
+        return results
+
+    def _should_redetect(self):
+        return (self.tracked < self.max_num_hands and self.redetect_interval > 0
+                and self._since_detect >= self.redetect_interval)
+
+    def _process_full(self, image):
+        self._since_detect = 0
+        self.full_frames += 1
+        return self.hands.process(image)
+
+    def _track(self, results, width, height):
+        self.tracked = len(results.multi_hand_landmarks)
+        self.roi = self._compute_roi(results.multi_hand_landmarks, width, height)
+
+    def _process_crop(self, image, width, height):
+        x0, y0, side = self.roi
+        with self.profiler.stage('roi_crop'):
+            crop = self._crop
+            crop.flags.writeable = True
+            cv2.resize(image[y0:y0 + side, x0:x0 + side], (self.crop_size, self.crop_size),
+                       dst=crop, interpolation=cv2.INTER_AREA)
+            crop.flags.writeable = False
+        results = self.crop_hands.process(crop)
+        self.crop_frames += 1
+
+        if results.multi_hand_landmarks:
+            # 裁剪坐标 -> 整帧归一化坐标。z 与 x 使用相同的尺度
+            sx, sy = side / width, side / height
+            ox, oy = x0 / width, y0 / height
+            for hand_landmarks in results.multi_hand_landmarks:
+                for lm in hand_landmarks.landmark:
+                    lm.x = ox + lm.x * sx
+                    lm.y = oy + lm.y * sy
+                    lm.z = lm.z * sx
+        return results
+
+    def _is_confident(self, results):
+        if not results.multi_hand_landmarks:
+            return False
+        handedness = getattr(results, 'multi_handedness', None)
+        if not handedness:
+            return True
+        return all(h.classification[0].score >= self.min_confidence for h in handedness)
+
+    def _compute_roi(self, multi_hand_landmarks, width, height):
+        """
+        由关键点计算下一帧的正方形 ROI (x0, y0, side)。区域过大时返回 None（改为整帧推理）。
+        """
+        xs = [lm.x for hand in multi_hand_landmarks for lm in hand.landmark]
+        ys = [lm.y for hand in multi_hand_landmarks for lm in hand.landmark]
+        x_min, x_max = min(xs) * width, max(xs) * width
+        y_min, y_max = min(ys) * height, max(ys) * height
+
+        side = max(x_max - x_min, y_max - y_min) * (1.0 + 2.0 * self.padding)
+        side = int(min(max(side, self.crop_size / 2), min(width, height)))
+        if side * side > self.max_roi_fraction * width * height:
+            return None
+
+        # 以外接框中心为中心，平移使其完全落在画面内
+        cx, cy = (x_min + x_max) / 2.0, (y_min + y_max) / 2.0
+        x0 = int(min(max(cx - side / 2.0, 0), width - side))
+        y0 = int(min(max(cy - side / 2.0, 0), height - side))
+        return x0, y0, side
+
+    def summary(self):
+        return (f"crop={self.crop_frames} full={self.full_frames} lost={self.lost} "
+                f"redetect={self.redetects}")
@@ -0,0 +1,123 @@
+# scheduler.py
+#
+# 描述:
+# 自适应推理调度。
+# 静态手势（Open Palm、Closed Fist 等）不需要每秒 30 次完整推理。InferenceScheduler 只在
+# “关键帧”上调用 detector.process：每隔 k 帧一次，或画面运动超过阈值时立即推理。
+# 两个关键帧之间，根据最近两个关键帧的关键点做匀速外推，生成的关键点照常进入手势识别与绘制。
+# k 会根据实测的推理耗时自动调整，使平均每帧的推理开销不超过设定的预算。
+# InferenceScheduler 与 mp_hands.Hands 一样提供 process(image) 接口，可以包装 Hands 或 RoiTracker。
+
+import copy
+import math
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from gesture_classifier import multi_landmarks_to_array
+from stage_profiler import NULL_PROFILER
+
+_THUMB_SIZE = (32, 24)
+
+
+class InferenceScheduler:
+    """
+    参数:
+      detector: 提供 process(image) 的推理对象
+      budget_ms: 平均每帧允许的推理耗时（毫秒）
+      min_interval / max_interval: 关键帧间隔 k 的取值范围
+      motion_threshold: 缩略图与上一关键帧的平均像素差（0-255）超过该值时立即推理
+      smoothing: 推理耗时指数滑动平均的系数
+    """
+
+    def __init__(self, detector, budget_ms=10.0, min_interval=1, max_interval=6,
+                 motion_threshold=6.0, smoothing=0.2, profiler=NULL_PROFILER):
+        self.detector = detector
+        self.budget_ms = budget_ms
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_threshold = motion_threshold
+        self.smoothing = smoothing
+        self.profiler = profiler
+
+        self.interval = min_interval
+        self.inference_ms = None  # 推理耗时的滑动平均
+        self.keyframes = 0
+        self.predicted = 0
+        self.motion_triggered = 0
+
+        self._frames_since_key = 0
+        self._thumb = np.empty((_THUMB_SIZE[1], _THUMB_SIZE[0], 3), dtype=np.uint8)
+        self._key_thumb = np.empty_like(self._thumb)
+        self._results = None
+        self._key_points = None   # 最近一个关键帧的关键点 (N, 21, 3)
+        self._velocity = None     # 每帧位移 (N, 21, 3)
+
+    def process(self, image):
+        with self.profiler.stage('motion'):
+            cv2.resize(image, _THUMB_SIZE, dst=self._thumb, interpolation=cv2.INTER_AREA)
+            motion = (float(cv2.absdiff(self._thumb, self._key_thumb).mean())
+                      if self._results is not None else math.inf)
+
+        self._frames_since_key += 1
+        is_keyframe = self._results is None or self._frames_since_key >= self.interval
+        if not is_keyframe and motion > self.motion_threshold:
+            is_keyframe = True
+            self.motion_triggered += 1
+
+        if is_keyframe:
+            return self._run_keyframe(image)
+        return self._extrapolate()
+
+    def _run_keyframe(self, image):
+        start = time.perf_counter()
+        results = self.detector.process(image)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self._adapt_interval(elapsed_ms)
+
+        points = multi_landmarks_to_array(results.multi_hand_landmarks)
+        if self._key_points is not None and len(points) and len(points) == len(self._key_points):
+            self._velocity = (points - self._key_points) / self._frames_since_key
+        else:
+            self._velocity = None
+        self._key_points = points
+        self._results = results
+        self._frames_since_key = 0
+        self._key_thumb[...] = self._thumb
+        self.keyframes += 1
+        return results
+
+    def _extrapolate(self):
+        self.predicted += 1
+        results = self._results
+        if self._velocity is None or not results.multi_hand_landmarks:
+            return results  # 没有速度信息时保持上一关键帧的结果
+
+        points = self._key_points + self._velocity * self._frames_since_key
+        if len(points) != len(results.multi_hand_landmarks):
+            return results
+        # 每帧生成新的关键点对象：流水线模式下渲染线程可能还在读上一帧的结果，不能就地改写
+        predicted = [copy.deepcopy(h) for h in results.multi_hand_landmarks]
+        for hand, hand_points in zip(predicted, points):
+            for lm, (x, y, z) in zip(hand.landmark, hand_points.tolist()):
+                lm.x, lm.y, lm.z = x, y, z
+        return SimpleNamespace(
+            multi_hand_landmarks=predicted,
+            multi_handedness=getattr(results, 'multi_handedness', None),
+            multi_hand_world_landmarks=None)
+
+    def _adapt_interval(self, elapsed_ms):
+        if self.inference_ms is None:
+            self.inference_ms = elapsed_ms
+        else:
+            self.inference_ms += self.smoothing * (elapsed_ms - self.inference_ms)
+        wanted = math.ceil(self.inference_ms / self.budget_ms) if self.budget_ms > 0 else 1
+        self.interval = min(max(wanted, self.min_interval), self.max_interval)
+
+    def summary(self):
+        ms = self.inference_ms or 0.0
+        return (f"keyframes={self.keyframes} predicted={self.predicted} "
+                f"motion_triggered={self.motion_triggered} interval={self.interval} "
+                f"inference={ms:.1f}ms")
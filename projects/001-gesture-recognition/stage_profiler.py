@@ -0,0 +1,168 @@
+# stage_profiler.py
+#
+# 描述:
+# 识别循环的分阶段耗时统计。
+# 每个阶段（cap.read、flip、cvtColor、hands.process、手势识别、绘制、显示）
+# 保存最近 window 个样本的环形缓冲区，按需计算 p50/p95/p99；另有按帧计数的 FPS。
+# 统计结果可以在退出时写入 CSV / JSON，也可以按固定间隔输出到日志。
+# 关闭时使用 NULL_PROFILER，每个阶段只多一次空的 with 语句，几乎没有开销。
+
+import csv
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _RollingSamples:
+    """
+    固定容量的环形缓冲区，保存最近的耗时样本（单位：秒）。
+    """
+
+    def __init__(self, window):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0  # 累计样本数（可能超过 window）
+        self.total = 0.0
+
+    def add(self, value):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+        self.total += value
+
+    def recent(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+
+class _StageTimer:
+    __slots__ = ('_profiler', '_name', '_start')
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._profiler.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class StageProfiler:
+    """
+    分阶段计时器。用法:
+
+        with profiler.stage('process'):
+            results = hands.process(image)
+        profiler.tick()  # 每帧结束时调用一次，用于计算 FPS
+    """
+    enabled = True
+
+    def __init__(self, window=1000, report_interval=0.0, report=None):
+        self.window = window
+        self.report_interval = report_interval
+        self._report = report or print
+        self._stages = {}
+        self._last_tick = None
+        self._last_report = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def record(self, name, seconds):
+        samples = self._stages.get(name)
+        if samples is None:
+            with self._lock:
+                samples = self._stages.setdefault(name, _RollingSamples(self.window))
+        samples.add(seconds)
+
+    def tick(self):
+        """
+        标记一帧结束。设置了 report_interval 时，按间隔输出一次统计摘要。
+        """
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            self.record('frame', now - self._last_tick)
+        self._last_tick = now
+        if self.report_interval and now - self._last_report >= self.report_interval:
+            self._last_report = now
+            self._report(self.format_summary())
+
+    def fps(self):
+        """
+        最近 window 帧的平均帧率。
+        """
+        samples = self._stages.get('frame')
+        recent = samples.recent() if samples is not None else ()
+        return float(len(recent) / recent.sum()) if len(recent) and recent.sum() > 0 else 0.0
+
+    def snapshot(self):
+        """
+        返回 {"fps": ..., "stages": {name: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}}。
+        百分位数基于最近 window 个样本，count / mean_ms 基于全部样本。
+        阶段 'frame' 是相邻两次 tick() 的间隔，即整帧耗时。
+        """
+        stages = {}
+        with self._lock:
+            items = list(self._stages.items())
+        for name, samples in items:
+            recent = samples.recent() * 1000.0
+            if not len(recent):
+                continue
+            p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+            stages[name] = {
+                "count": samples.count,
+                "mean_ms": samples.total / samples.count * 1000.0,
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(recent.max()),
+            }
+        return {"fps": self.fps(), "stages": stages}
+
+    def format_summary(self):
+        snap = self.snapshot()
+        parts = [f"{name} p50={s['p50_ms']:.2f} p95={s['p95_ms']:.2f} p99={s['p99_ms']:.2f}"
+                 for name, s in snap["stages"].items()]
+        return f"FPS {snap['fps']:.1f} | " + " | ".join(parts) + " (ms)"
+
+    def dump(self, path):
+        """
+        写出统计结果。扩展名为 .csv 时每个阶段一行（FPS 可由 frame 行换算），否则写 JSON。
+        """
+        snap = self.snapshot()
+        if str(path).lower().endswith('.csv'):
+            fields = ["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                for name, s in snap["stages"].items():
+                    writer.writerow({"stage": name, **s})
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(snap, f, indent=2)
+
+
+class _NullProfiler:
+    """
+    关闭统计时使用的空实现，所有方法都不做任何事。
+    """
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def record(self, name, seconds):
+        pass
+
+    def tick(self):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
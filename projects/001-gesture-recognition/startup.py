@@ -0,0 +1,111 @@
+# startup.py
+#
+# 描述:
+# 缩短识别程序的启动时间。原来的顺序是：导入 mediapipe -> 创建 Hands（加载模型）-> 打开摄像头，
+# 而打开摄像头和等待自动曝光稳定本身就要一两秒，两段等待串行叠加。
+# 这里把“打开并预热视频源”放到后台线程，与主线程中导入 mediapipe、创建并预热 Hands 同时进行；
+# 绘制相关模块（drawing_utils / drawing_styles）无法延迟导入：导入 mediapipe 时其 solutions 包
+# 就已经加载了它们，所以无显示模式并不会因此省下启动时间，也不单独计时。
+# 各阶段耗时记录在 StartupReport 中，由 main.py 在启动完成后输出。
+
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class StartupReport:
+    """
+    记录启动各阶段的耗时（秒）。阶段可以在不同线程中并行计时。
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def timed(self, name, fn, *args, **kwargs):
+        begin = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.phases[name] = time.perf_counter() - begin
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def summary(self):
+        parts = ' '.join(f"{name}={seconds:.2f}s" for name, seconds in sorted(self.phases.items()))
+        return f"total={self.total():.2f}s ({parts})"
+
+
+def open_and_warm_up(open_source, source, warmup_frames=5, warmup_timeout=2.0):
+    """
+    打开视频源；对摄像头连续读取并丢弃若干帧，等待自动曝光 / 白平衡稳定。
+    视频文件不预热（否则会跳过开头的帧）。返回 (cap, is_live)。
+    """
+    cap, is_live = open_source(source)
+    if is_live and cap.isOpened() and warmup_frames > 0:
+        deadline = time.perf_counter() + warmup_timeout
+        frame = None
+        read = 0
+        while read < warmup_frames and time.perf_counter() < deadline:
+            success, frame = cap.read(frame)
+            if success:
+                read += 1
+            else:
+                frame = None
+    return cap, is_live
+
+
+def create_hands(max_num_hands=1, warm_up=True):
+    """
+    导入 mediapipe 并创建 Hands。warm_up 时先处理一帧空白图像，让图和推理后端在主循环开始前完成初始化，
+    避免第一帧的耗时尖峰。
+    """
+    import mediapipe as mp
+
+    hands = mp.solutions.hands.Hands(
+        max_num_hands=max_num_hands, min_detection_confidence=0.7, min_tracking_confidence=0.5)
+    if warm_up:
+        blank = np.zeros((480, 640, 3), dtype=np.uint8)
+        blank.flags.writeable = False
+        hands.process(blank)
+    return hands
+
+
+@functools.lru_cache(maxsize=None)
+def load_drawing():
+    """
+    返回绘制关键点所需的 MediaPipe 模块 (hands 模块, drawing_utils, drawing_styles)。
+    这些模块在 create_hands 导入 mediapipe 时就已加载，这里只是取出来。
+    """
+    import mediapipe as mp
+
+    return mp.solutions.hands, mp.solutions.drawing_utils, mp.solutions.drawing_styles
+
+
+def start_up(open_source, source, max_num_hands=1, display=True, warmup_frames=5,
+             warmup_timeout=2.0):
+    """
+    并行完成模型加载和视频源打开 / 预热，返回 (hands, cap, is_live, drawing, report)。
+    drawing 为 load_drawing() 的结果，display 为 False 时为 None。
+    """
+    report = StartupReport()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='camera-open') as pool:
+        capture = pool.submit(
+            report.timed, 'camera', open_and_warm_up, open_source, source, warmup_frames,
+            warmup_timeout)
+        try:
+            hands = report.timed('model', create_hands, max_num_hands)
+            drawing = load_drawing() if display else None
+        except BaseException:
+            # 模型加载失败时仍要释放已打开的摄像头
+            cap, _ = capture.result()
+            cap.release()
+            raise
+        cap, is_live = capture.result()
+    return hands, cap, is_live, drawing, report
@@ -0,0 +1,75 @@
+# test_roi_tracker.py
+#
+# 描述:
+# RoiTracker 的测试，用假的 Hands 代替 MediaPipe（不需要摄像头和模型）。
+# 运行: python -m pytest test_roi_tracker.py
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from roi_tracker import RoiTracker
+
+FRAME_SHAPE = (480, 640, 3)
+CROP_SIZE = 128
+
+
+def _hand(cx, cy, size=0.05):
+    """中心在 (cx, cy)、边长约 size 的一只手（21 个关键点，归一化坐标）。"""
+    offsets = np.linspace(-size / 2, size / 2, 21)
+    return SimpleNamespace(landmark=[SimpleNamespace(x=cx + d, y=cy + d, z=0.0) for d in offsets])
+
+
+def _results(hands):
+    handedness = [SimpleNamespace(classification=[SimpleNamespace(score=0.9)]) for _ in hands]
+    return SimpleNamespace(multi_hand_landmarks=hands or None, multi_handedness=handedness or None)
+
+
+class FakeHands:
+    """
+    按场景返回结果：整帧图像返回场景中所有的手；裁剪图像只返回裁剪区域中央的一只手
+    （模拟只看得到正在跟踪的那只手）。记录收到的每张图像的尺寸。
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.shapes = []
+
+    def process(self, image):
+        self.shapes.append(image.shape)
+        if image.shape == FRAME_SHAPE:
+            return _results([_hand(cx, cy) for cx, cy in self.scene])
+        return _results([_hand(0.5, 0.5, size=0.3)] if self.scene else [])
+
+
+def test_second_hand_found_while_first_is_tracked():
+    scene = [(0.2, 0.3)]
+    hands, crop_hands = FakeHands(scene), FakeHands(scene)
+    tracker = RoiTracker(hands, crop_hands, max_num_hands=2, redetect_interval=3, crop_size=CROP_SIZE)
+    image = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+
+    for _ in range(5):
+        assert len(tracker.process(image).multi_hand_landmarks) == 1
+    assert tracker.roi is not None
+
+    # 第二只手出现在 ROI 之外：最多 redetect_interval 帧后的整帧检测就能找到它
+    scene.append((0.8, 0.7))
+    counts = [len(tracker.process(image).multi_hand_landmarks) for _ in range(4)]
+    assert counts[-1] == 2
+    assert tracker.redetects >= 1
+
+    # 整帧和裁剪推理各用各的 Hands 实例，两种坐标系不会混在一起
+    assert set(hands.shapes) == {FRAME_SHAPE}
+    assert set(crop_hands.shapes) == {(CROP_SIZE, CROP_SIZE, 3)}
+
+
+def test_no_redetect_when_all_hands_tracked():
+    scene = [(0.2, 0.3)]
+    hands, crop_hands = FakeHands(scene), FakeHands(scene)
+    tracker = RoiTracker(hands, crop_hands, max_num_hands=1, redetect_interval=3, crop_size=CROP_SIZE)
+    image = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+
+    for _ in range(10):
+        tracker.process(image)
+    assert tracker.full_frames == 1
+    assert tracker.redetects == 0
@@ -0,0 +1,108 @@
+# benchmark.py
+# 在合成的微信控件树（ui_tree.synthetic_wechat_tree）上测量消息同步路径，不需要 Windows 和微信。
+# 覆盖：完整搜索窗口、完整搜索消息列表、沿缓存路径取消息列表、逐个 / 批量读取消息项的属性、读取最近的消息、
+# 一次完整的 scrape_messages（含会话标题和会话列表）+ ConversationTracker 合并，以及调试接口的控件树遍历。
+# 每项记录单次耗时分布 (p50/p95，微秒) 和跨进程调用次数（FakeTree.round_trips，
+# 对应 UIA 中的 GetChildren 和未缓存的属性读取）。
+#
+# 用法:
+#   python benchmark.py
+#   python benchmark.py --messages 100 1000 5000 --out bench.json
+#   python benchmark.py --tree snapshot.json      # 使用 debug_dump.py --save 保存的真实窗口快照
+
+import argparse
+import json
+import sys
+import time
+
+import ui_tree
+import wechat_ui
+from conversations import ConversationTracker
+
+
+def measure(fn, tree, min_time=0.2, setup=None):
+    """反复调用 fn，返回单次耗时分布（微秒）和平均每次的跨进程调用次数。"""
+    samples = []
+    calls = 0
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(samples) < 5:
+        if setup is not None:
+            setup()
+        before = tree.round_trips
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+        calls += tree.round_trips - before
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[int(len(samples) * 0.95)], 1),
+        "round_trips": round(calls / len(samples), 1),
+    }
+
+
+def bench_tree(tree, min_time, count=10):
+    wechat_ui.set_tree(tree)
+    window = wechat_ui.get_wechat_window()
+    if window is None:
+        raise SystemExit("WeChat window not found in the tree")
+    msg_list = wechat_ui.get_message_list(window)
+    if msg_list is None:
+        raise SystemExit("Message list not found in the tree")
+    tracker = ConversationTracker()
+
+    def clear_caches():
+        wechat_ui.set_tree(tree)
+
+    def scrape_and_merge():
+        result = wechat_ui.scrape_messages(count)
+        tracker.update(result["conversation"], [(m["sender"], m["content"]) for m in result["data"]],
+                       result["sessions"])
+
+    results = {
+        "nodes": tree.count_nodes(),
+        "find_window_uncached": measure(wechat_ui.get_wechat_window, tree, min_time, setup=clear_caches),
+        "find_window_cached": measure(wechat_ui.get_wechat_window, tree, min_time),
+        "find_message_list_uncached": measure(
+            lambda: wechat_ui.get_message_list(window), tree, min_time, setup=clear_caches),
+        "find_message_list_cached": measure(lambda: wechat_ui.get_message_list(window), tree, min_time),
+        "read_children_per_item": measure(
+            lambda: ui_tree.ControlTree.read_children(tree, msg_list, count), tree, min_time),
+        "read_children_bulk": measure(lambda: tree.read_children(msg_list, count), tree, min_time),
+        "read_messages": measure(lambda: wechat_ui.read_messages(msg_list, count), tree, min_time),
+        "scrape_and_merge": measure(scrape_and_merge, tree, min_time),
+        "dump_window_structure": measure(lambda: wechat_ui.dump_window_structure(6, 300), tree, min_time),
+    }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the WeChat sync path on synthetic trees")
+    parser.add_argument('--messages', type=int, nargs='+', default=[100, 1000, 5000],
+                        help="合成窗口消息列表中的消息数，每个取值单独测量")
+    parser.add_argument('--sessions', type=int, default=200, help="合成窗口会话列表中的会话数")
+    parser.add_argument('--tree', default=None, help="改用 JSON 快照（见 debug_dump.py --save）")
+    parser.add_argument('--min-time', type=float, default=0.2, help="每项基准的最短运行时间（秒）")
+    parser.add_argument('--out', default=None, help="结果 JSON 的输出路径（默认只打印）")
+    args = parser.parse_args(argv)
+
+    report = {}
+    if args.tree:
+        report[args.tree] = bench_tree(ui_tree.FakeTree.load(args.tree), args.min_time)
+    else:
+        for messages in args.messages:
+            tree = ui_tree.synthetic_wechat_tree(messages=messages, sessions=args.sessions)
+            report[f"synthetic-{messages}"] = bench_tree(tree, args.min_time)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Results written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
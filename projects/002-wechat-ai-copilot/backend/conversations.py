@@ -0,0 +1,91 @@
+# conversations.py
+# 多会话跟踪：按会话标题分别保存消息记录和游标，并记录会话列表中显示的未读数。
+# 以前后端只有一条消息记录，切换微信中打开的聊天后，新聊天的消息会被当成同一条记录的延续，
+# 前端也只能把所有消息放在当前选中的会话下，切回来时要重新同步。
+# 现在每次抓取带上当前聊天的标题（wechat_ui.get_conversation_title）和会话列表的未读数
+# （wechat_ui.read_sessions），ConversationTracker 把可见消息合并进对应会话的 MessageLog，
+# 其它会话即使没有打开，也能通过未读数知道有新消息。
+# 只依赖 Python 标准库。
+
+from dataclasses import dataclass
+from typing import Optional
+
+from message_log import DEFAULT_CAPACITY, LoggedMessage, MessageLog
+
+
+@dataclass(frozen=True)
+class ConversationState:
+    title: str
+    unread: int = 0  # 会话列表中显示的未读数（当前打开的会话为 0）
+    cursor: int = 0  # 该会话最后一条消息的 seq
+    last_message: Optional[LoggedMessage] = None
+    active: bool = False  # 是否为微信中当前打开的会话
+
+    def to_dict(self):
+        return {"title": self.title, "unread": self.unread, "cursor": self.cursor, "active": self.active,
+                "last_message": self.last_message.to_dict() if self.last_message else None}
+
+
+class ConversationTracker:
+    """
+    每个会话一个 MessageLog。只由抓取线程修改。
+
+        tracker = ConversationTracker(restore=lambda title: store.recent(1000, title))
+        added, changed = tracker.update(title, visible, sessions)
+        tracker.current            # 当前打开的会话标题
+        tracker.states()           # 所有已知会话的 ConversationState
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, restore=None):
+        self.capacity = capacity
+        self.restore = restore
+        self.logs = {}
+        self.current = None
+        # 会话列表中的顺序和未读数：[(title, unread), ...]
+        self.sessions = ()
+
+    def log(self, title):
+        """返回会话的 MessageLog；第一次见到该会话时创建，并用 restore 恢复之前保存的消息。"""
+        log = self.logs.get(title)
+        if log is None:
+            log = MessageLog(self.capacity, title)
+            if self.restore is not None:
+                log.restore(self.restore(title))
+            self.logs[title] = log
+        return log
+
+    def update(self, title, visible, sessions=None, timestamp=None):
+        """
+        合并一次抓取的结果。title 为当前聊天的标题（未识别出时为 None），visible 为可见消息，
+        sessions 为会话列表 [(title, unread), ...]（未读取时为 None，保留上一次的结果）。
+        返回 (新增的消息, 是否有任何变化)。
+        """
+        if title is None:
+            # 标题暂时读取失败时视为仍在原来的会话中
+            title = self.current or ''
+        switched = title != self.current
+        self.current = title
+        added = self.log(title).merge(visible, timestamp)
+        sessions_changed = False
+        if sessions is not None:
+            sessions = tuple((name, 0 if name == title else unread) for name, unread in sessions)
+            sessions_changed = sessions != self.sessions
+            self.sessions = sessions
+        return added, bool(added) or switched or sessions_changed
+
+    def messages(self):
+        """{会话标题: 消息元组}，给不可变快照使用。"""
+        return {title: log.messages for title, log in self.logs.items()}
+
+    def states(self):
+        """按会话列表的顺序返回所有已知会话的状态；列表中没有的已跟踪会话排在后面。"""
+        unread = dict(self.sessions)
+        titles = list(unread) + [title for title in self.logs if title not in unread]
+        states = []
+        for title in titles:
+            log = self.logs.get(title)
+            messages = log.messages if log is not None else ()
+            states.append(ConversationState(
+                title, unread.get(title, 0), messages[-1].seq if messages else 0,
+                messages[-1] if messages else None, title == self.current))
+        return tuple(states)
@@ -1,92 +1,39 @@
+import argparse
 import json
-import comtypes
-import uiautomation as auto
 
+import ui_tree
+import wechat_ui
 
-def has_chinese(s: str) -> bool:
-    if not s:
-        return False
-    for ch in s:
-        if '\u4e00' <= ch <= '\u9fff':
-            return True
-    return False
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dump the WeChat window control tree")
+    parser.add_argument('--tree', default='uia',
+                        help="控件树：uia（默认）、synthetic[:N] 或 JSON 快照路径")
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--max-nodes', type=int, default=400)
+    parser.add_argument('--save', default=None,
+                        help="把整个微信窗口保存为 JSON 快照（不限深度），可用 --tree 或 ui_tree.FakeTree.load 读取")
+    args = parser.parse_args(argv)
 
-def find_wechat_window():
+    tree = ui_tree.create_tree(args.tree)
+    wechat_ui.set_tree(tree)
+    tree.initialize_thread()
     try:
-        w = auto.WindowControl(searchDepth=1, ClassName='WeChatMainWndForPC', Name='微信')
-        if w and w.Exists(0):
-            return w
-    except Exception:
-        pass
-    try:
-        w = auto.WindowControl(searchDepth=1, ClassName='Qt51514QWindowIcon')
-        if w and w.Exists(0):
-            return w
-    except Exception:
-        pass
-    try:
-        root = auto.GetRootControl()
-        for c in root.GetChildren():
-            try:
-                name = getattr(c, 'Name', '') or ''
-                cls = getattr(c, 'ClassName', '') or ''
-                if '微信' in name or 'WeChat' in name or 'Weixin' in name:
-                    return c
-                if 'Qt' in cls and has_chinese(name):
-                    return c
-            except Exception:
-                continue
-    except Exception:
-        pass
-    return None
-
-
-def dump_tree(win, depth=5, max_nodes=400):
-    nodes = []
-    count = 0
-
-    def _dump(node, cur_depth):
-        nonlocal count
-        if count >= max_nodes:
-            return
-        try:
-            info = {
-                'depth': cur_depth,
-                'Name': getattr(node, 'Name', None),
-                'ClassName': getattr(node, 'ClassName', None),
-                'ControlType': getattr(node, 'ControlType', None),
-                'AutomationId': getattr(node, 'AutomationId', None)
-            }
-            nodes.append(info)
-            count += 1
-        except Exception:
-            pass
-        if cur_depth <= 0 or count >= max_nodes:
+        w = wechat_ui.get_wechat_window()
+        if w is None or not tree.exists(w):
+            print(json.dumps({'status': 'error', 'message': 'WeChat not found'}, ensure_ascii=False))
             return
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                json.dump(ui_tree.capture(tree, w), f, ensure_ascii=False)
+        nodes = ui_tree.dump_tree(tree, w, depth=args.depth, max_nodes=args.max_nodes)
+        print(json.dumps({'status': 'success', 'count': len(nodes), 'nodes': nodes}, ensure_ascii=False))
+    finally:
         try:
-            for ch in node.GetChildren():
-                _dump(ch, cur_depth - 1)
-                if count >= max_nodes:
-                    break
+            tree.uninitialize_thread()
         except Exception:
             pass
 
-    _dump(win, depth)
-    return nodes
-
 
 if __name__ == '__main__':
-    comtypes.CoInitialize()
-    try:
-        w = find_wechat_window()
-        if not w or not w.Exists(0):
-            print(json.dumps({'status': 'error', 'message': 'WeChat not found'} , ensure_ascii=False))
-        else:
-            nodes = dump_tree(w, depth=5, max_nodes=400)
-            print(json.dumps({'status': 'success', 'count': len(nodes), 'nodes': nodes}, ensure_ascii=False))
-    finally:
-        try:
-            comtypes.CoUninitialize()
-        except Exception:
-            pass
+    main()
@@ -0,0 +1,278 @@
+# history.py
+# 消息历史的本地持久化：把抓取线程看到的每条消息写进 SQLite，提供分页的历史查询和全文搜索。
+#
+# - WAL 模式：写入不阻塞读取，/api/history、/api/search 可以和写入同时进行；
+# - 写入由单独的 HistoryWriter 线程批量完成：抓取线程只把最新快照放进队列（不做任何 I/O），
+#   写线程按游标取出新消息，每批在一个事务里 executemany；
+# - 以 MessageLog 的稳定消息 ID 去重（INSERT OR IGNORE），重复提交不会产生重复记录；
+# - 全文索引使用 FTS5 的 trigram 分词（中文没有空格分词，trigram 支持任意子串匹配）；
+#   trigram 匹配不了两个字的关键词（价格、报错 这类中文搜索词最常见），另建一个二元组索引：
+#   内容预先切成以空格分隔的相邻两字（bigrams()），用 unicode61 分词，两字关键词作为一个词查询；
+#   只有单个字符的关键词退回到 LIKE 查询；
+# - 分页使用 rowid 游标（before），而不是 OFFSET，数据量达到数百万行时翻页仍然只读取一页的数据。
+# - 每条消息记录所属的会话（conversation 列），历史和搜索可以按会话过滤；旧版本的数据库启动时自动加列。
+# 启动时用 recent() 读取各会话最近的消息恢复 MessageLog（见 MessageLog.restore），重启后序号和 ID 继续递增。
+# 只依赖 Python 标准库。
+
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+
+from message_log import LoggedMessage, messages_since
+
+DEFAULT_PATH = "wechat_history.db"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# 写线程每批最多等待的秒数（期间到达的快照合并成一批写入）
+FLUSH_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    seq INTEGER NOT NULL,
+    sender TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    conversation TEXT NOT NULL DEFAULT ''
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+END;
+"""
+
+# 二元组索引：不保存原文（content=''），触发器通过连接上注册的 bigrams() 函数生成索引内容
+BIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_bigram USING fts5(
+    bigrams, content='', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS messages_bigram_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_bigram(rowid, bigrams) VALUES (new.rowid, bigrams(new.content));
+END;
+CREATE TRIGGER IF NOT EXISTS messages_bigram_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_bigram(messages_bigram, rowid, bigrams) VALUES ('delete', old.rowid, bigrams(old.content));
+END;
+"""
+
+# 按会话分页使用的索引；放在迁移之后创建，旧数据库此时才有 conversation 列
+INDEXES = """
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages (conversation, rowid);
+"""
+
+_COLUMNS = "m.rowid, m.id, m.seq, m.sender, m.content, m.timestamp, m.conversation"
+# rowid 游标的初始值（第一页）
+_NO_BEFORE = 2 ** 63 - 1
+
+
+def _row_to_dict(row):
+    rowid, message_id, seq, sender, content, timestamp, conversation = row
+    return {"id": message_id, "seq": seq, "sender": sender, "content": content,
+            "time": time.strftime("%H:%M", time.localtime(timestamp)), "timestamp": timestamp,
+            "conversation": conversation, "rowid": rowid}
+
+
+def bigrams(text):
+    """相邻两个字符组成的词，以空格分隔：'价格表' -> '价格 格表'。"""
+    return " ".join(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def _conversation_filter(conversation):
+    # 返回追加到 WHERE 中的条件和参数；conversation 为 None 时不过滤
+    if conversation is None:
+        return "", ()
+    return " AND m.conversation = ?", (conversation,)
+
+
+def _page(rows, limit):
+    # 多取一行判断是否还有下一页；next_before 传给下一次请求的 before
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {"status": "success",
+            "data": [_row_to_dict(row) for row in rows],
+            "next_before": rows[-1][0] if has_more else None}
+
+
+class MessageStore:
+    """
+    SQLite 消息库。每个线程使用自己的连接（sqlite3 连接不能跨线程共享）。
+
+        store = MessageStore("wechat_history.db")
+        store.add(messages)                 # LoggedMessage 列表，一个事务，按 ID 去重
+        store.history(before=None, limit=50, conversation=None)   # conversation 为 None 时为所有会话
+        store.search("价格", before=None, limit=50, conversation=None)
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(messages)")]
+        if "conversation" not in columns:
+            # 旧版本没有会话列，已有的消息归入空标题的会话
+            conn.execute("ALTER TABLE messages ADD COLUMN conversation TEXT NOT NULL DEFAULT ''")
+        conn.executescript(INDEXES)
+        has_bigrams = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'messages_bigram'").fetchone() is not None
+        with conn:
+            conn.executescript(BIGRAM_SCHEMA)
+            if not has_bigrams:
+                # 旧版本的数据库：为已有的消息补建二元组索引
+                conn.execute("INSERT INTO messages_bigram(rowid, bigrams) "
+                             "SELECT rowid, bigrams(content) FROM messages")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            # WAL 下 NORMAL 已能保证数据库不损坏，只在断电时可能丢失最后几次提交
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # 二元组索引的触发器要用到，每个连接都要注册
+            conn.create_function("bigrams", 1, bigrams, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def add(self, messages):
+        """在一个事务中写入一批消息，已存在的 ID 忽略。返回实际新增的条数。"""
+        conn = self._connection()
+        with conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO messages (id, seq, sender, content, timestamp, conversation) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(m.id, m.seq, m.sender, m.content, m.timestamp, m.conversation) for m in messages])
+            return cursor.rowcount
+
+    def count(self):
+        return self._connection().execute("SELECT count(*) FROM messages").fetchone()[0]
+
+    def recent(self, limit, conversation=None):
+        """某个会话最近的 limit 条消息（按序号从旧到新），用于恢复该会话的 MessageLog。"""
+        where, params = _conversation_filter(conversation)
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM messages m WHERE 1{where} ORDER BY m.rowid DESC LIMIT ?",
+            params + (limit,)).fetchall()
+        return [LoggedMessage(message_id, seq, sender, content, timestamp, conversation)
+                for _, message_id, seq, sender, content, timestamp, conversation in reversed(rows)]
+
+    def history(self, before=None, limit=DEFAULT_PAGE_SIZE, conversation=None):
+        """从新到旧分页读取历史消息；before 为上一页返回的 next_before，conversation 只读取该会话。"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where, params = _conversation_filter(conversation)
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM messages m WHERE m.rowid < ?{where} ORDER BY m.rowid DESC LIMIT ?",
+            (before if before is not None else _NO_BEFORE,) + params + (limit + 1,)).fetchall()
+        return _page(rows, limit)
+
+    def search(self, query, before=None, limit=DEFAULT_PAGE_SIZE, conversation=None):
+        """全文搜索消息内容（子串匹配），从新到旧分页；conversation 只搜索该会话。"""
+        query = query.strip()
+        if not query:
+            return {"status": "success", "data": [], "next_before": None}
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        before = before if before is not None else _NO_BEFORE
+        where, params = _conversation_filter(conversation)
+        if len(query) >= 3:
+            # 整个关键词作为一个短语，避免用户输入被解析成 FTS5 查询语法
+            phrase = '"' + query.replace('"', '""') + '"'
+            rows = self._connection().execute(
+                f"SELECT {_COLUMNS} FROM messages_fts f JOIN messages m ON m.rowid = f.rowid "
+                f"WHERE messages_fts MATCH ? AND f.rowid < ?{where} ORDER BY f.rowid DESC LIMIT ?",
+                (phrase, before) + params + (limit + 1,)).fetchall()
+        elif len(query) == 2 and query.isalnum():
+            # trigram 索引无法匹配两个字的关键词，改查二元组索引（关键词本身就是一个二元组）
+            rows = self._connection().execute(
+                f"SELECT {_COLUMNS} FROM messages_bigram f JOIN messages m ON m.rowid = f.rowid "
+                f"WHERE messages_bigram MATCH ? AND f.rowid < ?{where} ORDER BY f.rowid DESC LIMIT ?",
+                ('"' + query + '"', before) + params + (limit + 1,)).fetchall()
+        else:
+            # 单个字符（或含标点、不会被分成一个词的两个字符）无法走索引，按 rowid 倒序扫描
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self._connection().execute(
+                f"SELECT {_COLUMNS} FROM messages m WHERE m.rowid < ? AND m.content LIKE ? ESCAPE '\\'{where} "
+                "ORDER BY m.rowid DESC LIMIT ?",
+                (before, pattern) + params + (limit + 1,)).fetchall()
+        return _page(rows, limit)
+
+
+class HistoryWriter(threading.Thread):
+    """
+    后台写入线程。publish(snapshot) 可直接注册为 ScrapeWorker 的监听器：
+    只把快照放进队列立即返回，抓取线程不会因为磁盘 I/O 或数据库锁而变慢。
+    写线程按会话记录已写入的序号，每批把两次写入之间各会话新增的消息一次写入。
+    """
+
+    def __init__(self, store, flush_interval=FLUSH_INTERVAL):
+        super().__init__(name="history-writer", daemon=True)
+        self.store = store
+        self.flush_interval = flush_interval
+        self._snapshots = queue.Queue()
+        # {会话标题: 已写入的最后一条消息的 seq}
+        self.written_cursors = {}
+        self.written = 0
+        self.last_error = None
+
+    def publish(self, snapshot):
+        self._snapshots.put(snapshot)
+
+    def stop(self, timeout=5.0):
+        self._snapshots.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        try:
+            while True:
+                snapshot = self._snapshots.get()
+                stopping = snapshot is None
+                # 等待一小段时间，把这期间到达的快照合并，只写最新的一个
+                deadline = time.monotonic() + self.flush_interval
+                while not stopping:
+                    try:
+                        newer = self._snapshots.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if newer is None:
+                        stopping = True
+                    else:
+                        snapshot = newer
+                if snapshot is not None:
+                    self._write(snapshot)
+                if stopping:
+                    break
+        finally:
+            self.store.close()
+
+    def _write(self, snapshot):
+        messages = []
+        cursors = {}
+        for title, log in snapshot.logs.items():
+            cursor = self.written_cursors.get(title)
+            # 第一次写入某个会话：快照中保留的全部消息（已存在的按 ID 忽略）
+            new = log if cursor is None else messages_since(log, cursor)
+            if new:
+                messages.extend(new)
+                cursors[title] = new[-1].seq
+        if not messages:
+            return
+        try:
+            self.written += self.store.add(messages)
+            self.written_cursors.update(cursors)
+        except sqlite3.Error as e:
+            # 写入失败时保留游标，下一批重试
+            self.last_error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
@@ -0,0 +1,120 @@
+# message_log.py
+# 把每次抓取到的“最近 N 条消息”合并成一条连续的消息记录，并给每条消息分配稳定的 ID 和游标。
+#
+# UI Automation 只能看到消息列表里当前可见的最后几条，而且同样的内容（例如连续两条“好的”）可能出现多次，
+# 因此不能靠内容或在可见列表中的下标来识别消息。这里把新抓到的列表与已有记录的末尾对齐：
+# 已有记录的最长后缀与新列表的前缀相同时，新列表剩下的部分才是新消息。
+# 每条新消息得到递增的序号 seq（即在记录中的位置），ID 为 (会话, sender, content, seq) 的哈希，
+# 同一条消息在之后的抓取中保持同一个 ID；time 为抓取线程第一次看到它的时间，而不是请求时间。
+# 每个会话各有一个 MessageLog（见 conversations.ConversationTracker），序号在会话内递增。
+# 只依赖 Python 标准库。
+
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Tuple
+
+# 内存中保留的消息条数
+DEFAULT_CAPACITY = 1000
+# 新列表与记录末尾对不上时，在记录最近这么多条中查找，判断是否只是向上滚动查看了旧消息
+SCROLLBACK_SEARCH = 200
+
+
+@dataclass(frozen=True)
+class LoggedMessage:
+    id: str
+    seq: int
+    sender: str
+    content: str
+    timestamp: float  # 第一次被抓取到的时间（epoch 秒）
+    conversation: str = ''  # 会话标题；未识别出标题时为空
+
+    @property
+    def time(self):
+        return time.strftime("%H:%M", time.localtime(self.timestamp))
+
+    def key(self):
+        return self.sender, self.content
+
+    def to_dict(self):
+        return {"id": self.id, "seq": self.seq, "sender": self.sender, "content": self.content,
+                "time": self.time, "timestamp": self.timestamp, "conversation": self.conversation}
+
+
+def message_id(sender, content, seq, conversation=''):
+    """由会话、发送方、内容和在记录中的位置得到稳定的消息 ID。"""
+    key = f"{sender}\x1f{content}\x1f{seq}"
+    if conversation:
+        key = f"{conversation}\x1f{key}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def messages_since(messages, cursor):
+    """messages 中 seq > cursor 的消息（按顺序）。"""
+    if not messages or cursor >= messages[-1].seq:
+        return ()
+    # seq 连续递增，可以直接算出起始位置
+    return messages[max(0, cursor + 1 - messages[0].seq):]
+
+
+class MessageLog:
+    """
+    由连续的抓取结果维护的消息记录。只由抓取线程修改；messages 每次合并后整体替换为新的元组，
+    其它线程读到的总是完整的一份。
+
+        log = MessageLog()
+        new = log.merge([("them", "你好"), ("me", "在的")])   # 返回新增的 LoggedMessage
+        messages_since(log.messages, cursor)                   # seq > cursor 的消息
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, conversation=''):
+        self.capacity = capacity
+        self.conversation = conversation
+        self.messages: Tuple[LoggedMessage, ...] = ()
+        self.next_seq = 1
+
+    def restore(self, messages):
+        """用之前保存的消息（按序号从旧到新，例如 history.MessageStore.recent()）恢复记录，序号从其后继续。"""
+        self.messages = tuple(messages)[-self.capacity:]
+        if self.messages:
+            self.next_seq = max(self.next_seq, self.messages[-1].seq + 1)
+
+    @property
+    def cursor(self):
+        """最后一条消息的 seq；没有消息时为 0。"""
+        return self.next_seq - 1
+
+    def _overlap(self, keys):
+        # 记录末尾与新列表开头重合的最大长度
+        known = [m.key() for m in self.messages[-len(keys):]] if keys else []
+        for k in range(min(len(keys), len(known)), 0, -1):
+            if known[-k:] == keys[:k]:
+                return k
+        return 0
+
+    def _seen_before(self, keys):
+        # 新列表整体出现在最近的记录中：用户向上滚动查看了旧消息，没有新消息
+        recent = [m.key() for m in self.messages[-SCROLLBACK_SEARCH:]]
+        n = len(keys)
+        return any(recent[i:i + n] == keys for i in range(len(recent) - n + 1))
+
+    def merge(self, visible, timestamp=None):
+        """
+        合并一次抓取到的可见消息 [(sender, content), ...]（按显示顺序），返回新增的消息元组。
+        """
+        keys = [(sender, content) for sender, content in visible]
+        if not keys:
+            return ()
+        overlap = self._overlap(keys)
+        if overlap == 0 and self.messages and self._seen_before(keys):
+            return ()
+        timestamp = time.time() if timestamp is None else timestamp
+        added = []
+        for sender, content in keys[overlap:]:
+            seq = self.next_seq
+            self.next_seq += 1
+            added.append(LoggedMessage(message_id(sender, content, seq, self.conversation), seq, sender,
+                                       content, timestamp, self.conversation))
+        if added:
+            self.messages = (self.messages + tuple(added))[-self.capacity:]
+        return tuple(added)
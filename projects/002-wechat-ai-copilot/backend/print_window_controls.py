@@ -1,36 +1,37 @@
-import uiautomation as auto
 import sys
 
-def print_control_tree(control, depth=0):
+import ui_tree
+
+def print_control_tree(tree, control, depth=0):
     """
     Recursively prints the control's properties and its children.
     """
     indent = "  " * depth
     try:
-        control_type = control.ControlTypeName
+        control_type = tree.control_type(control)
     except:
         control_type = "UnknownType"
         
     try:
-        control_name = control.Name
+        control_name = tree.name(control)
     except:
         control_name = "UnknownName"
 
     try:
-        control_classname = control.ClassName
+        control_classname = tree.class_name(control)
     except:
         control_classname = "UnknownClassName"
         
     print(f"{indent}Name: '{control_name}', ClassName: '{control_classname}', ControlType: '{control_type}'")
     
     try:
-        for child in control.GetChildren():
-            print_control_tree(child, depth + 1)
+        for child in tree.children(control):
+            print_control_tree(tree, child, depth + 1)
     except:
         # Some controls may not support GetChildren or have other issues
         pass
 
-def inspect_wechat_window_deep():
+def inspect_wechat_window_deep(tree):
     """
     Finds the WeChat window and lists all its descendant controls.
     """
@@ -38,15 +39,16 @@ def inspect_wechat_window_deep():
     sys.stdout.reconfigure(encoding='utf-8')
 
     print("Searching for WeChat window...")
-    window = auto.WindowControl(searchDepth=1, ClassName='WeChatMainWndForPC')
+    window = tree.find_window(class_name='WeChatMainWndForPC', timeout=5) # Wait up to 5 seconds
 
-    if not window.Exists(5): # Wait up to 5 seconds
+    if window is None:
         print("WeChat window not found. Please make sure WeChat is running.")
         return
 
     print("\n--- WeChat Window Found ---")
-    print_control_tree(window)
+    print_control_tree(tree, window)
     print("\n--- Inspection Complete ---")
 
 if __name__ == "__main__":
-    inspect_wechat_window_deep()
+    # 可选参数：控件树（uia、synthetic[:N] 或 JSON 快照路径，见 ui_tree.create_tree）
+    inspect_wechat_window_deep(ui_tree.create_tree(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,128 @@
+# push.py
+# 用 Server-Sent Events 把消息增量和状态变化推送给前端，替代每 2 秒一次的 /api/sync_messages 轮询。
+#
+# 抓取仍然只在 ScrapeWorker 线程中进行一次；快照的 version 变化时（有新消息或状态变化），
+# 抓取线程通过 SnapshotBroadcaster.publish() 唤醒事件循环中所有等待的订阅者。
+# 每个订阅者为每个会话各自记录游标，从最新快照中取出游标之后的消息发送，
+# 因此处理得慢的连接只会把几次变化合并成一个事件，不会丢消息，也不会拖慢抓取线程或其它订阅者；
+# 微信中切换聊天后再切回来，也只会收到切走之后的新消息。
+#
+# 事件格式（event: sync）与 /api/sync_messages 的响应相同，事件 id 为 "cursor:会话标题"（见 event_id），
+# 浏览器 EventSource 断线重连时会通过 Last-Event-ID 头带回，服务端据此只补发之后的消息。
+
+import asyncio
+import json
+import threading
+from urllib.parse import quote, unquote
+
+# 没有变化时每隔这么多秒发送一次注释行，防止代理或浏览器认为连接已空闲
+KEEPALIVE_SECONDS = 15.0
+# 断线后浏览器重连前等待的毫秒数
+RETRY_MS = 2000
+
+
+class SnapshotBroadcaster:
+    """
+    把抓取线程中的快照变化通知给事件循环中的多个订阅者。
+
+        broadcaster = SnapshotBroadcaster()
+        broadcaster.bind(asyncio.get_running_loop())   # 在事件循环中调用一次
+        worker.add_listener(broadcaster.publish)        # 抓取线程在 version 变化时调用
+        await broadcaster.wait(timeout)                 # 订阅者等待下一次变化
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._waiters = set()
+        self._lock = threading.Lock()
+        self.subscribers = 0  # 当前连接中的订阅者数，只在事件循环中修改
+
+    def bind(self, loop):
+        with self._lock:
+            self._loop = loop
+
+    def publish(self, snapshot=None):
+        """可在任意线程调用：唤醒所有等待中的订阅者。"""
+        with self._lock:
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        waiters, self._waiters = self._waiters, set()
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    async def wait(self, timeout=None):
+        """等待下一次 publish()；超时返回 False。"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.add(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(future)
+
+
+def format_event(data, event=None, event_id=None, retry=None):
+    """按 text/event-stream 格式编码一个事件。"""
+    lines = []
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if event:
+        lines.append(f"event: {event}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False))
+    return "\n".join(lines) + "\n\n"
+
+
+def event_id(cursor, conversation):
+    """事件 id：游标和它所属的会话。标题做百分号编码，Last-Event-ID 头中只能可靠地传递 ASCII。"""
+    return f"{cursor}:{quote(conversation)}"
+
+
+def parse_event_id(value):
+    """解析 Last-Event-ID，返回 (cursor, 会话标题)；无法识别时返回 (None, None)。
+    旧格式（只有 cursor）的会话标题为 None，表示连接时打开的会话。"""
+    if not value:
+        return None, None
+    cursor, sep, conversation = value.partition(':')
+    if not cursor.isdigit():
+        return None, None
+    return int(cursor), unquote(conversation) if sep else None
+
+
+async def snapshot_events(get_snapshot, broadcaster, since=None, conversation=None, since_conversation=None,
+                          keepalive=KEEPALIVE_SECONDS):
+    """
+    订阅者的事件流：先发送一次当前状态，之后每当快照 version 变化时发送新消息。
+    get_snapshot 返回最新的 MessageSnapshot。
+    conversation 为 None 时跟随微信中当前打开的会话，否则只推送该会话；
+    since 为 since_conversation（默认为连接时推送的会话）的游标。
+    """
+    version = None
+    retry = RETRY_MS  # 只在第一个事件中告诉浏览器重连间隔
+    cursors = {}  # {会话标题: 已发送的游标}；没有记录的会话第一次推送最近的消息
+    broadcaster.subscribers += 1
+    try:
+        while True:
+            snapshot = get_snapshot()
+            if snapshot.version != version:
+                version = snapshot.version
+                title = snapshot.conversation if conversation is None else conversation
+                if since is not None:
+                    cursors[title if since_conversation is None else since_conversation] = since
+                    since = None
+                response = snapshot.to_response(cursors.get(title), title)
+                cursors[title] = response["cursor"]
+                yield format_event(response, event="sync", event_id=event_id(response["cursor"], title),
+                                   retry=retry)
+                retry = None
+            elif not await broadcaster.wait(keepalive):
+                yield ": keepalive\n\n"
+    finally:
+        broadcaster.subscribers -= 1
@@ -0,0 +1,211 @@
+# scraper.py
+# 后台抓取线程：唯一一个调用 UI Automation 的线程。
+# 以前每个 /api/sync_messages 请求都在 FastAPI 线程池中 CoInitialize、遍历控件树、CoUninitialize，
+# 前端每 2 秒轮询一次，多个页面同时打开时抓取次数成倍增加，并且多个线程同时操作 UIA。
+# 现在由 ScrapeWorker 在自己的线程里初始化一次 COM，按固定间隔抓取，
+# 把结果发布为不可变的 MessageSnapshot；请求只读取内存中的最新快照。
+# 调试接口等其它需要 UIA 的操作通过 ScrapeWorker.call() 提交到同一线程执行。
+# 每次抓取到的可见消息合并进 MessageLog（见 message_log.py），快照中带有稳定的消息 ID 和游标。
+# 消息按微信中当前打开的聊天分开记录（见 conversations.py），每个会话有自己的游标。
+
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+import wechat_ui
+from conversations import ConversationState, ConversationTracker
+from message_log import LoggedMessage, messages_since
+
+# 不带 since 的请求返回最近这么多条消息（与原来的接口一致）
+DEFAULT_RECENT = 10
+
+
+@dataclass(frozen=True)
+class MessageSnapshot:
+    """
+    一次抓取的结果。frozen + tuple，发布后不会被修改，可被任意线程同时读取。
+
+    conversation 为微信中当前打开的聊天，data 为该会话 MessageLog 中保留的全部消息，cursor 为其最后一条消息的 seq；
+    logs 为所有已跟踪会话的消息（{标题: 消息元组}），conversations 为会话列表的状态（含未读数）。
+    version 只在有新消息或状态变化时递增，updated_at 为最近一次抓取完成的时间。
+    """
+    status: str
+    data: Tuple[LoggedMessage, ...] = ()
+    message: Optional[str] = None
+    version: int = 0
+    updated_at: float = 0.0
+    cursor: int = 0
+    conversation: str = ''
+    conversations: Tuple[ConversationState, ...] = ()
+    logs: Mapping[str, Tuple[LoggedMessage, ...]] = field(default_factory=lambda: MappingProxyType({}))
+
+    def conversation_messages(self, conversation=None):
+        """某个会话的消息；conversation 为 None 时为当前打开的会话。"""
+        if conversation is None or conversation == self.conversation:
+            return self.data
+        return self.logs.get(conversation, ())
+
+    def messages_since(self, since, conversation=None):
+        """seq > since 的消息；since 为 None 时返回最近 DEFAULT_RECENT 条。"""
+        data = self.conversation_messages(conversation)
+        if since is None:
+            return data[-DEFAULT_RECENT:]
+        return messages_since(data, since)
+
+    def to_response(self, since=None, conversation=None):
+        """
+        since 为客户端上次拿到的 cursor：只返回之后的新消息。
+        since 早于内存中保留的最早消息时 truncated 为 True，客户端应当丢弃本地列表重新同步。
+        conversation 指定会话（默认当前打开的会话），每个会话的 cursor 各自独立。
+        """
+        title = self.conversation if conversation is None else conversation
+        data = self.conversation_messages(title)
+        cursor = data[-1].seq if data else 0
+        if self.status != "success":
+            return {"status": self.status, "message": self.message, "cursor": cursor, "conversation": title}
+        truncated = since is not None and bool(data) and since + 1 < data[0].seq
+        return {"status": "success",
+                "cursor": cursor,
+                "truncated": truncated,
+                "conversation": title,
+                "active": self.conversation,
+                "conversations": [state.to_dict() for state in self.conversations],
+                "data": [m.to_dict() for m in self.messages_since(since, title)]}
+
+
+EMPTY_SNAPSHOT = MessageSnapshot(status="error", message="Scraper not started yet")
+
+
+class ScrapeWorker(threading.Thread):
+    """
+    后台抓取线程。
+
+        worker = ScrapeWorker(interval=1.0, restore=lambda title: store.recent(1000, title))
+        worker.start()
+        worker.snapshot        # 最新的 MessageSnapshot
+        worker.call(fn, ...)   # 在抓取线程中执行 fn 并返回结果
+        worker.add_listener(fn)  # 快照 version 变化时在抓取线程中调用 fn(snapshot)
+        worker.stop()
+    """
+
+    def __init__(self, interval=1.0, count=10, scrape=None, restore=None):
+        super().__init__(name="wechat-scraper", daemon=True)
+        self.interval = interval
+        self.count = count
+        self._scrape = scrape or wechat_ui.scrape_messages
+        self._tasks = queue.Queue()
+        self._stopping = threading.Event()
+        self.tracker = ConversationTracker(restore=restore)
+        self._listeners = []
+        self.snapshot = EMPTY_SNAPSHOT
+        self.scrape_count = 0
+        self.last_scrape_seconds = 0.0
+
+    def run(self):
+        tree = wechat_ui.get_tree()
+        tree.initialize_thread()
+        try:
+            while not self._stopping.is_set():
+                deadline = time.monotonic() + self.interval
+                self._scrape_once()
+                # 等待下一次抓取期间处理提交过来的任务
+                while not self._stopping.is_set():
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        task = self._tasks.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if task is not None:
+                        self._run_task(*task)
+        finally:
+            # 线程退出时仍在排队的任务直接失败，避免调用方一直等待
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None:
+                    task[0].set_exception(RuntimeError("Scraper stopped"))
+            try:
+                tree.uninitialize_thread()
+            except Exception:
+                pass
+
+    def _scrape_once(self):
+        start = time.perf_counter()
+        try:
+            result = self._scrape(self.count)
+        except Exception as e:
+            result = {"status": "error", "message": f"Scrape failed: {e}"}
+        if result["status"] != "success":
+            # 微信窗口被关闭重开后缓存的句柄会失效：丢弃它，下一次抓取重新完整搜索窗口
+            wechat_ui.invalidate_wechat_window()
+        self.last_scrape_seconds = time.perf_counter() - start
+        self.scrape_count += 1
+        self._publish(result)
+
+    def _publish(self, result):
+        previous = self.snapshot
+        status = result["status"]
+        message = result.get("message")
+        tracker = self.tracker
+        changed = (status, message) != (previous.status, previous.message)
+        if status == "success":
+            _, merged = tracker.update(result.get("conversation"),
+                                       [(m["sender"], m["content"]) for m in result.get("data", ())],
+                                       result.get("sessions"))
+            changed = changed or merged
+        if changed:
+            conversations = tracker.states()
+            logs = MappingProxyType(tracker.messages())
+        else:
+            # 没有变化时沿用上一个快照的会话状态，不重新构建
+            conversations, logs = previous.conversations, previous.logs
+        current = tracker.current or ''
+        log = tracker.logs.get(current)
+        # 整体替换引用，读取方拿到的总是一个完整的快照
+        self.snapshot = MessageSnapshot(
+            status=status, data=log.messages if log else (), message=message,
+            version=previous.version + 1 if changed else previous.version,
+            updated_at=time.time(), cursor=log.cursor if log else 0,
+            conversation=current, conversations=conversations, logs=logs)
+        if changed:
+            for listener in self._listeners:
+                try:
+                    listener(self.snapshot)
+                except Exception:
+                    traceback.print_exc()
+
+    def add_listener(self, fn):
+        """注册快照变化的回调。回调在抓取线程中执行，应当立即返回（例如只唤醒其它线程）。"""
+        self._listeners.append(fn)
+
+    @staticmethod
+    def _run_task(future, fn, args, kwargs):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def call(self, fn, *args, timeout=10.0, **kwargs):
+        """在抓取线程中执行 fn(*args, **kwargs)，等待并返回结果（超时抛出 TimeoutError）。"""
+        if not self.is_alive():
+            raise RuntimeError("Scraper is not running")
+        future = Future()
+        self._tasks.put((future, fn, args, kwargs))
+        return future.result(timeout)
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        self._tasks.put(None)  # 唤醒等待中的线程
+        if self.is_alive():
+            self.join(timeout)
@@ -1,13 +1,50 @@
-import uiautomation as auto
-import comtypes
-import time
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
-from typing import List
+from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+import ui_tree
+import wechat_ui
+from history import DEFAULT_PAGE_SIZE, HistoryWriter, MessageStore
+from push import SnapshotBroadcaster, parse_event_id, snapshot_events
+from scraper import ScrapeWorker
+
+# 控件树实现：默认 "uia"；设为 "synthetic[:N]" 或 JSON 快照路径时不依赖 Windows（见 ui_tree.create_tree）
+if os.environ.get("WECHAT_UI_TREE"):
+    wechat_ui.set_tree(ui_tree.create_tree(os.environ["WECHAT_UI_TREE"]))
+
+# 所有 UI Automation 操作都在这一个后台线程中执行（见 scraper.py）
+SCRAPE_INTERVAL = 1.0
+# 所有看到过的消息写入本地 SQLite（见 history.py），写入在单独的线程中进行，不影响抓取
+store = MessageStore(os.environ.get("WECHAT_HISTORY_DB", "wechat_history.db"))
+# 第一次见到某个会话时从数据库恢复它最近的消息，重启后序号和 ID 继续递增
+worker = ScrapeWorker(interval=SCRAPE_INTERVAL,
+                      restore=lambda title: store.recent(worker.tracker.capacity, title))
+# 快照变化时唤醒所有 /api/events 订阅者（见 push.py）
+broadcaster = SnapshotBroadcaster()
+worker.add_listener(broadcaster.publish)
+history_writer = HistoryWriter(store)
+worker.add_listener(history_writer.publish)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    broadcaster.bind(asyncio.get_running_loop())
+    history_writer.start()
+    worker.start()
+    try:
+        yield
+    finally:
+        worker.stop()
+        history_writer.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS for the frontend to connect
 app.add_middleware(
@@ -26,139 +63,74 @@ class ChatMessage(BaseModel):
 class AnalyzeRequest(BaseModel):
     content: str
 
-def get_wechat_window():
-    # 更鲁棒地查找微信主窗口：尝试多种策略
-    def _has_chinese(s: str) -> bool:
-        if not s:
-            return False
-        for ch in s:
-            if '\u4e00' <= ch <= '\u9fff':
-                return True
-        return False
-
-    # 1) 精确匹配 Windows 版微信常见类名
-    try:
-        w = auto.WindowControl(searchDepth=1, ClassName='WeChatMainWndForPC', Name='微信')
-        if w and w.Exists(0):
-            return w
-    except Exception:
-        pass
-
-    # 2) 有些微信客户端（Qt 版本）使用 Qt 类名，试试已知的 Qt 类名
-    try:
-        w = auto.WindowControl(searchDepth=1, ClassName='Qt51514QWindowIcon')
-        if w and w.Exists(0):
-            return w
-    except Exception:
-        pass
-
-    # 3) 遍历根窗口，匹配标题或类名的多种可能性
-    try:
-        root = auto.GetRootControl()
-        for c in root.GetChildren():
-            try:
-                name = getattr(c, 'Name', '') or ''
-                cls = getattr(c, 'ClassName', '') or ''
-                # 精确或部分匹配中文名称/英文名称
-                if '微信' in name or 'WeChat' in name or 'Weixin' in name:
-                    return c
-                # 如果类名包含 Qt 且标题含中文字符，也很可能是微信
-                if 'Qt' in cls and _has_chinese(name):
-                    return c
-            except Exception:
-                continue
-    except Exception:
-        pass
 
-    # 4) 最后尝试一些通配的 Qt 类名
+def _call_on_worker(fn, *args):
     try:
-        for cls_name in ('Qt51514QWindowIcon', 'Qt5QWindowIcon'):
-            try:
-                w = auto.WindowControl(searchDepth=1, ClassName=cls_name)
-                if w and w.Exists(0):
-                    return w
-            except Exception:
-                continue
-    except Exception:
-        pass
-
-    return None
+        return worker.call(fn, *args)
+    except Exception as e:
+        return {"status": "error", "message": f"{type(e).__name__}: {e}"}
 
 @app.get("/api/sync_messages")
-def sync_messages():
-    # Ensure COM is initialized in this worker thread (FastAPI runs sync endpoints in a threadpool)
-    # Without this, comtypes.CoCreateInstance may raise "尚未调用 CoInitialize" (CoInitialize not called).
-    comtypes.CoInitialize()
-    try:
-        window = get_wechat_window()
-        if not window or not window.Exists(0):
-            return {"status": "error", "message": "WeChat not found"}
-        
-        # Find all list controls by traversing children and filtering ControlType.
-        # Matching by Name='消息' can be unreliable due to encoding, so we search by control type.
-        def find_controls_by_type(root_control, ctrl_type, max_depth=6):
-            found = []
-            def _dfs(node, depth):
-                if depth < 0:
-                    return
-                try:
-                    if getattr(node, 'ControlType', None) == ctrl_type:
-                        found.append(node)
-                except Exception:
-                    pass
-                try:
-                    for ch in node.GetChildren():
-                        _dfs(ch, depth - 1)
-                except Exception:
-                    pass
-            _dfs(root_control, max_depth)
-            return found
+def sync_messages(since: Optional[int] = None, conversation: Optional[str] = None):
+    """
+    直接返回后台抓取线程发布的最新快照，不在请求线程中访问 UI Automation。
 
-        msg_lists = find_controls_by_type(window, auto.ControlType.ListControl, max_depth=15)
+    参数:
+      since: 上次响应中该会话的 cursor，只返回之后的新消息；不传时返回最近 10 条
+      conversation: 会话标题；不传时为微信中当前打开的会话
+    """
+    return worker.snapshot.to_response(since, conversation)
 
-        if len(msg_lists) < 1:
-            return {"status": "error", "message": f"Expected at least 1 ListControl, but found {len(msg_lists)}"}
+@app.get("/api/events")
+async def events(since: Optional[int] = None, conversation: Optional[str] = None,
+                 last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events：连接后先发送一次当前状态，之后只在有新消息或状态变化时推送 sync 事件，
+    内容与 /api/sync_messages 的响应相同。所有订阅者共享同一个后台抓取线程。
 
-        # Heuristic: if multiple list controls, message list is commonly the second one; otherwise use the first
-        msg_list = msg_lists[1] if len(msg_lists) > 1 else msg_lists[0]
-        if not msg_list.Exists(0):
-            return {"status": "error", "message": "Message list not found"}
-        
-        # 提取最后 10 条消息
-        items = msg_list.GetChildren()[-10:]
-        data = []
-        for item in items:
-            # 简单判断发送者方位 (右侧为己方)
-            try:
-                rect = item.BoundingRectangle
-                list_rect = msg_list.BoundingRectangle
-                is_me = (rect.left + rect.width/2) > (list_rect.left + list_rect.width/2)
-                sender = "me" if is_me else "them"
-                
-                content = ""
-                if is_me:
-                    try:
-                        content_element = item.TextControl()
-                        content = content_element.Name
-                    except auto.LookupError:
-                        content = item.Name
-                else:
-                    content = item.Name
+    参数:
+      since: 从这个 cursor 之后开始推送；浏览器自动重连时改用 Last-Event-ID 头
+      conversation: 只推送这个会话；不传时跟随微信中当前打开的会话
+    """
+    since_conversation = conversation
+    resume_cursor, resume_conversation = parse_event_id(last_event_id)
+    if resume_cursor is not None:
+        since = resume_cursor
+        since_conversation = resume_conversation if resume_conversation is not None else conversation
+    return StreamingResponse(
+        snapshot_events(lambda: worker.snapshot, broadcaster, since, conversation, since_conversation),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/conversations")
+def list_conversations():
+    """会话列表（按微信会话列表的顺序）：标题、未读数、游标、最后一条消息，以及当前打开的会话。"""
+    snapshot = worker.snapshot
+    return {"status": snapshot.status,
+            "active": snapshot.conversation,
+            "data": [state.to_dict() for state in snapshot.conversations]}
+
+@app.get("/api/history")
+def message_history(before: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                    conversation: Optional[str] = None):
+    """
+    从新到旧分页读取保存的消息历史。
 
-                data.append({"sender": sender, "content": content, "time": time.strftime("%H:%M")})
-            except Exception as e:
-                import traceback
-                print(f"--- Error processing a message item: {item.Name} ---")
-                traceback.print_exc()
-                continue
+    参数:
+      before: 上一页响应中的 next_before；不传时从最新的消息开始
+      limit: 每页条数（最多 500）
+      conversation: 只读取这个会话；不传时为所有会话
+    """
+    return store.history(before, limit, conversation)
 
-        return {"status": "success", "data": data}
-    finally:
-        try:
-            comtypes.CoUninitialize()
-        except Exception:
-            # Best-effort cleanup; if uninitialize fails, don't crash the endpoint
-            pass
+
+@app.get("/api/search")
+def search_messages(q: str, before: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                    conversation: Optional[str] = None):
+    """
+    在保存的消息历史中全文搜索（子串匹配），从新到旧分页，参数同 /api/history。
+    """
+    return store.search(q, before, limit, conversation)
 
 @app.post("/api/analyze")
 def analyze_message(request: AnalyzeRequest):
@@ -175,33 +147,7 @@ def analyze_message(request: AnalyzeRequest):
 @app.get("/api/list_windows")
 def list_windows():
     """调试用：列出根下的顶层窗口的名称与类名，帮助定位 WeChat 窗口属性。"""
-    comtypes.CoInitialize()
-    try:
-        try:
-            root = auto.GetRootControl()
-        except Exception as e:
-            return {"status": "error", "message": f"GetRootControl failed: {e}"}
-
-        children = []
-        try:
-            for c in root.GetChildren():
-                try:
-                    children.append({
-                        "Name": getattr(c, 'Name', None),
-                        "ClassName": getattr(c, 'ClassName', None),
-                        "ControlType": getattr(c, 'ControlType', None)
-                    })
-                except Exception:
-                    continue
-        except Exception as e:
-            return {"status": "error", "message": f"Enumerating children failed: {e}"}
-
-        return {"status": "success", "windows": children}
-    finally:
-        try:
-            comtypes.CoUninitialize()
-        except Exception:
-            pass
+    return _call_on_worker(wechat_ui.list_top_windows)
 
 
 @app.get("/api/debug_window_structure")
@@ -212,49 +158,28 @@ def debug_window_structure(depth: int = 4, max_nodes: int = 300):
       depth: 递归深度（默认4）
       max_nodes: 返回的最大节点数，防止输出过大（默认300）
     """
-    comtypes.CoInitialize()
-    try:
-        w = get_wechat_window()
-        if not w or not w.Exists(0):
-            return {"status": "error", "message": "WeChat not found"}
-
-        nodes = []
-        count = 0
-
-        def _dump(node, cur_depth):
-            nonlocal count
-            if count >= max_nodes:
-                return
-            try:
-                info = {
-                    "depth": cur_depth,
-                    "Name": getattr(node, 'Name', None),
-                    "ClassName": getattr(node, 'ClassName', None),
-                    "ControlType": getattr(node, 'ControlType', None),
-                    "AutomationId": getattr(node, 'AutomationId', None),
-                }
-                nodes.append(info)
-                count += 1
-            except Exception:
-                pass
-
-            if cur_depth <= 0 or count >= max_nodes:
-                return
-            try:
-                for ch in node.GetChildren():
-                    _dump(ch, cur_depth - 1)
-                    if count >= max_nodes:
-                        break
-            except Exception:
-                pass
-
-        _dump(w, depth)
-        return {"status": "success", "nodes": nodes, "count": count}
-    finally:
-        try:
-            comtypes.CoUninitialize()
-        except Exception:
-            pass
+    return _call_on_worker(wechat_ui.dump_window_structure, depth, max_nodes)
+
+
+@app.get("/api/scraper_status")
+def scraper_status():
+    """调试：后台抓取线程的状态。"""
+    snapshot = worker.snapshot
+    return {
+        "alive": worker.is_alive(),
+        "interval": worker.interval,
+        "scrape_count": worker.scrape_count,
+        "last_scrape_ms": round(worker.last_scrape_seconds * 1000, 1),
+        "version": snapshot.version,
+        "conversation": snapshot.conversation,
+        "cursor": snapshot.cursor,
+        "conversations": len(worker.tracker.logs),
+        "subscribers": broadcaster.subscribers,
+        "history_written": history_writer.written,
+        "history_error": history_writer.last_error,
+        "updated_at": snapshot.updated_at,
+        "status": snapshot.status,
+    }
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,645 @@
+# ui_tree.py
+# 控件树的抽象接口，以及两个实现：
+#   UIATree  —— 通过 Windows UI Automation（uiautomation / comtypes）访问真实的控件树，只能在 Windows 上运行；
+#   FakeTree —— 内存中的控件树，可以从 JSON 快照加载（debug_dump.py --save 在 Windows 上保存），
+#               也可以由 synthetic_wechat_tree() 生成带有成千上万个节点的合成微信窗口，
+#               用于在 Linux 上测试和测量 wechat_ui 中的窗口定位、消息列表搜索和消息读取。
+# wechat_ui 只通过这里的接口访问控件（查找窗口、子控件、名称、类名、控件类型、位置），
+# 具体使用哪个实现由 create_tree() 根据配置决定（server.py 读取环境变量 WECHAT_UI_TREE）。
+#
+# 控件类型统一使用 uiautomation 的 ControlTypeName 字符串，例如 'WindowControl'、'ListControl'。
+
+import json
+import random
+import re
+import threading
+from collections import namedtuple
+
+WINDOW = 'WindowControl'
+PANE = 'PaneControl'
+LIST = 'ListControl'
+LIST_ITEM = 'ListItemControl'
+TEXT = 'TextControl'
+BUTTON = 'ButtonControl'
+EDIT = 'EditControl'
+
+# 合成微信窗口中消息列表的位置
+MESSAGE_LIST_RECT = (310, 60, 1000, 560)
+
+
+class Rect(namedtuple('Rect', 'left top right bottom')):
+    __slots__ = ()
+
+    @property
+    def width(self):
+        return self.right - self.left
+
+    @property
+    def height(self):
+        return self.bottom - self.top
+
+    @property
+    def center_x(self):
+        return (self.left + self.right) / 2
+
+
+EMPTY_RECT = Rect(0, 0, 0, 0)
+
+# read_children() 返回的子控件信息；text 为第一个 TextControl 后代的名称，没有时为 None
+ChildInfo = namedtuple('ChildInfo', 'name control_type rect text')
+
+
+class ControlTree:
+    """
+    控件树接口。节点对象由具体实现决定，调用方只把它们传回同一个树的方法。
+    访问已失效的控件时各方法可能抛出异常，调用方按原来访问 UIA 控件的方式处理。
+    """
+
+    def initialize_thread(self):
+        """在访问控件树的线程开始时调用一次（UIA 需要 CoInitialize）。"""
+
+    def uninitialize_thread(self):
+        """与 initialize_thread 配对，在线程退出前调用。"""
+
+    def root(self):
+        raise NotImplementedError
+
+    def find_window(self, class_name=None, name=None, timeout=0):
+        """在顶层窗口中按类名 / 标题查找，返回节点或 None。timeout 为等待窗口出现的秒数。"""
+        raise NotImplementedError
+
+    def from_handle(self, handle):
+        """由窗口句柄取得节点；句柄已失效时返回 None。"""
+        raise NotImplementedError
+
+    def children(self, node):
+        raise NotImplementedError
+
+    def name(self, node):
+        raise NotImplementedError
+
+    def class_name(self, node):
+        raise NotImplementedError
+
+    def control_type(self, node):
+        raise NotImplementedError
+
+    def rect(self, node):
+        """返回 Rect(left, top, right, bottom)。"""
+        raise NotImplementedError
+
+    def handle(self, node):
+        return None
+
+    def automation_id(self, node):
+        return None
+
+    def exists(self, node):
+        return node is not None
+
+    def find_first(self, node, control_type):
+        """先序遍历 node 的后代，返回第一个指定类型的控件，找不到时返回 None。"""
+        stack = list(reversed(self.children(node)))
+        while stack:
+            child = stack.pop()
+            if self.control_type(child) == control_type:
+                return child
+            stack.extend(reversed(self.children(child)))
+        return None
+
+    def read_children(self, node, last=None):
+        """
+        批量读取 node 的子控件（last 只取最后 last 个），返回 [ChildInfo, ...]。
+        默认实现逐个控件读取属性；UIATree 用 CacheRequest 连同子树一起取回：
+        不限 last 时一次调用取回全部子控件，给出 last 时从最后一个子控件往前逐个取，
+        只传输需要的 last 个子控件，耗时与列表长度无关。
+        """
+        children = self.children(node)
+        if last:
+            children = children[-last:]
+        infos = []
+        for child in children:
+            text = self.find_first(child, TEXT)
+            infos.append(ChildInfo(self.name(child), self.control_type(child), self.rect(child),
+                                   self.name(text) if text is not None else None))
+        return infos
+
+
+class UIATree(ControlTree):
+    """通过 uiautomation 访问真实的 Windows 控件树。节点为 uiautomation.Control。"""
+
+    def __init__(self):
+        import uiautomation as auto
+
+        self.auto = auto
+        self._local = threading.local()
+
+    def initialize_thread(self):
+        import comtypes
+
+        comtypes.CoInitialize()
+
+    def uninitialize_thread(self):
+        import comtypes
+
+        comtypes.CoUninitialize()
+
+    def root(self):
+        return self.auto.GetRootControl()
+
+    def find_window(self, class_name=None, name=None, timeout=0):
+        conditions = {}
+        if class_name is not None:
+            conditions['ClassName'] = class_name
+        if name is not None:
+            conditions['Name'] = name
+        w = self.auto.WindowControl(searchDepth=1, **conditions)
+        return w if w and w.Exists(timeout) else None
+
+    def from_handle(self, handle):
+        if not handle or not self.auto.IsWindow(handle):
+            return None
+        return self.auto.ControlFromHandle(handle)
+
+    def children(self, node):
+        return node.GetChildren()
+
+    def name(self, node):
+        return node.Name
+
+    def class_name(self, node):
+        return node.ClassName
+
+    def control_type(self, node):
+        return node.ControlTypeName
+
+    def rect(self, node):
+        r = node.BoundingRectangle
+        return Rect(r.left, r.top, r.right, r.bottom)
+
+    def handle(self, node):
+        return node.NativeWindowHandle
+
+    def automation_id(self, node):
+        return node.AutomationId
+
+    def exists(self, node):
+        return bool(node) and node.Exists(0)
+
+    def find_first(self, node, control_type):
+        # 交给 UIA 在进程外搜索，比逐层 GetChildren 少很多次跨进程调用
+        control = getattr(node, control_type)()
+        return control if control.Exists(0) else None
+
+    def _cache_request(self):
+        # CacheRequest 是 COM 对象，在使用它的线程中创建，每个线程一个
+        request = getattr(self._local, 'cache_request', None)
+        if request is None:
+            client = self.auto._AutomationClient.instance().IUIAutomation
+            request = client.CreateCacheRequest()
+            for property_id in (self.auto.PropertyId.NameProperty, self.auto.PropertyId.ControlTypeProperty,
+                                self.auto.PropertyId.BoundingRectangleProperty):
+                request.AddProperty(property_id)
+            # 同时缓存取回的每个控件的子树，消息内容（TextControl）也在同一次调用中取回
+            request.TreeScope = self.auto.TreeScope.Subtree
+            self._local.cache_request = request
+        return request
+
+    def read_children(self, node, last=None):
+        # 取回的控件连同子树的名称、类型和位置都在缓存中，之后只读取缓存的属性（Cached*），
+        # 不再逐个控件调用 COM
+        try:
+            client = self.auto._AutomationClient.instance().IUIAutomation
+            if last:
+                return self._read_last_children(client, node, last)
+            # 一次 FindAllBuildCache 取回所有子控件；会传输每个子控件的整棵子树，只在需要全部子控件时使用
+            elements = node.Element.FindAllBuildCache(
+                self.auto.TreeScope.Children, client.ControlViewCondition, self._cache_request())
+            length = elements.Length if elements else 0
+            return [self._cached_info(elements.GetElement(i)) for i in range(length)]
+        except Exception:
+            return super().read_children(node, last)
+
+    def _read_last_children(self, client, node, last):
+        # 从最后一个子控件往前走 last 步，每步一次调用，只缓存这一个控件的子树；
+        # 消息列表有几千条时也只传输最后 last 条
+        walker = client.ControlViewWalker
+        request = self._cache_request()
+        infos = []
+        element = walker.GetLastChildElementBuildCache(node.Element, request)
+        while element and len(infos) < last:
+            infos.append(self._cached_info(element))
+            if len(infos) < last:
+                element = walker.GetPreviousSiblingElementBuildCache(element, request)
+        infos.reverse()
+        return infos
+
+    def _cached_info(self, element):
+        r = element.CachedBoundingRectangle
+        return ChildInfo(element.CachedName, self._type_name(element.CachedControlType),
+                         Rect(r.left, r.top, r.right, r.bottom), self._cached_text(element))
+
+    def _type_name(self, control_type):
+        return self.auto.ControlTypeNames.get(control_type, '')
+
+    def _cached_text(self, element):
+        # 在缓存的子树中先序查找第一个 TextControl
+        text_type = self.auto.ControlType.TextControl
+        stack = list(reversed(self._cached_children(element)))
+        while stack:
+            child = stack.pop()
+            if child.CachedControlType == text_type:
+                return child.CachedName
+            stack.extend(reversed(self._cached_children(child)))
+        return None
+
+    @staticmethod
+    def _cached_children(element):
+        try:
+            children = element.GetCachedChildren()
+        except Exception:
+            return []
+        if not children:
+            return []
+        return [children.GetElement(i) for i in range(children.Length)]
+
+
+class FakeNode:
+    __slots__ = ('control_type', 'name', 'class_name', 'rect', 'handle', 'automation_id', 'children')
+
+    def __init__(self, control_type, name='', class_name='', rect=EMPTY_RECT, handle=None,
+                 automation_id='', children=()):
+        self.control_type = control_type
+        self.name = name
+        self.class_name = class_name
+        self.rect = Rect(*rect)
+        self.handle = handle
+        self.automation_id = automation_id
+        self.children = list(children)
+
+    def to_dict(self):
+        data = {"type": self.control_type, "name": self.name, "class": self.class_name,
+                "rect": list(self.rect)}
+        if self.handle:
+            data["handle"] = self.handle
+        if self.automation_id:
+            data["automation_id"] = self.automation_id
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("type", PANE), data.get("name") or '', data.get("class") or '',
+                   data.get("rect") or EMPTY_RECT, data.get("handle"), data.get("automation_id") or '',
+                   [cls.from_dict(child) for child in data.get("children", ())])
+
+
+class FakeTree(ControlTree):
+    """
+    内存中的控件树。root 为桌面节点，其子节点为顶层窗口。
+    round_trips 统计访问控件的次数：children()、name() 等属性读取和 read_children() 各算一次，
+    对应 UIA 中每次都要跨进程的 COM 调用（read_children 与 UIATree 一致：不限 last 时算一次，
+    否则每取回一个子控件算一次）；
+    find_window() 每检查一个顶层窗口算一次，from_handle() 算一次。
+    """
+
+    def __init__(self, root):
+        self._root = root
+        self.round_trips = 0
+        next_handle = 0x10000
+        for window in root.children:
+            if not window.handle:
+                window.handle = next_handle
+            next_handle = max(next_handle, window.handle) + 0x10
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 JSON 快照构造。快照可以是整个桌面，也可以只是一个窗口（此时放到一个桌面节点下）。"""
+        node = FakeNode.from_dict(data)
+        if node.control_type == WINDOW:
+            node = FakeNode(PANE, 'Desktop', '#32769', children=[node])
+        return cls(node)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self._root.to_dict(), f, ensure_ascii=False)
+
+    def count_nodes(self):
+        count, stack = 0, [self._root]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+
+    def root(self):
+        return self._root
+
+    def find_window(self, class_name=None, name=None, timeout=0):
+        # UIA 按条件查找顶层窗口时要逐个读取每个窗口的属性，每访问一个窗口算一次
+        for window in self._root.children:
+            self.round_trips += 1
+            if window.control_type != WINDOW:
+                continue
+            if class_name is not None and window.class_name != class_name:
+                continue
+            if name is not None and window.name != name:
+                continue
+            return window
+        return None
+
+    def from_handle(self, handle):
+        # 对应 UIA 的 ElementFromHandle，一次调用；只有仍在桌面下的窗口句柄有效
+        self.round_trips += 1
+        for window in self._root.children:
+            if window.handle == handle:
+                return window
+        return None
+
+    def children(self, node):
+        self.round_trips += 1
+        return list(node.children)
+
+    def read_children(self, node, last=None):
+        children = node.children[-last:] if last else node.children
+        self.round_trips += len(children) if last else 1
+        return [ChildInfo(child.name, child.control_type, child.rect, _first_text(child)) for child in children]
+
+    def name(self, node):
+        self.round_trips += 1
+        return node.name
+
+    def class_name(self, node):
+        self.round_trips += 1
+        return node.class_name
+
+    def control_type(self, node):
+        self.round_trips += 1
+        return node.control_type
+
+    def rect(self, node):
+        self.round_trips += 1
+        return node.rect
+
+    def handle(self, node):
+        return node.handle
+
+    def automation_id(self, node):
+        return node.automation_id
+
+
+def capture(tree, node, depth=None, max_nodes=None):
+    """
+    把任意 ControlTree 中 node 以下的控件保存为 FakeTree.from_dict 可以读取的字典。
+    depth 限制递归深度，max_nodes 限制节点总数（超出后不再添加子节点）。
+    """
+    count = 0
+
+    def _capture(current, remaining):
+        nonlocal count
+        count += 1
+        try:
+            rect = list(tree.rect(current))
+        except Exception:
+            rect = list(EMPTY_RECT)
+        data = {"type": safe_get(tree.control_type, current), "name": safe_get(tree.name, current),
+                "class": safe_get(tree.class_name, current), "rect": rect}
+        handle = safe_get(tree.handle, current)
+        if handle:
+            data["handle"] = handle
+        automation_id = safe_get(tree.automation_id, current)
+        if automation_id:
+            data["automation_id"] = automation_id
+        if remaining is not None and remaining <= 0:
+            return data
+        children = []
+        for child in safe_get(tree.children, current) or ():
+            if max_nodes is not None and count >= max_nodes:
+                break
+            children.append(_capture(child, None if remaining is None else remaining - 1))
+        if children:
+            data["children"] = children
+        return data
+
+    return _capture(node, depth)
+
+
+def safe_get(getter, node):
+    """getter(node)，访问失败（例如控件已失效）时返回 None。"""
+    try:
+        return getter(node)
+    except Exception:
+        return None
+
+
+def dump_tree(tree, node, depth=5, max_nodes=400):
+    """
+    先序遍历 node 以下 depth 层，返回每个控件的关键信息列表（最多 max_nodes 个），供调试接口和脚本输出。
+    """
+    nodes = []
+
+    def _dump(current, cur_depth):
+        nodes.append({
+            "depth": cur_depth,
+            "Name": safe_get(tree.name, current),
+            "ClassName": safe_get(tree.class_name, current),
+            "ControlType": safe_get(tree.control_type, current),
+            "AutomationId": safe_get(tree.automation_id, current),
+        })
+        if cur_depth <= 0:
+            return
+        for child in safe_get(tree.children, current) or ():
+            if len(nodes) >= max_nodes:
+                break
+            _dump(child, cur_depth - 1)
+
+    _dump(node, depth)
+    return nodes
+
+
+# 合成窗口中消息和会话预览使用的内容
+SYNTHETIC_WORDS = ("好的", "收到", "明天见", "价格是多少", "报错了", "在吗", "辛苦了", "稍等",
+                   "这个问题我看一下", "会议改到下午三点", "[图片]", "[文件] 需求文档.docx")
+
+
+def synthetic_wechat_tree(messages=500, sessions=200, other_windows=20, seed=0, my_ratio=0.4):
+    """
+    生成一个合成的微信主窗口（仿照 PC 版微信的控件结构），连同若干其它顶层窗口放在桌面下。
+    messages 为消息列表中的消息数，sessions 为会话列表中的会话数；
+    默认参数约生成 4000 个节点。己方消息位于消息列表右侧，对方消息位于左侧。
+    第一个会话为当前打开的聊天；其余会话中约五分之一带有未读提示（列表项名称末尾的“N条新消息”）。
+    可以用 add_synthetic_message / switch_synthetic_conversation 模拟收到消息和切换聊天。
+    """
+    rng = random.Random(seed)
+    words = SYNTHETIC_WORDS
+    names = ["张三", "李四", "产品-王五", "技术支持-赵六", "市场部-周七", "文件传输助手"]
+
+    def text(name, rect):
+        return FakeNode(TEXT, name, '', rect)
+
+    session_items = []
+    for i in range(sessions):
+        top = 80 + i * 64
+        title = f"{rng.choice(names)}{i}"
+        unread = rng.randint(1, 20) if i > 0 and rng.random() < 0.2 else 0
+        session_items.append(FakeNode(LIST_ITEM, _session_name(title, unread), '', (60, top, 310, top + 64), children=[
+            FakeNode(PANE, '', '', (60, top, 310, top + 64), children=[
+                FakeNode(BUTTON, title, '', (70, top + 10, 114, top + 54)),
+                FakeNode(PANE, '', '', (120, top + 8, 300, top + 56), children=[
+                    text(title, (120, top + 8, 240, top + 30)),
+                    text(f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}", (250, top + 8, 300, top + 30)),
+                    text(rng.choice(words), (120, top + 32, 300, top + 56)),
+                ]),
+            ]),
+        ]))
+
+    message_items = _synthetic_messages(rng, messages, my_ratio)
+    title = FakeNode(BUTTON, session_items[0].name if session_items else names[0], '', (330, 15, 500, 45))
+    message_list = FakeNode(LIST, '消息', '', MESSAGE_LIST_RECT, children=message_items)
+    session_list = FakeNode(LIST, '会话', '', (60, 60, 310, 700), children=session_items)
+
+    wechat = FakeNode(WINDOW, '微信', 'WeChatMainWndForPC', (0, 0, 1000, 700), children=[
+        FakeNode(PANE, '', '', (0, 0, 1000, 700), children=[
+            FakeNode(PANE, '导航', '', (0, 0, 60, 700), children=[
+                FakeNode(BUTTON, label, '', (10, 60 + 50 * i, 50, 100 + 50 * i))
+                for i, label in enumerate(["聊天", "通讯录", "收藏", "聊天文件", "朋友圈", "设置及其他"])]),
+            FakeNode(PANE, '', '', (60, 0, 310, 700), children=[
+                FakeNode(PANE, '', '', (60, 0, 310, 60), children=[FakeNode(EDIT, '搜索', '', (70, 20, 300, 44))]),
+                session_list,
+            ]),
+            FakeNode(PANE, '', '', (310, 0, 1000, 700), children=[
+                FakeNode(PANE, '', '', (310, 0, 1000, 60), children=[
+                    title, FakeNode(BUTTON, '聊天信息', '', (950, 15, 990, 45))]),
+                FakeNode(PANE, '', '', (310, 60, 1000, 560), children=[message_list]),
+                FakeNode(PANE, '', '', (310, 560, 1000, 700), children=[
+                    FakeNode(PANE, '', '', (310, 560, 1000, 600), children=[
+                        FakeNode(BUTTON, label, '', (320 + 40 * i, 565, 350 + 40 * i, 595))
+                        for i, label in enumerate(["表情", "发送文件", "截图", "聊天记录"])]),
+                    FakeNode(EDIT, '输入', '', (320, 600, 990, 660)),
+                    FakeNode(BUTTON, '发送(S)', '', (900, 665, 990, 695)),
+                ]),
+            ]),
+        ]),
+    ])
+
+    windows = []
+    for i in range(other_windows):
+        windows.append(FakeNode(WINDOW, f"窗口 {i}", rng.choice(['Chrome_WidgetWin_1', 'CabinetWClass', 'Notepad']),
+                                (0, 0, 800, 600), children=[
+                                    FakeNode(PANE, '', '', (0, 0, 800, 600), children=[
+                                        FakeNode(TEXT, f"内容 {j}", '', (0, 20 * j, 800, 20 * j + 20))
+                                        for j in range(10)])]))
+    windows.insert(len(windows) // 2, wechat)
+    tree = FakeTree(FakeNode(PANE, 'Desktop', '#32769', (0, 0, 1920, 1080), children=windows))
+    tree.synthetic = {"title": title, "messages": message_list, "sessions": session_list,
+                      "words": words, "my_ratio": my_ratio, "opened": {}}
+    return tree
+
+
+_UNREAD_SUFFIX = re.compile(r'(\d+)条新消息')
+
+
+def _session_name(title, unread):
+    return f"{title}{unread}条新消息" if unread else title
+
+
+def _synthetic_messages(rng, count, my_ratio, words=SYNTHETIC_WORDS):
+    return [_synthetic_message(rng.random() < my_ratio, rng.choice(words), i) for i in range(count)]
+
+
+def _synthetic_message(is_me, content, index):
+    left, right = MESSAGE_LIST_RECT[0], MESSAGE_LIST_RECT[2]
+    top = MESSAGE_LIST_RECT[1] + index * 60
+    # 对方消息：头像在左，气泡靠左；己方消息相反
+    bubble = (right - 400, top + 5, right - 60, top + 55) if is_me else (left + 60, top + 5, left + 400, top + 55)
+    avatar = (right - 50, top + 5, right - 10, top + 45) if is_me else (left + 10, top + 5, left + 50, top + 45)
+    item_rect = (bubble[0] - 60, top, bubble[2] + 60, top + 60) if is_me else (left, top, bubble[2] + 60, top + 60)
+    sender = FakeNode(BUTTON, "我" if is_me else "对方", '', avatar)
+    body = FakeNode(PANE, '', '', bubble, children=[FakeNode(PANE, '', '', bubble, children=[
+        FakeNode(TEXT, content, '', bubble)])])
+    return FakeNode(LIST_ITEM, content, '', item_rect, children=[
+        FakeNode(PANE, '', '', item_rect, children=[body, sender] if is_me else [sender, body])])
+
+
+def _synthetic_parts(tree):
+    parts = getattr(tree, "synthetic", None)
+    if parts is None:
+        raise ValueError("Not a tree built by synthetic_wechat_tree()")
+    return parts
+
+
+def _synthetic_session(parts, title):
+    for item in parts["sessions"].children:
+        if _first_text(item) == title:
+            return item
+    raise ValueError(f"No conversation named '{title}'")
+
+
+def add_synthetic_message(tree, sender, content, conversation=None):
+    """
+    模拟收到新消息（sender 为 "me" 或 "them"）。conversation 为当前打开的聊天或 None 时追加到消息列表末尾，
+    否则只让该会话在会话列表中的未读数加一。
+    """
+    parts = _synthetic_parts(tree)
+    if conversation is not None and conversation != parts["title"].name:
+        item = _synthetic_session(parts, conversation)
+        # 只匹配标题之后的部分：合成的标题都以数字结尾，直接搜索名称会把标题的数字算进未读数
+        match = _UNREAD_SUFFIX.fullmatch(item.name, len(conversation))
+        item.name = _session_name(conversation, (int(match.group(1)) if match else 0) + 1)
+        return
+    message_list = parts["messages"]
+    message_list.children.append(
+        _synthetic_message(sender == "me", content, len(message_list.children)))
+
+
+def switch_synthetic_conversation(tree, title, messages=20):
+    """
+    模拟在微信中打开另一个聊天：标题改为 title，清除其未读提示，消息列表换成该会话的消息
+    （第一次打开时按标题生成 messages 条，之后保留切走时的消息）。
+    """
+    parts = _synthetic_parts(tree)
+    item = _synthetic_session(parts, title)
+    item.name = title
+    opened = parts["opened"]
+    opened[parts["title"].name] = parts["messages"].children
+    if title not in opened:
+        opened[title] = _synthetic_messages(random.Random(title), messages, parts["my_ratio"], parts["words"])
+    parts["title"].name = title
+    parts["messages"].children = opened[title]
+
+
+def _first_text(node):
+    for child in _walk(node):
+        if child is not node and child.control_type == TEXT:
+            return child.name
+    return None
+
+
+def _walk(node):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(current.children))
+
+
+def create_tree(spec=None):
+    """
+    根据配置创建控件树：
+      "uia"（默认）          真实的 UI Automation
+      "synthetic[:N]"        合成微信窗口，消息列表中有 N 条消息（默认 500）
+      其它                    视为 JSON 快照路径（见 debug_dump.py --save）
+    """
+    spec = spec or "uia"
+    if spec == "uia":
+        return UIATree()
+    kind, _, arg = spec.partition(":")
+    if kind == "synthetic":
+        return synthetic_wechat_tree(messages=int(arg) if arg else 500)
+    return FakeTree.load(spec)
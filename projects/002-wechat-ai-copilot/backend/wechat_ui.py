@@ -0,0 +1,432 @@
+# wechat_ui.py
+# 读取微信窗口：定位主窗口、消息列表、会话列表和当前聊天的标题（均带缓存），读取最近的消息和各会话的未读数。
+# 控件访问都通过 ui_tree.ControlTree 接口进行：默认是真实的 UI Automation（UIATree），
+# 也可以用 set_tree() 换成内存中的 FakeTree（JSON 快照或合成的微信窗口），在 Linux 上测试和测量。
+# 这里的函数都要在已调用 get_tree().initialize_thread() 的线程中执行（见 scraper.ScrapeWorker）。
+
+import re
+import threading
+import traceback
+
+import ui_tree
+
+_tree = None
+
+
+def get_tree():
+    """当前使用的控件树；未设置时创建 UIATree。"""
+    global _tree
+    if _tree is None:
+        _tree = ui_tree.UIATree()
+    return _tree
+
+
+def set_tree(tree):
+    """切换控件树实现，并清空窗口和消息列表的缓存。"""
+    global _tree
+    _tree = tree
+    with _window_lock:
+        _window_cache.update(hwnd=None, strategy=None, class_name=None)
+    with _path_lock:
+        for cache in _path_caches.values():
+            cache.update(hwnd=None, path=None)
+
+
+def _has_chinese(s: str) -> bool:
+    if not s:
+        return False
+    for ch in s:
+        if '\u4e00' <= ch <= '\u9fff':
+            return True
+    return False
+
+
+# 查找微信主窗口的各种策略，按顺序尝试。每个策略返回找到的控件或 None。
+def _find_by_wechat_class(tree):
+    # 1) 精确匹配 Windows 版微信常见类名
+    return tree.find_window(class_name='WeChatMainWndForPC', name='微信')
+
+
+def _find_by_qt_class(tree):
+    # 2) 有些微信客户端（Qt 版本）使用 Qt 类名，试试已知的 Qt 类名
+    return tree.find_window(class_name='Qt51514QWindowIcon')
+
+
+def _find_by_title(tree):
+    # 3) 遍历根窗口，匹配标题或类名的多种可能性
+    for c in tree.children(tree.root()):
+        try:
+            name = tree.name(c) or ''
+            cls = tree.class_name(c) or ''
+            # 精确或部分匹配中文名称/英文名称
+            if '微信' in name or 'WeChat' in name or 'Weixin' in name:
+                return c
+            # 如果类名包含 Qt 且标题含中文字符，也很可能是微信
+            if 'Qt' in cls and _has_chinese(name):
+                return c
+        except Exception:
+            continue
+    return None
+
+
+def _find_by_generic_qt_class(tree):
+    # 4) 最后尝试一些通配的 Qt 类名
+    for cls_name in ('Qt51514QWindowIcon', 'Qt5QWindowIcon'):
+        try:
+            w = tree.find_window(class_name=cls_name)
+            if w is not None:
+                return w
+        except Exception:
+            continue
+    return None
+
+
+WINDOW_STRATEGIES = [
+    ("wechat_class", _find_by_wechat_class),
+    ("qt_class", _find_by_qt_class),
+    ("title", _find_by_title),
+    ("generic_qt_class", _find_by_generic_qt_class),
+]
+
+# 上一次找到的微信窗口：窗口句柄、找到它的策略和窗口类名。
+# 每次完整搜索都要枚举所有顶层窗口，这里缓存句柄，之后每次调用只做一次廉价的有效性检查。
+_window_cache = {"hwnd": None, "strategy": None, "class_name": None}
+_window_lock = threading.Lock()
+
+
+def _find_wechat_window(tree):
+    """完整搜索微信主窗口，返回 (控件, 策略名)。上次成功的策略最先尝试。"""
+    remembered = _window_cache["strategy"]
+    strategies = sorted(WINDOW_STRATEGIES, key=lambda item: item[0] != remembered)
+    for name, strategy in strategies:
+        try:
+            w = strategy(tree)
+        except Exception:
+            continue
+        if w is not None:
+            return w, name
+    return None, None
+
+
+def _cached_wechat_window(tree):
+    """缓存的句柄仍指向同一个窗口时返回该窗口的控件，否则返回 None。"""
+    hwnd = _window_cache["hwnd"]
+    if not hwnd:
+        return None
+    try:
+        w = tree.from_handle(hwnd)
+        # 句柄可能已被系统回收并分配给别的窗口，类名不同则视为失效
+        if w is None or tree.class_name(w) != _window_cache["class_name"]:
+            return None
+    except Exception:
+        return None
+    return w
+
+
+def invalidate_wechat_window():
+    """丢弃缓存的窗口句柄，下次调用 get_wechat_window 时重新完整搜索。"""
+    with _window_lock:
+        _window_cache["hwnd"] = None
+
+
+def get_wechat_window():
+    # 优先使用缓存的窗口句柄，失效时才按各种策略完整搜索
+    tree = get_tree()
+    with _window_lock:
+        w = _cached_wechat_window(tree)
+        if w is not None:
+            return w
+        w, strategy = _find_wechat_window(tree)
+        if w is None:
+            _window_cache["hwnd"] = None
+            return None
+        try:
+            _window_cache.update(
+                hwnd=tree.handle(w), strategy=strategy, class_name=tree.class_name(w))
+        except Exception:
+            _window_cache["hwnd"] = None
+        return w
+
+
+def get_wechat_window_strategy():
+    """返回最近一次找到微信窗口所用的策略名（调试用）。"""
+    return _window_cache["strategy"]
+
+# 消息列表控件的常见名称（中文版 / 英文版）。按名称匹配可能因编码问题失败，因此只作为提前结束搜索的依据。
+MESSAGE_LIST_NAMES = ('消息', 'Messages')
+# 左侧会话列表的常见名称
+SESSION_LIST_NAMES = ('会话', 'Chats')
+MESSAGE_LIST_MAX_DEPTH = 15
+# 会话列表项名称中的未读提示，例如 "张三2条新消息"
+UNREAD_PATTERN = re.compile(r'\s*(\d+)\s*(?:条新消息|new messages?)')
+
+# 上一次找到的消息列表、会话列表和聊天标题在窗口控件树中的路径：[(子控件下标, ControlType, ClassName), ...]。
+# 路径仍然有效时，每次请求只需沿路径逐层取子控件，不必再遍历整棵树。
+# 查找聊天标题时要用到消息列表的位置，会在持有锁时再取消息列表，因此用 RLock。
+_path_caches = {name: {"hwnd": None, "path": None} for name in ("message_list", "session_list", "title")}
+_path_lock = threading.RLock()
+
+
+def _find_list(tree, window, names, pick):
+    """
+    在窗口中搜索列表控件，返回 (控件, 路径)；找不到时返回 (None, None)。
+    先序深度优先遍历，不进入 ListControl 内部（列表项里不会再有列表）。
+    遇到名称在 names 中的列表立即结束；否则由 pick 从按顺序找到的所有列表 [(控件, 路径), ...] 中选择。
+    """
+    candidates = []
+
+    def _dfs(node, path, depth):
+        try:
+            children = tree.children(node)
+        except Exception:
+            return None
+        for index, child in enumerate(children):
+            try:
+                control_type = tree.control_type(child)
+                class_name = tree.class_name(child)
+            except Exception:
+                continue
+            child_path = path + [(index, control_type, class_name)]
+            if control_type == ui_tree.LIST:
+                try:
+                    if tree.name(child) in names:
+                        return child, child_path
+                except Exception:
+                    pass
+                candidates.append((child, child_path))
+                continue
+            if depth > 1:
+                found = _dfs(child, child_path, depth - 1)
+                if found is not None:
+                    return found
+        return None
+
+    found = _dfs(window, [], MESSAGE_LIST_MAX_DEPTH)
+    if found is not None:
+        return found
+    return (candidates and pick(candidates)) or (None, None)
+
+
+def _find_message_list(tree, window):
+    # 没有名称匹配时沿用原来的经验规则：有多个列表时取第二个（第一个通常是会话列表）
+    return _find_list(tree, window, MESSAGE_LIST_NAMES,
+                      lambda candidates: candidates[1] if len(candidates) > 1 else candidates[0])
+
+
+def _find_session_list(tree, window):
+    # 只有一个列表时无法区分，宁可不读未读数
+    return _find_list(tree, window, SESSION_LIST_NAMES,
+                      lambda candidates: candidates[0] if len(candidates) > 1 else None)
+
+
+def _find_conversation_title(tree, window):
+    """
+    搜索当前聊天的标题，返回 (控件, 路径)。标题显示在消息列表上方：
+    取位于消息列表正上方、有名称的文本或按钮中最靠左的一个（右侧通常是“聊天信息”等按钮）。
+    """
+    msg_list = get_message_list(window)
+    if msg_list is None:
+        return None, None
+    list_rect = tree.rect(msg_list)
+    best = None
+
+    def _dfs(node, path, depth):
+        nonlocal best
+        try:
+            children = tree.children(node)
+        except Exception:
+            return
+        for index, child in enumerate(children):
+            try:
+                control_type = tree.control_type(child)
+                class_name = tree.class_name(child)
+                rect = tree.rect(child)
+            except Exception:
+                continue
+            # 标题区域在消息列表之上、左右范围之内；完全在此范围之外的控件不必进入
+            if rect.right <= list_rect.left or rect.left >= list_rect.right or rect.top >= list_rect.top:
+                continue
+            child_path = path + [(index, control_type, class_name)]
+            if control_type in (ui_tree.TEXT, ui_tree.BUTTON):
+                if (rect.bottom <= list_rect.top and rect.left >= list_rect.left
+                        and (best is None or (rect.left, rect.top) < best[0])):
+                    name = ui_tree.safe_get(tree.name, child)
+                    if name:
+                        best = ((rect.left, rect.top), child, child_path)
+                continue
+            if control_type != ui_tree.LIST and depth > 1:
+                _dfs(child, child_path, depth - 1)
+
+    _dfs(window, [], MESSAGE_LIST_MAX_DEPTH)
+    return (best[1], best[2]) if best is not None else (None, None)
+
+
+def _resolve_path(tree, window, path, resolved=None):
+    """
+    沿缓存的路径取出控件；任一层的下标越界或类型 / 类名不符时返回 None。
+    resolved 为 {路径前缀: 控件}：一次抓取中消息列表、会话列表和标题的路径有共同的前缀，只解析一次。
+    """
+    node = window
+    for depth, (index, control_type, class_name) in enumerate(path, 1):
+        prefix = tuple(path[:depth])
+        if resolved is not None and prefix in resolved:
+            node = resolved[prefix]
+            continue
+        try:
+            children = tree.children(node)
+            if index >= len(children):
+                return None
+            node = children[index]
+            if tree.control_type(node) != control_type or tree.class_name(node) != class_name:
+                return None
+        except Exception:
+            return None
+        if resolved is not None:
+            resolved[prefix] = node
+    return node
+
+
+def _cached_control(name, window, find, resolved=None):
+    """
+    按缓存的路径取出控件，路径失效时调用 find(tree, window) 重新搜索并记住新路径。找不到时返回 None。
+    """
+    tree = get_tree()
+    try:
+        hwnd = tree.handle(window)
+    except Exception:
+        hwnd = None
+    cache = _path_caches[name]
+    with _path_lock:
+        path = cache["path"]
+        if path is not None and cache["hwnd"] == hwnd:
+            control = _resolve_path(tree, window, path, resolved)
+            if control is not None and tree.exists(control):
+                return control
+        control, path = find(tree, window)
+        if control is None or not tree.exists(control):
+            cache.update(hwnd=None, path=None)
+            return None
+        cache.update(hwnd=hwnd, path=path)
+        return control
+
+
+def get_message_list(window, resolved=None):
+    """返回窗口中的消息列表控件。优先走缓存的路径，失效时才重新搜索。resolved 见 _resolve_path。"""
+    return _cached_control("message_list", window, _find_message_list, resolved)
+
+
+def get_session_list(window, resolved=None):
+    """返回窗口左侧的会话列表控件；找不到时返回 None。"""
+    return _cached_control("session_list", window, _find_session_list, resolved)
+
+
+def get_conversation_title(window, resolved=None):
+    """返回当前打开的聊天的标题；找不到时返回 None。"""
+    control = _cached_control("title", window, _find_conversation_title, resolved)
+    if control is None:
+        return None
+    title = ui_tree.safe_get(get_tree().name, control)
+    if not title:
+        # 路径仍然有效但已不是标题（例如窗口布局变化），下次重新搜索
+        with _path_lock:
+            _path_caches["title"].update(hwnd=None, path=None)
+        return None
+    return title
+
+
+def read_sessions(session_list):
+    """
+    读取会话列表，返回 [(会话标题, 未读数), ...]（按列表顺序）。
+    标题取列表项中的第一个文本；未读数从列表项名称中标题之后的“N条新消息”读取
+    （标题本身可能以数字结尾，所以先去掉标题再匹配）。
+    """
+    sessions = []
+    for item in get_tree().read_children(session_list):
+        name = item.name or ''
+        if item.text and name.startswith(item.text):
+            match = UNREAD_PATTERN.match(name, len(item.text))
+        else:
+            match = UNREAD_PATTERN.search(name)
+        unread = int(match.group(1)) if match else 0
+        title = item.text or (name[:match.start()] if match else name).strip()
+        if title:
+            sessions.append((title, unread))
+    return sessions
+
+
+def read_messages(msg_list, count=10):
+    """
+    读取消息列表中最后 count 条消息，返回 [{"sender", "content"}, ...]。
+    不在这里打时间戳：同一条消息每次抓取都会被读到，时间由 message_log.MessageLog 在第一次看到它时记录。
+    消息项的名称、位置和内容通过 read_children 连同子树从缓存中取回（UIA 中只传输最后 count 项，与列表长度无关），
+    列表位置只读一次，之后在取回的数据上判断每条消息的发送方。
+    """
+    tree = get_tree()
+    items = tree.read_children(msg_list, last=count)
+    list_center = tree.rect(msg_list).center_x
+    data = []
+    for item in items:
+        # 简单判断发送者方位 (右侧为己方)
+        is_me = item.rect.center_x > list_center
+        # 己方消息的 Name 不是消息内容，取其中的 TextControl
+        content = item.text if is_me and item.text is not None else item.name
+        data.append({"sender": "me" if is_me else "them", "content": content})
+    return data
+
+
+def scrape_messages(count=10):
+    """
+    定位窗口和消息列表并读取最近的消息，返回 {"status": ..., "data" 或 "message": ...}。
+    成功时还带有当前聊天的标题 "conversation"（找不到时为 None）和会话列表 "sessions"
+    （[(标题, 未读数), ...]；找不到会话列表时为 None）。
+    """
+    window = get_wechat_window()
+    if window is None or not get_tree().exists(window):
+        return {"status": "error", "message": "WeChat not found"}
+
+    resolved = {}
+    msg_list = get_message_list(window, resolved)
+    if msg_list is None:
+        return {"status": "error", "message": "Message list not found"}
+    session_list = get_session_list(window, resolved)
+    sessions = None
+    if session_list is not None:
+        try:
+            sessions = read_sessions(session_list)
+        except Exception:
+            traceback.print_exc()
+    return {"status": "success", "data": read_messages(msg_list, count),
+            "conversation": get_conversation_title(window, resolved), "sessions": sessions}
+
+
+def list_top_windows():
+    """调试用：列出根下的顶层窗口的名称与类名，帮助定位 WeChat 窗口属性。"""
+    tree = get_tree()
+    try:
+        root = tree.root()
+    except Exception as e:
+        return {"status": "error", "message": f"GetRootControl failed: {e}"}
+
+    children = []
+    try:
+        for c in tree.children(root):
+            children.append({
+                "Name": ui_tree.safe_get(tree.name, c),
+                "ClassName": ui_tree.safe_get(tree.class_name, c),
+                "ControlType": ui_tree.safe_get(tree.control_type, c),
+            })
+    except Exception as e:
+        return {"status": "error", "message": f"Enumerating children failed: {e}"}
+
+    return {"status": "success", "windows": children}
+
+
+def dump_window_structure(depth=4, max_nodes=300):
+    """调试：在已定位的微信窗口内递归遍历控件树并返回每个控件的关键信息。"""
+    w = get_wechat_window()
+    if w is None or not get_tree().exists(w):
+        return {"status": "error", "message": "WeChat not found"}
+
+    nodes = ui_tree.dump_tree(get_tree(), w, depth, max_nodes)
+    return {"status": "success", "nodes": nodes, "count": len(nodes),
+            "strategy": get_wechat_window_strategy()}
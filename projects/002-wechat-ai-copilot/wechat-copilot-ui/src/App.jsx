@@ -3,17 +3,15 @@ import { MessageSquare, Users, Settings, Zap, Send, Search, Smile, Paperclip, Bo
 import classnames from 'classnames';
 import axios from 'axios';
 
-const conversations = [
-  { id: 1, name: '张三', avatar: 'https://i.pravatar.cc/40?u=a042581f4e29026704d', lastMessage: '好的，明天见！', time: '14:23', unread: 2 },
-  { id: 2, name: '李四', avatar: 'https://i.pravatar.cc/40?u=a042581f4e29026705d', lastMessage: '这个需求我们评估一下。', time: '14:20', unread: 0 },
-  { id: 3, name: '产品-王五', avatar: 'https://i.pravatar.cc/40?u=a042581f4e29026706d', lastMessage: '[文件] 新版UI设计稿.zip', time: '13:55', unread: 1 },
-  { id: 4, name: '技术支持-赵六', avatar: 'https://i.pravatar.cc/40?u=a042581f4e29026707d', lastMessage: '你那边现在能复现吗？', time: '13:40', unread: 0 },
-  { id: 5, name: '市场部-周七', avatar: 'https://i.pravatar.cc/40?u=a042581f4e29026708d', lastMessage: '活动下周上线，请周知。', time: '11:10', unread: 0 },
-];
+// 会话列表来自后端推送（微信会话列表中的标题和未读数），头像按标题生成
+const avatarFor = (title) => `https://i.pravatar.cc/40?u=${encodeURIComponent(title)}`;
 
 export default function App() {
   const [activeTab, setActiveTab] = useState('chat');
-  const [activeConversation, setActiveConversation] = useState(1);
+  const [conversations, setConversations] = useState([]);
+  // 用户在左侧选中的会话标题；未选择时跟随微信中当前打开的会话
+  const [activeConversation, setActiveConversation] = useState(null);
+  const [wechatConversation, setWechatConversation] = useState(null);
   const [inputText, setInputText] = useState('');
   const [messages, setMessages] = useState({});
   const [aiMode, setAiMode] = useState('copilot');
@@ -22,43 +20,81 @@ export default function App() {
 
   const messagesEndRef = useRef(null);
 
+  const shownConversation = activeConversation ?? wechatConversation;
+
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages, activeConversation]);
+  }, [messages, shownConversation]);
+
+  // 已经收到过推送的会话标题；某个会话的第一次推送只用于填充列表，不触发 AI 建议
+  const syncedRef = useRef(new Set());
+  // 每个会话已经收到的消息 id（{标题: Set}）。新消息在这里判断，而不是在 setMessages 的 updater 中：
+  // updater 必须是纯函数，StrictMode 下会被调用两次
+  const knownIdsRef = useRef(new Map());
 
   useEffect(() => {
-    const intervalId = setInterval(() => {
-      axios.get('http://127.0.0.1:8000/api/sync_messages')
-        .then(response => {
-          if (response.data.status === 'success') {
-            setWechatStatus('ok');
-            const fetchedMessages = response.data.data;
-            
-            setMessages(prevMessages => {
-              const currentMessages = prevMessages[activeConversation] || [];
-              const lastKnownMessage = currentMessages[currentMessages.length - 1];
-              const lastFetchedMessage = fetchedMessages[fetchedMessages.length - 1];
-
-              if (lastFetchedMessage && lastFetchedMessage.sender === 'them' && 
-                  (!lastKnownMessage || lastKnownMessage.content !== lastFetchedMessage.content)) {
-                handleNewIncomingMessage(lastFetchedMessage);
-              }
-              
-              return { ...prevMessages, [activeConversation]: fetchedMessages };
-            });
-          } else {
-            setWechatStatus('error');
-            console.error("WeChat not found or error syncing messages.");
-          }
-        })
-        .catch(error => {
-          setWechatStatus('error');
-          console.error("Error connecting to backend:", error);
-        });
-    }, 2000);
-
-    return () => clearInterval(intervalId);
-  }, [activeConversation]);
+    const applySync = (payload) => {
+      if (payload.status !== 'success') {
+        setWechatStatus('error');
+        console.error("WeChat not found or error syncing messages.");
+        return;
+      }
+      setWechatStatus('ok');
+      const { data: fetchedMessages, truncated, conversation } = payload;
+      setConversations(payload.conversations || []);
+      setWechatConversation(payload.active);
+      const firstSync = !syncedRef.current.has(conversation);
+      syncedRef.current.add(conversation);
+      if (!truncated && fetchedMessages.length === 0) return;
+
+      const knownIds = truncated ? new Set() : (knownIdsRef.current.get(conversation) || new Set());
+      const incoming = fetchedMessages.filter(m => !knownIds.has(m.id));
+      incoming.forEach(m => knownIds.add(m.id));
+      knownIdsRef.current.set(conversation, knownIds);
+
+      setMessages(prevMessages => {
+        // 增量同步：按消息 id 去重后追加（已从 /api/history 读取的消息 id 相同，不会重复）；游标已过期时整体替换
+        const currentMessages = truncated ? [] : (prevMessages[conversation] || []);
+        const currentIds = new Set(currentMessages.map(m => m.id));
+        const added = fetchedMessages.filter(m => !currentIds.has(m.id));
+        // 本地发送、尚未被同步回来的消息，在同步到相同内容的己方消息后移除
+        const syncedMine = new Set(added.filter(m => m.sender === 'me').map(m => m.content));
+        const kept = currentMessages.filter(m => !(m.pending && syncedMine.has(m.content)));
+        return { ...prevMessages, [conversation]: [...kept, ...added] };
+      });
+
+      const lastIncoming = incoming[incoming.length - 1];
+      if (!firstSync && !truncated && lastIncoming && lastIncoming.sender === 'them') {
+        handleNewIncomingMessage(lastIncoming);
+      }
+    };
+
+    // 后端只在有新消息或状态变化时推送，每个会话有自己的游标，切换会话不需要重新连接；
+    // 断线后 EventSource 会带上 Last-Event-ID 自动重连
+    const source = new EventSource('http://127.0.0.1:8000/api/events');
+    source.addEventListener('sync', event => applySync(JSON.parse(event.data)));
+    source.onerror = (error) => {
+      setWechatStatus('error');
+      console.error("Error connecting to backend:", error);
+    };
+
+    return () => source.close();
+  }, []);
+
+  // 选中一个还没有同步过的会话时，从本地历史中读取它最近的消息
+  const selectConversation = (title) => {
+    setActiveConversation(title === wechatConversation ? null : title);
+    if (messages[title]) return;
+    axios.get('http://127.0.0.1:8000/api/history', { params: { conversation: title, limit: 50 } })
+      .then(response => {
+        const history = (response.data?.data || []).slice().reverse();
+        const knownIds = knownIdsRef.current.get(title) || new Set();
+        history.forEach(m => knownIds.add(m.id));
+        knownIdsRef.current.set(title, knownIds);
+        setMessages(prev => (prev[title] ? prev : { ...prev, [title]: history }));
+      })
+      .catch(error => console.error("Error loading history:", error));
+  };
 
 
   const handleNewIncomingMessage = (message) => {
@@ -80,17 +116,16 @@ export default function App() {
     const newMessage = {
       sender: 'me',
       content: inputText,
+      pending: true,
       time: new Date().toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit', hour12: false }),
     };
     setMessages(prev => ({
         ...prev,
-        [activeConversation]: [...(prev[activeConversation] || []), newMessage]
+        [shownConversation]: [...(prev[shownConversation] || []), newMessage]
     }));
     setInputText('');
   };
 
-  const activeConvDetails = conversations.find(c => c.id === activeConversation);
-
   return (
     <div className="flex h-screen w-full bg-[#f0f2f5] text-sm">
       {/* Left Sidebar */}
@@ -122,17 +157,17 @@ export default function App() {
         </div>
         <div className="flex-1 overflow-y-auto">
             {conversations.map(conv => (
-                <div key={conv.id} 
-                     className={classnames("flex items-center p-3 cursor-pointer hover:bg-[#e9e9e9]", {"bg-[#c9c9c9]": activeConversation === conv.id})}
-                     onClick={() => setActiveConversation(conv.id)}>
-                    <img src={conv.avatar} alt={conv.name} className="h-10 w-10 rounded-md mr-3" />
+                <div key={conv.title} 
+                     className={classnames("flex items-center p-3 cursor-pointer hover:bg-[#e9e9e9]", {"bg-[#c9c9c9]": shownConversation === conv.title})}
+                     onClick={() => selectConversation(conv.title)}>
+                    <img src={avatarFor(conv.title)} alt={conv.title} className="h-10 w-10 rounded-md mr-3" />
                     <div className="flex-1 overflow-hidden">
                         <div className="flex justify-between items-center">
-                            <p className="font-medium text-gray-800 truncate">{conv.name}</p>
-                            <p className="text-xs text-gray-400">{conv.time}</p>
+                            <p className="font-medium text-gray-800 truncate">{conv.title}</p>
+                            <p className="text-xs text-gray-400">{conv.last_message?.time}</p>
                         </div>
                         <div className="flex justify-between items-start">
-                            <p className="text-xs text-gray-500 truncate">{conv.lastMessage}</p>
+                            <p className="text-xs text-gray-500 truncate">{conv.last_message?.content}</p>
                             {conv.unread > 0 && <span className="bg-red-500 text-white text-[10px] rounded-full px-1.5 py-0.5">{conv.unread}</span>}
                         </div>
                     </div>
@@ -145,7 +180,7 @@ export default function App() {
       <div className="flex-1 flex flex-col">
         {/* Chat Header */}
         <div className="flex items-center justify-between p-3 border-b border-gray-200 bg-white">
-            <div className="font-semibold text-gray-800">{activeConvDetails?.name || 'Chat'}</div>
+            <div className="font-semibold text-gray-800">{shownConversation || 'Chat'}</div>
              <div className="text-xs text-gray-500 flex items-center gap-2">
                 {wechatStatus === 'connecting' && <><RefreshCw className="h-3 w-3 animate-spin" /><span>连接中...</span></>}
                 {wechatStatus === 'ok' && <span className="h-2 w-2 bg-green-500 rounded-full"></span>}
@@ -156,9 +191,9 @@ export default function App() {
 
         {/* Messages */}
         <div className="flex-1 overflow-y-auto p-4 bg-[#f0f2f5]">
-            {(messages[activeConversation] || []).map((msg, index) => (
-                <div key={index} className={classnames("flex mb-4", {'justify-end': msg.sender === 'me'})}>
-                    {msg.sender === 'them' && <img src={activeConvDetails?.avatar} alt="avatar" className="h-8 w-8 rounded-md mr-3" />}
+            {(messages[shownConversation] || []).map((msg, index) => (
+                <div key={msg.id || `local-${index}`} className={classnames("flex mb-4", {'justify-end': msg.sender === 'me'})}>
+                    {msg.sender === 'them' && <img src={avatarFor(shownConversation || '')} alt="avatar" className="h-8 w-8 rounded-md mr-3" />}
                     <div className={classnames("max-w-md rounded-lg px-3 py-2 text-sm", {
                         'bg-white text-gray-800': msg.sender === 'them',
                         'bg-[#95ec69] text-gray-800': msg.sender === 'me'
@@ -225,7 +260,7 @@ export default function App() {
 
             <div className="flex items-center justify-between">
                 <p className="text-xs font-semibold text-gray-600">回复建议</p>
-                <button onClick={() => handleNewIncomingMessage((messages[activeConversation] || []).slice(-1)[0])}><RefreshCw className="h-4 w-4 text-gray-400 hover:text-gray-600" /></button>
+                <button onClick={() => handleNewIncomingMessage((messages[shownConversation] || []).slice(-1)[0])}><RefreshCw className="h-4 w-4 text-gray-400 hover:text-gray-600" /></button>
             </div>
             
             <div className="flex flex-col gap-2">